@@ -0,0 +1,176 @@
+import contextlib
+import csv
+import io
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from net.create import load_project
+from tree.algo import build_tree_with_history, BudgetExceeded
+from tree.properties import has_deadend, has_deadend_reduced, has_deadend_unfolding, is_bounded, is_quasi_live, is_net_live, is_resettable
+
+# columns of one result row (also the CSV header)
+FIELDS = [
+    "file", "status", "places", "transitions", "nodes", "edges",
+    "bounded", "max_tokens", "quasi_live", "live", "resettable", "deadlock",
+    "seconds", "export", "dump", "error",
+]
+
+# ---------------------------------------------------------------------
+# analyse one project file, or a graph dump folder (tree/dump.py) which
+# skips the exploration (runs inside a worker process)
+# export_dir: also render the graph there as <name>.<export_format>
+# dump_dir: also save the graph there as a binary dump <name>.kmg
+# deadlock: "graph" (dead-ends of the graph), "reduced" (stubborn-set
+#   reduced state space, tree/stubborn.py; bounded project files only) or
+#   "unfolding" (complete finite prefix, tree/unfolding.py; safe project
+#   files only); the graph answers for the other files and when the check
+#   runs over max_nodes / time_limit
+def analyze_file(path: str, max_nodes: int | None = None, time_limit: float | None = None,
+                 export_dir: str | None = None, export_format: str = "png",
+                 dump_dir: str | None = None, deadlock: str = "graph") -> dict:
+    row = {f: None for f in FIELDS}
+    row["file"] = path
+    start = time.perf_counter()
+
+    try:
+        # the properties print their reasoning, keep the worker output clean
+        with contextlib.redirect_stdout(io.StringIO()):
+            # a dump is a folder, a project a file (tree.dump needs numpy:
+            # imported only when a dump is read or written)
+            if os.path.isdir(path):
+                from tree.dump import is_dump, load_graph
+                if not is_dump(path):
+                    raise ValueError("folder is not a graph dump (no meta.json / markings.npy)")
+                graph = load_graph(path)
+                places, transitions = graph.places, graph.transitions
+                row["places"] = len(places)
+                row["transitions"] = len(transitions)
+            else:
+                net, m0 = load_project(path)
+                places, transitions = list(m0), [t.name for t in net.transition()]
+                row["places"] = len(places)
+                row["transitions"] = len(transitions)
+                graph, _ = build_tree_with_history(net, m0, record_history=False,
+                                                   max_nodes=max_nodes, time_limit=time_limit)
+            bound = is_bounded(graph)
+            row["nodes"] = len(graph.nodes)
+            row["edges"] = len(graph.edges)
+            row["bounded"] = bound is not False
+            row["max_tokens"] = bound if bound is not False else None
+            row["quasi_live"] = is_quasi_live(graph, transitions)
+            row["live"] = is_net_live(graph, transitions)
+            row["resettable"] = is_resettable(graph)
+            row["deadlock"] = None
+            if deadlock != "graph" and not os.path.isdir(path):
+                try:
+                    if deadlock == "unfolding":
+                        row["deadlock"] = has_deadend_unfolding(net, m0, time_limit=time_limit)
+                    elif bound is not False:
+                        row["deadlock"] = has_deadend_reduced(net, m0, max_states=max_nodes,
+                                                              time_limit=time_limit)
+                except (ValueError, BudgetExceeded):   # not safe / bounded, or over budget
+                    pass
+            if row["deadlock"] is None:
+                row["deadlock"] = has_deadend(graph)
+        if dump_dir:
+            from tree.dump import save_graph
+            row["dump"] = os.path.join(dump_dir, f"{_stem(path)}.kmg")
+            save_graph(graph, row["dump"], places, transitions)
+        if export_dir:
+            row["export"] = export_image(graph, path, export_dir, export_format)
+        row["status"] = "ok"
+    except BudgetExceeded as e:
+        row["status"] = "budget"
+        row["error"] = str(e)
+    except Exception as e:
+        row["status"] = "error"
+        row["error"] = f"{type(e).__name__}: {e}"
+
+    row["seconds"] = round(time.perf_counter() - start, 4)
+    return row
+
+# ---------------------------------------------------------------------
+# render the graph with Qt on the offscreen platform (imported lazily:
+# plain analysis runs do not need Qt at all)
+def export_image(graph, path: str, export_dir: str, export_format: str) -> str:
+    from ui.export import ensure_app, export_graph
+    ensure_app()
+    files = export_graph(graph, os.path.join(export_dir, f"{_stem(path)}.{export_format}"))
+    return files[0] if len(files) == 1 else f"{len(files)} tiles"
+
+def _stem(path: str) -> str:
+    return os.path.splitext(os.path.basename(os.path.normpath(path)))[0]
+
+# ---------------------------------------------------------------------
+# result writers: one row at a time so results stream as workers finish
+class JsonlWriter:
+    def __init__(self, out):
+        self.out = out
+
+    def write(self, row: dict) -> None:
+        self.out.write(json.dumps(row) + "\n")
+        self.out.flush()
+
+class CsvWriter:
+    def __init__(self, out):
+        self.out = out
+        self.writer = csv.DictWriter(out, fieldnames=FIELDS)
+        self.writer.writeheader()
+
+    def write(self, row: dict) -> None:
+        self.writer.writerow(row)
+        self.out.flush()
+
+WRITERS = {"jsonl": JsonlWriter, "csv": CsvWriter}
+
+# ---------------------------------------------------------------------
+# summary table (file, status, size, properties)
+def format_summary(rows: list[dict]) -> str:
+    def yn(v):
+        return "-" if v is None else ("yes" if v else "no")
+
+    header = ["file", "status", "nodes", "edges", "bounded", "q-live", "live", "reset", "dead", "time(s)"]
+    table = [header]
+    for r in sorted(rows, key=lambda r: r["file"]):
+        table.append([
+            os.path.basename(r["file"]), r["status"],
+            "-" if r["nodes"] is None else str(r["nodes"]),
+            "-" if r["edges"] is None else str(r["edges"]),
+            yn(r["bounded"]), yn(r["quasi_live"]), yn(r["live"]),
+            yn(r["resettable"]), yn(r["deadlock"]), f"{r['seconds']:.3f}",
+        ])
+
+    widths = [max(len(line[i]) for line in table) for i in range(len(header))]
+    lines = ["  ".join(c.ljust(w) for c, w in zip(line, widths)) for line in table]
+    lines.insert(1, "  ".join("-" * w for w in widths))
+
+    counts = {s: sum(1 for r in rows if r["status"] == s) for s in ("ok", "budget", "error")}
+    lines.append(f"\n{len(rows)} files: {counts['ok']} ok, {counts['budget']} over budget, {counts['error']} failed")
+    return "\n".join(lines)
+
+# ---------------------------------------------------------------------
+# analyse many files on a process pool, stream rows to out, summary to err
+def run_batch(paths: list[str], out=None, fmt: str = "jsonl", jobs: int | None = None,
+              max_nodes: int | None = None, time_limit: float | None = None,
+              summary_out=None, export_dir: str | None = None, export_format: str = "png",
+              dump_dir: str | None = None, deadlock: str = "graph") -> list[dict]:
+    out = out or sys.stdout
+    summary_out = summary_out or sys.stderr
+    writer = WRITERS[fmt](out)
+    rows = []
+    for folder in (export_dir, dump_dir):
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        futures = [pool.submit(analyze_file, p, max_nodes, time_limit, export_dir, export_format, dump_dir, deadlock) for p in paths]
+        for fut in as_completed(futures):
+            row = fut.result()
+            writer.write(row)
+            rows.append(row)
+
+    print(format_summary(rows), file=summary_out)
+    return rows
@@ -0,0 +1,69 @@
+import argparse
+import glob
+import sys
+
+from batch.analyze import run_batch, WRITERS
+
+# ---------------------------------------------------------------------
+# expand the patterns ourselves (Windows shells pass "*.json" as is)
+def expand_paths(patterns: list[str]) -> list[str]:
+    paths = []
+    for pattern in patterns:
+        matches = sorted(glob.glob(pattern))
+        paths.extend(matches if matches else [pattern])
+    return paths
+
+# ---------------------------------------------------------------------
+# argument parser: python -m batch <command> ...
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="python -m batch", description="Headless Petri net tools")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    analyze = sub.add_parser("analyze", help="coverability + property analysis of project files")
+    analyze.add_argument("files", nargs="+", help="project .json files, graph dumps (.kmg) or glob patterns")
+    analyze.add_argument("-f", "--format", choices=sorted(WRITERS), default="jsonl", help="result format (default: jsonl)")
+    analyze.add_argument("-o", "--output", help="write results to this file instead of stdout")
+    analyze.add_argument("-j", "--jobs", type=int, default=None, help="worker processes (default: all cores)")
+    analyze.add_argument("--max-nodes", type=int, default=None, help="node budget per file")
+    analyze.add_argument("--time-limit", type=float, default=None, help="time budget per file, in seconds")
+    analyze.add_argument("--export-dir", help="also render each graph into this folder (Qt, offscreen)")
+    analyze.add_argument("--export-format", choices=["png", "svg", "pdf"], default="png", help="image format (default: png)")
+    analyze.add_argument("--dump-dir", help="also save each graph into this folder as a binary dump (.kmg)")
+    analyze.add_argument("--deadlock", choices=["graph", "reduced", "unfolding"], default="graph",
+                         help="deadlock check: dead-ends of the graph, the stubborn-set reduced state space "
+                              "for bounded nets, or the unfolding prefix for safe nets (default: graph)")
+    analyze.set_defaults(func=cmd_analyze)
+
+    worker = sub.add_parser("worker", help="serve a distributed exploration (tree/distributed.py)")
+    worker.add_argument("address", help="coordinator HOST:PORT")
+    worker.add_argument("--batch-size", type=int, default=512, help="successors per message (default: 512)")
+    worker.set_defaults(func=cmd_worker)
+
+    return parser
+
+# ---------------------------------------------------------------------
+# analyze command, exit code 1 if a file could not be analysed
+def cmd_analyze(args) -> int:
+    paths = expand_paths(args.files)
+    options = dict(fmt=args.format, jobs=args.jobs, max_nodes=args.max_nodes, time_limit=args.time_limit,
+                   export_dir=args.export_dir, export_format=args.export_format, dump_dir=args.dump_dir,
+                   deadlock=args.deadlock)
+    if args.output:
+        with open(args.output, "w", newline="") as out:
+            rows = run_batch(paths, out, **options)
+    else:
+        rows = run_batch(paths, sys.stdout, **options)
+    return 1 if any(r["status"] == "error" for r in rows) else 0
+
+# ---------------------------------------------------------------------
+# worker command: one exploration, then exit
+def cmd_worker(args) -> int:
+    from tree.distributed import run_worker
+
+    host, _, port = args.address.rpartition(":")
+    run_worker(host or "127.0.0.1", int(port), batch_size=args.batch_size)
+    return 0
+
+def main(argv=None) -> int:
+    args = build_parser().parse_args(argv)
+    return args.func(args)
@@ -0,0 +1,35 @@
+import argparse
+import json
+import sys
+
+from bench.generators import FAMILIES
+from bench.run import TARGETS, run_benchmarks
+
+# ---------------------------------------------------------------------
+# python -m bench [--families ...] [--targets ...] [-o results.json]
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m bench", description="Benchmarks for the analysis engines")
+    parser.add_argument("--families", nargs="+", choices=sorted(FAMILIES), default=sorted(FAMILIES))
+    parser.add_argument("--targets", nargs="+", choices=list(TARGETS), default=list(TARGETS))
+    parser.add_argument("--sizes", nargs="+", type=int, help="override the default sizes of every family")
+    parser.add_argument("--repeat", type=int, default=3, help="timing runs per measurement (best is kept)")
+    parser.add_argument("--max-nodes", type=int, default=20000, help="stop a family above this many states")
+    parser.add_argument("--time-limit", type=float, default=30.0, help="stop a family when a build takes longer (s)")
+    parser.add_argument("--no-memory", action="store_true", help="skip the tracemalloc runs")
+    parser.add_argument("-o", "--output", help="write the JSON results to this file instead of stdout")
+    args = parser.parse_args(argv)
+
+    families = {name: (FAMILIES[name][0], args.sizes or FAMILIES[name][1]) for name in args.families}
+    report = run_benchmarks(families, args.targets, args.repeat, args.max_nodes,
+                            args.time_limit, memory=not args.no_memory)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,133 @@
+import random
+
+from snakes.nets import PetriNet
+from net.create import create_net, add_place, add_transition, add_input_arc, add_output_arc
+
+# Parametric net families used by the benchmarks.
+# Every generator returns (net, m0) like PetriNetView.get_snakes_net().
+
+# ---------------------------------------------------------------------
+# small helper: add a place and record its initial tokens
+def _place(net: PetriNet, m0: dict, name: str, tokens: int = 0) -> None:
+    add_place(net, name, tokens)
+    m0[name] = tokens
+
+# ---------------------------------------------------------------------
+# helper: transition with its input and output places (weight 1)
+def _transition(net: PetriNet, name: str, inputs: list[str], outputs: list[str]) -> None:
+    add_transition(net, name)
+    for p in inputs:
+        add_input_arc(net, p, name)
+    for p in outputs:
+        add_output_arc(net, name, p)
+
+# ---------------------------------------------------------------------
+# n-slot buffer: a token travels through n one-place slots (2^n states)
+def buffer(n: int):
+    net, m0 = create_net(f"buffer{n}"), {}
+    for i in range(n):
+        _place(net, m0, f"empty{i}", 1)
+        _place(net, m0, f"full{i}", 0)
+
+    _transition(net, "put", ["empty0"], ["full0"])
+    for i in range(n - 1):
+        _transition(net, f"move{i}", [f"full{i}", f"empty{i + 1}"], [f"empty{i}", f"full{i + 1}"])
+    _transition(net, "get", [f"full{n - 1}"], [f"empty{n - 1}"])
+    return net, m0
+
+# ---------------------------------------------------------------------
+# dining philosophers: left fork first, then right fork (can deadlock)
+def philosophers(n: int):
+    net, m0 = create_net(f"philo{n}"), {}
+    for i in range(n):
+        _place(net, m0, f"think{i}", 1)
+        _place(net, m0, f"left{i}", 0)
+        _place(net, m0, f"eat{i}", 0)
+        _place(net, m0, f"fork{i}", 1)
+
+    for i in range(n):
+        right = f"fork{(i + 1) % n}"
+        _transition(net, f"take_left{i}", [f"think{i}", f"fork{i}"], [f"left{i}"])
+        _transition(net, f"take_right{i}", [f"left{i}", right], [f"eat{i}"])
+        _transition(net, f"release{i}", [f"eat{i}"], [f"think{i}", f"fork{i}", right])
+    return net, m0
+
+# ---------------------------------------------------------------------
+# n independent producer/consumer pairs sharing nothing (8^n states)
+def producer_consumer(n: int):
+    net, m0 = create_net(f"prodcons{n}"), {}
+    for i in range(n):
+        for name, tokens in [("pready", 1), ("pdone", 0), ("free", 1), ("full", 0), ("cready", 1), ("cdone", 0)]:
+            _place(net, m0, f"{name}{i}", tokens)
+
+        _transition(net, f"produce{i}", [f"pready{i}"], [f"pdone{i}"])
+        _transition(net, f"deliver{i}", [f"pdone{i}", f"free{i}"], [f"pready{i}", f"full{i}"])
+        _transition(net, f"consume{i}", [f"full{i}", f"cready{i}"], [f"free{i}", f"cdone{i}"])
+        _transition(net, f"rest{i}", [f"cdone{i}"], [f"cready{i}"])
+    return net, m0
+
+# ---------------------------------------------------------------------
+# token ring: a single token moving around n places (n states)
+def token_ring(n: int):
+    net, m0 = create_net(f"ring{n}"), {}
+    for i in range(n):
+        _place(net, m0, f"p{i}", 1 if i == 0 else 0)
+    for i in range(n):
+        _transition(net, f"t{i}", [f"p{i}"], [f"p{(i + 1) % n}"])
+    return net, m0
+
+# ---------------------------------------------------------------------
+# workflow pipeline: a fork starts n independent branches of `length`
+# steps and a join ends them; tokens only move toward "end"
+# ((length + 1)^n + 2 states)
+def pipeline(n: int, length: int = 3):
+    net, m0 = create_net(f"pipeline{n}"), {}
+    _place(net, m0, "start", 1)
+    _place(net, m0, "end", 0)
+    for i in range(n):
+        for j in range(length + 1):
+            _place(net, m0, f"s{i}_{j}", 0)
+        for j in range(length):
+            _transition(net, f"step{i}_{j}", [f"s{i}_{j}"], [f"s{i}_{j + 1}"])
+    _transition(net, "fork", ["start"], [f"s{i}_0" for i in range(n)])
+    _transition(net, "join", [f"s{i}_{length}" for i in range(n)], ["end"])
+    return net, m0
+
+# ---------------------------------------------------------------------
+# n independent unbounded counters (every counter ends up as omega)
+def unbounded_counters(n: int):
+    net, m0 = create_net(f"counter{n}"), {}
+    for i in range(n):
+        _place(net, m0, f"run{i}", 1)
+        _place(net, m0, f"count{i}", 0)
+        _transition(net, f"inc{i}", [f"run{i}"], [f"run{i}", f"count{i}"])
+    return net, m0
+
+# ---------------------------------------------------------------------
+# random net: every place/transition pair gets an input (resp. output) arc
+# with probability `density`; each transition keeps at least one input
+def random_net(n_places: int, n_transitions: int | None = None, density: float = 0.2, seed: int = 0):
+    rng = random.Random(seed)
+    n_transitions = n_transitions if n_transitions is not None else n_places
+    net, m0 = create_net(f"random{n_places}x{n_transitions}"), {}
+
+    places = [f"p{i}" for i in range(n_places)]
+    for p in places:
+        _place(net, m0, p, rng.randint(0, 1))
+
+    for j in range(n_transitions):
+        inputs = [p for p in places if rng.random() < density] or [rng.choice(places)]
+        outputs = [p for p in places if rng.random() < density]
+        _transition(net, f"t{j}", inputs, outputs)
+    return net, m0
+
+# family name -> (generator, default sizes)
+FAMILIES = {
+    "buffer": (buffer, [2, 4, 6, 8]),
+    "philosophers": (philosophers, [2, 3, 4, 5]),
+    "producer_consumer": (producer_consumer, [1, 2, 3]),
+    "token_ring": (token_ring, [4, 8, 16, 32]),
+    "pipeline": (pipeline, [2, 4, 6, 8]),
+    "unbounded_counters": (unbounded_counters, [1, 2, 3, 4]),
+    "random": (random_net, [4, 6, 8, 10]),
+}
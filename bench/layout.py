@@ -0,0 +1,50 @@
+import argparse
+import json
+import random
+import sys
+
+from bench.run import time_call, peak_memory, scaling_exponent
+from ui.layout import layered_layout
+
+# ---------------------------------------------------------------------
+# synthetic coverability-like graph: a random spanning tree from node 0
+# plus `extra` random edges per node (cross and back edges)
+def random_graph(n: int, extra: float = 1.0, seed: int = 0):
+    rng = random.Random(seed)
+    edges = [(rng.randrange(max(0, i - 50), i), i) for i in range(1, n)]
+    edges += [(rng.randrange(n), rng.randrange(n)) for _ in range(int(n * extra))]
+    return list(range(n)), edges
+
+# ---------------------------------------------------------------------
+# python -m bench.layout [--sizes ...]: layout time on large graphs
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m bench.layout", description="Layered layout benchmark")
+    parser.add_argument("--sizes", nargs="+", type=int, default=[1000, 10000, 20000, 50000])
+    parser.add_argument("--extra", type=float, default=1.0, help="extra random edges per node")
+    parser.add_argument("--max-iter", type=int, default=8, help="crossing reduction sweeps")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("-o", "--output", help="write the JSON results to this file instead of stdout")
+    args = parser.parse_args(argv)
+
+    results = []
+    for n in args.sizes:
+        nodes, edges = random_graph(n, args.extra)
+        fn = lambda: layered_layout(nodes, edges, root=0, max_iter=args.max_iter)
+        best, median = time_call(fn, args.repeat)
+        results.append({"nodes": n, "edges": len(edges), "seconds": best,
+                        "median_seconds": median, "peak_bytes": peak_memory(fn)})
+        print(f"[bench] layout {n} nodes / {len(edges)} edges: {best * 1000:.1f} ms", file=sys.stderr)
+
+    report = {
+        "max_iter": args.max_iter,
+        "results": results,
+        "time_exponent": scaling_exponent([(r["nodes"], r["seconds"]) for r in results]),
+    }
+    out = open(args.output, "w") if args.output else sys.stdout
+    json.dump(report, out, indent=2)
+    if out is not sys.stdout:
+        out.close()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,175 @@
+import contextlib
+import gc
+import io
+import math
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+from dataclasses import dataclass
+
+from snakes.nets import PetriNet
+from tree.algo import KMGraph, build_tree_with_history, BudgetExceeded
+from tree.dfs import dfs_explore
+from tree.explore import explore
+from tree.export import to_dot
+from tree.matrices import extract_pre_post
+from tree.stubborn import stubborn_explore
+from tree.sweep import sweep_explore
+import tree.properties as properties
+from ui.layout import layered_layout
+
+# ---------------------------------------------------------------------
+# one benchmark input: a generated net and its (prebuilt) coverability graph
+@dataclass
+class Case:
+    family: str
+    size: int
+    net: PetriNet
+    m0: dict
+    graph: KMGraph | None = None
+
+# ---------------------------------------------------------------------
+# benchmark targets: name -> (case -> zero-argument callable)
+TARGETS = {
+    "extract_pre_post": lambda c: lambda: extract_pre_post(c.net),
+    "build_tree": lambda c: lambda: build_tree_with_history(c.net, c.m0, record_history=False),
+    "build_tree_with_history": lambda c: lambda: build_tree_with_history(c.net, c.m0),
+    "has_deadend": lambda c: lambda: properties.has_deadend(c.graph),
+    "is_bounded": lambda c: lambda: properties.is_bounded(c.graph),
+    "quasi_live_per_transition": lambda c: lambda: properties.quasi_live_per_transition(c.graph, c.net.transition()),
+    "is_quasi_live": lambda c: lambda: properties.is_quasi_live(c.graph, c.net.transition()),
+    "is_resettable": lambda c: lambda: properties.is_resettable(c.graph),
+    "reachable_transitions": lambda c: lambda: properties.reachable_transitions(c.graph),
+    "liveness_per_transition": lambda c: lambda: properties.liveness_per_transition(c.graph, c.net.transition()),
+    "is_net_live": lambda c: lambda: properties.is_net_live(c.graph, c.net.transition()),
+    "to_dot": lambda c: lambda: to_dot(c.graph),
+    "layout": lambda c: lambda: layered_layout([n.id for n in c.graph.nodes], [(e.src, e.dst) for e in c.graph.edges]),
+    "explore_packed": lambda c: lambda: explore(c.net, c.m0, store="packed"),
+    "explore_tuples": lambda c: lambda: explore(c.net, c.m0, store="tuple"),
+    "explore_dfs": lambda c: lambda: dfs_explore(c.net, c.m0),
+    "explore_sweep": lambda c: lambda: sweep_explore(c.net, c.m0),
+    "explore_stubborn": lambda c: lambda: stubborn_explore(c.net, c.m0),
+}
+
+# targets enumerating every reachable marking: skipped on unbounded nets
+BOUNDED_ONLY = {"explore_packed", "explore_tuples", "explore_dfs", "explore_sweep", "explore_stubborn"}
+
+# targets that are too slow to run on big state spaces: name -> max states
+# (none since the history keeps per-step deltas instead of graph copies)
+TARGET_MAX_STATES: dict[str, int] = {}
+
+# ---------------------------------------------------------------------
+# time a callable: best and median of `repeat` runs (stdout swallowed)
+def time_call(fn, repeat: int = 3) -> tuple[float, float]:
+    times = []
+    for _ in range(repeat):
+        gc.collect()
+        with contextlib.redirect_stdout(io.StringIO()):
+            start = time.perf_counter()
+            fn()
+            times.append(time.perf_counter() - start)
+    return min(times), statistics.median(times)
+
+# ---------------------------------------------------------------------
+# peak Python memory allocated during one call (separate run: tracemalloc
+# slows everything down, so it never overlaps with the timing runs)
+def peak_memory(fn) -> int:
+    gc.collect()
+    tracemalloc.start()
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            fn()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peak
+
+# ---------------------------------------------------------------------
+# least-squares slope of log(time) against log(states): ~1 means linear,
+# ~2 quadratic... None when there are not enough usable points
+def scaling_exponent(points: list[tuple[float, float]]) -> float | None:
+    pts = [(math.log(x), math.log(y)) for x, y in points if x > 0 and y > 0]
+    if len(pts) < 2 or len({x for x, _ in pts}) < 2:
+        return None
+    mx = sum(x for x, _ in pts) / len(pts)
+    my = sum(y for _, y in pts) / len(pts)
+    num = sum((x - mx) * (y - my) for x, y in pts)
+    den = sum((x - mx) ** 2 for x, _ in pts)
+    return round(num / den, 3)
+
+# ---------------------------------------------------------------------
+# run every target on every size of every family
+# a family stops growing as soon as one size goes over the budget
+def run_benchmarks(families: dict, targets: list[str], repeat: int = 3,
+                   max_nodes: int | None = None, time_limit: float | None = None,
+                   memory: bool = True, log=None) -> dict:
+    log = log or sys.stderr
+    results = []
+
+    for family, (generator, sizes) in families.items():
+        for size in sizes:
+            net, m0 = generator(size)
+            case = Case(family, size, net, m0)
+            try:
+                with contextlib.redirect_stdout(io.StringIO()):
+                    case.graph, _ = build_tree_with_history(net, m0, record_history=False,
+                                                            max_nodes=max_nodes, time_limit=time_limit)
+            except BudgetExceeded as e:
+                print(f"[bench] {family}({size}): {e}, skipping larger sizes", file=log)
+                results.append({"family": family, "size": size, "status": "budget", "error": str(e)})
+                break
+
+            base = {
+                "family": family, "size": size,
+                "places": len(m0), "transitions": len(net.transition()),
+                "states": len(case.graph.nodes), "edges": len(case.graph.edges),
+            }
+            with contextlib.redirect_stdout(io.StringIO()):
+                bounded = properties.is_bounded(case.graph) is not False
+            for name in targets:
+                if (base["states"] > TARGET_MAX_STATES.get(name, base["states"])
+                        or (name in BOUNDED_ONLY and not bounded)):
+                    results.append(dict(base, target=name, status="skipped"))
+                    continue
+                fn = TARGETS[name](case)
+                best, median = time_call(fn, repeat)
+                row = dict(base, target=name, status="ok", seconds=best, median_seconds=median)
+                if memory:
+                    row["peak_bytes"] = peak_memory(fn)
+                results.append(row)
+                print(f"[bench] {family}({size}) {name}: {best * 1000:.3f} ms, {base['states']} states", file=log)
+
+    return {
+        "meta": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "repeat": repeat,
+            "max_nodes": max_nodes,
+            "time_limit": time_limit,
+        },
+        "results": results,
+        "scaling": scaling_curves(results),
+    }
+
+# ---------------------------------------------------------------------
+# group the results per (family, target) into curves + fitted exponent
+def scaling_curves(results: list[dict]) -> list[dict]:
+    curves = {}
+    for r in results:
+        if r["status"] != "ok":
+            continue
+        curves.setdefault((r["family"], r["target"]), []).append(r)
+
+    out = []
+    for (family, target), rows in curves.items():
+        rows.sort(key=lambda r: r["size"])
+        out.append({
+            "family": family,
+            "target": target,
+            "points": [{"size": r["size"], "states": r["states"], "seconds": r["seconds"],
+                        "peak_bytes": r.get("peak_bytes")} for r in rows],
+            "time_exponent": scaling_exponent([(r["states"], r["seconds"]) for r in rows]),
+        })
+    return out
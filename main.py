@@ -11,7 +11,6 @@ from PyQt6.QtCore import Qt, QSize
 # --- YOUR PROJECT IMPORTS ---
 from snakes.nets import PetriNet, Place, Transition, Value
 from tree.algo import build_tree_with_history
-from ui.graph import build_scene_from_graph
 from ui.right_sidebar import AnalysisPanel
 from ui.toolbar import MainToolbar
 
@@ -137,8 +136,8 @@ class PetriNetApp(QMainWindow):
         """Coordination: Get data from Canvas -> Pass to Analysis Panel."""
         net, m0 = self.canvas.get_snakes_net() # Clean export
 
-        if hasattr(self.analysis_sidebar, 'view') and self.analysis_sidebar.view.scene():
-            self.analysis_sidebar.view.scene().clear()
+        if hasattr(self.analysis_sidebar, 'view'):
+            self.analysis_sidebar.clear_graph()
 
         self.analysis_sidebar.set_net_data(net, m0)
         self.analysis_sidebar.run_full()
@@ -146,8 +145,7 @@ class PetriNetApp(QMainWindow):
     def run_step_init(self):
         print("[ACTION] Initializing Stepper...")
         if hasattr(self.analysis_sidebar, 'view'):
-            if self.analysis_sidebar.view.scene():
-                self.analysis_sidebar.view.scene().clear()
+            self.analysis_sidebar.clear_graph()
 
         net, m0 = self.canvas.get_snakes_net()
         self.analysis_sidebar.set_net_data(net, m0)
@@ -206,8 +204,7 @@ class PetriNetApp(QMainWindow):
 
             # 2. Clear Analysis UI
             if hasattr(self, 'analysis_sidebar'):
-                if self.analysis_sidebar.view.scene():
-                    self.analysis_sidebar.view.scene().clear()
+                self.analysis_sidebar.clear_graph()
 
             # 3. Update Visuals
             self.update_stats()
@@ -1,3 +1,4 @@
+import json
 from snakes.nets import PetriNet, Place, Transition, Value
 
 # ---------------------------------------------------------------------
@@ -35,4 +36,33 @@ def get_marking_as_dict(net: PetriNet) -> dict[str, int]:
 
     return marking
 
+# ---------------------------------------------------------------------
+# build a net + initial marking from a saved project (ProjectManager layout)
+# same rules as the canvas export: an arc starting at a place is an input arc
+def net_from_project(data: dict, name: str = "ProjectNet") -> tuple[PetriNet, dict[str, int]]:
+    net = create_net(name)
+    m0: dict[str, int] = {}
+
+    for p in data.get("places", []):
+        add_place(net, p["label"], p.get("tokens", 0))
+        m0[p["label"]] = p.get("tokens", 0)
+
+    for t in data.get("transitions", []):
+        add_transition(net, t["label"])
 
+    for arc in data.get("arcs", []):
+        src, tgt = arc["start"], arc["end"]
+        weight = arc.get("weight", 1)
+        if src in m0:
+            add_input_arc(net, src, tgt, weight)
+        else:
+            add_output_arc(net, src, tgt, weight)
+
+    return net, m0
+
+# ---------------------------------------------------------------------
+# read a project .json file -> net + initial marking (no Qt needed)
+def load_project(path: str) -> tuple[PetriNet, dict[str, int]]:
+    with open(path, "r") as f:
+        data = json.load(f)
+    return net_from_project(data)
@@ -0,0 +1,27 @@
+import contextlib
+import io
+
+import numpy as np
+
+from bench.generators import philosophers, unbounded_counters
+from tree import properties
+from tree.algo import build_tree_with_history
+from tree.dump import save_graph, load_graph
+
+# ---------------------------------------------------------------------
+# properties of a reopened dump: same answers as on the graph, read from a
+# CSR index kept in numpy arrays
+def test_dump_properties_match_graph(tmp_path):
+    for i, (net, m0) in enumerate((philosophers(3), unbounded_counters(2))):
+        transitions = [t.name for t in net.transition()]
+        with contextlib.redirect_stdout(io.StringIO()):
+            graph, _ = build_tree_with_history(net, m0, record_history=False)
+            save_graph(graph, str(tmp_path / f"g{i}"), list(m0), transitions)
+            dumped = load_graph(str(tmp_path / f"g{i}"))
+            for check in (properties.has_deadend, properties.is_bounded, properties.is_resettable):
+                assert check(dumped) == check(graph)
+            for check in (properties.is_quasi_live, properties.is_net_live, properties.liveness_per_transition):
+                assert check(dumped, transitions) == check(graph, transitions)
+
+        adj = dumped.forward()
+        assert all(isinstance(a, np.ndarray) for a in (adj.indptr, adj.targets, adj.labels))
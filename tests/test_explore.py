@@ -0,0 +1,123 @@
+import contextlib
+import io
+
+import pytest
+
+from bench.generators import buffer, philosophers, pipeline, unbounded_counters
+from tree.algo import build_tree_with_history
+from tree.bitstate import bitstate_search
+from tree.disk import disk_explore
+from tree.distributed import distributed_explore
+from tree.explore import explore
+from tree.markings import OMEGA
+from tree.parallel import parallel_explore
+from tree.stubborn import stubborn_explore
+from tree.sweep import sweep_explore
+from tree.threaded import threaded_explore
+
+# small bounded nets: one deadlocking, one live
+NETS = [philosophers(3), buffer(4)]
+
+def _summary(result):
+    return result.states, result.edges, result.deadlock_count, result.bounds
+
+# ---------------------------------------------------------------------
+# an initial marking holding OMEGA is refused up front
+def test_explore_rejects_omega_initial_marking():
+    net, m0 = unbounded_counters(1)
+    m0["count0"] = OMEGA
+    for sparse in (False, True):
+        with pytest.raises(ValueError, match="finite initial marking"):
+            explore(net, m0, sparse=sparse)
+
+# ---------------------------------------------------------------------
+# hash-partitioned worker processes: same state space as explore
+@pytest.mark.parametrize("net, m0", NETS)
+def test_parallel_explore_matches_explore(net, m0):
+    expected = _summary(explore(net, m0))
+    assert _summary(parallel_explore(net, m0, workers=2)) == expected
+    graph = parallel_explore(net, m0, workers=2, build_graph=True).graph
+    assert (len(graph.nodes), len(graph.edges)) == expected[:2]
+
+# ---------------------------------------------------------------------
+# coordinator on localhost, two worker processes talking to it over TCP
+@pytest.mark.parametrize("net, m0", NETS)
+def test_distributed_explore_matches_explore(net, m0):
+    expected = _summary(explore(net, m0))
+    result = distributed_explore(net, m0, workers=2, host="127.0.0.1", build_graph=True)
+    assert _summary(result) == expected
+    assert (len(result.graph.nodes), len(result.graph.edges)) == expected[:2]
+
+# ---------------------------------------------------------------------
+# threads sharing a sharded visited table (also through explore(threads=))
+@pytest.mark.parametrize("net, m0", NETS)
+def test_threaded_explore_matches_explore(net, m0):
+    expected = _summary(explore(net, m0))
+    assert _summary(threaded_explore(net, m0, threads=3, shards=4)) == expected
+    graph = explore(net, m0, threads=3, build_graph=True).graph
+    assert (len(graph.nodes), len(graph.edges)) == expected[:2]
+
+# ---------------------------------------------------------------------
+# visited states and queue on disk (no key cache: every lookup reads the
+# files), graph written as a dump folder
+@pytest.mark.parametrize("net, m0", NETS)
+def test_disk_explore_matches_explore(net, m0, tmp_path):
+    expected = _summary(explore(net, m0))
+    result = disk_explore(net, m0, path=str(tmp_path / "states"), cache_size=0,
+                          graph_path=str(tmp_path / "graph"))
+    try:
+        assert _summary(result) == expected
+        assert len(result.store) == expected[0]
+        assert (len(result.graph.nodes), len(result.graph.edges)) == expected[:2]
+    finally:
+        result.store.close()
+
+# ---------------------------------------------------------------------
+# bitstate search with bits to spare: no state skipped on a bounded net
+@pytest.mark.parametrize("net, m0", NETS)
+def test_bitstate_search_matches_explore(net, m0):
+    result = bitstate_search(net, m0, bits=1 << 16)
+    assert _summary(result) == _summary(explore(net, m0))
+    assert not result.omega_places
+
+# OMEGA in M0: the other places are still accelerated (same OMEGA places
+# as the coverability tree) instead of growing until the state budget
+def test_bitstate_search_omega_initial_marking():
+    net, m0 = unbounded_counters(3)
+    m0["count0"] = OMEGA
+    with contextlib.redirect_stdout(io.StringIO()):
+        graph, _ = build_tree_with_history(net, m0, record_history=False)
+    expected = {p for node in graph.nodes for p, v in node.marking.items() if v == OMEGA}
+    result = bitstate_search(net, m0, bits=1 << 16, max_states=10000)
+    assert result.omega_places == expected == {"count0", "count1", "count2"}
+    assert result.states == len(graph.nodes)
+
+# ---------------------------------------------------------------------
+# stubborn-set reduction: the same deadlocks as the full state space, in
+# fewer states (pipeline(8): 27 states instead of 65,538)
+@pytest.mark.parametrize("net, m0", [pipeline(8), philosophers(4), buffer(4)])
+def test_stubborn_explore_keeps_deadlocks(net, m0):
+    full, reduced = explore(net, m0), stubborn_explore(net, m0)
+    assert reduced.deadlock_count == full.deadlock_count
+    assert sorted(map(sorted, (d.items() for d in reduced.deadlocks))) == \
+        sorted(map(sorted, (d.items() for d in full.deadlocks)))
+    assert reduced.states < full.states
+
+# ---------------------------------------------------------------------
+# sweep-line: exact on a net where tokens only move forward (pipeline);
+# with regress edges (the other nets) states / edges are upper bounds,
+# deadlocks and bounds stay exact
+@pytest.mark.parametrize("net, m0", [pipeline(3), pipeline(4, 2)])
+def test_sweep_explore_matches_explore(net, m0):
+    full, sweep = explore(net, m0), sweep_explore(net, m0)
+    assert sweep.states_exact and sweep.regress_edges == 0
+    assert _summary(sweep) == _summary(full)
+    assert sweep.deadlocks == full.deadlocks
+
+@pytest.mark.parametrize("net, m0", NETS)
+def test_sweep_explore_with_regress_edges(net, m0):
+    full, sweep = explore(net, m0), sweep_explore(net, m0)
+    assert not sweep.states_exact and sweep.regress_edges > 0
+    assert sweep.states >= full.states and sweep.edges >= full.edges
+    assert (sweep.deadlock_count, sweep.bounds) == (full.deadlock_count, full.bounds)
+    assert sweep.deadlocks == full.deadlocks
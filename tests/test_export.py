@@ -0,0 +1,26 @@
+import io
+import json
+
+from bench.generators import buffer, unbounded_counters
+from tree.algo import build_tree_with_history
+from tree.export import write_jsonl
+from tree.markings import OMEGA
+
+# ---------------------------------------------------------------------
+# JSON lines of a graph built on sparse markings: same lines as the dense build
+def test_write_jsonl_sparse_graph():
+    for net, m0 in (buffer(3), unbounded_counters(2)):
+        dense, _ = build_tree_with_history(net, m0, record_history=False)
+        sparse, _ = build_tree_with_history(net, m0, record_history=False, sparse=True)
+        out_dense, out_sparse = io.StringIO(), io.StringIO()
+        write_jsonl(dense, out_dense)
+        write_jsonl(sparse, out_sparse)
+
+        rows = [json.loads(line) for line in out_sparse.getvalue().splitlines()]
+        nodes = [r for r in rows if r["type"] == "node"]
+        assert len(nodes) == len(sparse.nodes)
+        assert all(set(r["marking"]) == set(m0) for r in nodes)
+        assert out_sparse.getvalue() == out_dense.getvalue()
+
+    # omega stays "w"
+    assert any(v == OMEGA for r in nodes for v in r["marking"].values())
@@ -0,0 +1,48 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+from tree.graph import KMGraph
+
+# ---------------------------------------------------------------------
+# node markings read like dicts, refuse writes, and marking_dict is a copy
+def test_node_marking_is_read_only():
+    graph = KMGraph()
+    graph.add_node({"p": 1, "q": "w"})
+    marking = graph.nodes[0].marking
+    assert marking == {"p": 1, "q": "w"}
+    assert dict(marking.items()) == {"p": 1, "q": "w"}
+
+    with pytest.raises(TypeError, match="read-only"):
+        marking["p"] = 2
+
+    copy = graph.marking_dict(0)
+    copy["p"] = 2
+    assert graph.nodes[0].marking["p"] == 1
+
+# ---------------------------------------------------------------------
+# a sparse graph pickled under one hash seed still finds the markings of
+# the same net built under another (OMEGA included)
+BUILD = """
+import contextlib, io, pickle, sys
+from bench.generators import unbounded_counters
+from tree.algo import build_tree_with_history
+with contextlib.redirect_stdout(io.StringIO()):
+    graph, _ = build_tree_with_history(*unbounded_counters(2), record_history=False, sparse=True)
+"""
+
+def test_sparse_graph_pickle_across_hash_seeds(tmp_path):
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    path = tmp_path / "graph.pkl"
+    def run(seed, code):
+        env = dict(os.environ, PYTHONHASHSEED=str(seed), PYTHONPATH=root)
+        return subprocess.run([sys.executable, "-c", BUILD + code, str(path)], env=env, cwd=root,
+                              capture_output=True, text=True, check=True).stdout
+
+    run(1, "pickle.dump(graph, open(sys.argv[1], 'wb'))")
+    out = run(2, "old = pickle.load(open(sys.argv[1], 'rb'))\n"
+                 "print(all(old.find_marking(n.marking) == n.id for n in graph.nodes))\n"
+                 "print(any('w' in dict(n.marking).values() for n in graph.nodes))")
+    assert out.split() == ["True", "True"]
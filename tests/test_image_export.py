@@ -0,0 +1,43 @@
+import contextlib
+import io
+
+import pytest
+
+from bench.generators import philosophers
+from tree.algo import build_tree_with_history
+from ui.export import ExportCancelled, ensure_app, export_graph, export_raster
+from ui.graph import build_scene_from_graph
+
+# ---------------------------------------------------------------------
+# a PNG rendered in many strips is the one file asked for, and matches the
+# image rendered in one piece (up to antialiasing at the strip borders)
+def test_png_export_in_strips(tmp_path):
+    ensure_app()
+    from PyQt6.QtGui import QImage
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        graph, _ = build_tree_with_history(*philosophers(3), record_history=False)
+    path = str(tmp_path / "graph.png")
+    assert export_graph(graph, path, tile_size=300) == [path]
+    assert [p.name for p in tmp_path.iterdir()] == ["graph.png"]
+
+    whole = export_raster(build_scene_from_graph(graph), str(tmp_path / "whole.png"))
+    strips, ref = QImage(path), QImage(whole[0])
+    assert strips.size() == ref.size()
+    for y in range(0, ref.height(), 3):
+        for x in range(0, ref.width(), 3):
+            a, b = strips.pixel(x, y), ref.pixel(x, y)
+            assert all(abs((a >> s & 255) - (b >> s & 255)) <= 8 for s in (0, 8, 16))
+
+# ---------------------------------------------------------------------
+# a tiled export cancelled halfway leaves no tile behind
+def test_tiled_export_cancelled_removes_tiles(tmp_path):
+    ensure_app()
+    with contextlib.redirect_stdout(io.StringIO()):
+        graph, _ = build_tree_with_history(*philosophers(3), record_history=False)
+    done = []
+    with pytest.raises(ExportCancelled):
+        export_graph(graph, str(tmp_path / "graph.jpg"), tile_size=200, max_pixels=0,
+                     progress=lambda i, n: done.append(i), cancelled=lambda: len(done) >= 3)
+    assert len(done) == 3
+    assert list(tmp_path.iterdir()) == []
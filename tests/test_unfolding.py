@@ -0,0 +1,23 @@
+import contextlib
+import io
+
+from bench.generators import philosophers, pipeline, token_ring, buffer
+from tree.algo import build_tree_with_history
+from tree.properties import has_deadend, has_deadend_unfolding
+
+# ---------------------------------------------------------------------
+# deadlock on the unfolding prefix: same answer as the dead-ends of the
+# coverability graph on safe nets
+def test_has_deadend_unfolding_matches_graph():
+    cases = [
+        (pipeline(3), True),       # ends in "end"
+        (token_ring(5), False),
+        (buffer(4), False),
+        (philosophers(3), True),
+        (philosophers(4), True),
+    ]
+    for (net, m0), expected in cases:
+        with contextlib.redirect_stdout(io.StringIO()):
+            graph, _ = build_tree_with_history(net, m0, record_history=False)
+            assert has_deadend(graph) is expected
+            assert has_deadend_unfolding(net, m0) is expected
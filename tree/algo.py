@@ -1,118 +1,188 @@
-from dataclasses import dataclass, field
-from typing import List
 from snakes.nets import PetriNet
-import copy
+import time
 from tree.markings import Marking, markings_identical, markings_equal_greater, accelerate, OMEGA
 from tree.matrices import extract_pre_post
-from tree.transitions import enabled, fire
+from tree.transitions import enabled, fire_hashed
+from tree.zobrist import ZobristHasher
+from tree.sparse import SparseMarking, EnablingIndex
+from tree.stats import BuildStats
+from tree.graph import KMGraph, Node, Arc
+from tree.history import History
 
 # ---------------------------------------------------------------------
-# class representing the tree nodes = markings
-@dataclass
-class Node:
-    id: int
-    marking: Marking
-    tag: str = "new"  
-
-# ---------------------------------------------------------------------
-# class for transition arcs between nodes
-@dataclass
-class Arc:
-    src: int # source node id
-    dst: int # destination node id
-    transition: str # transition name
-
-# ---------------------------------------------------------------------
-# class for the tree = graph (nodes + arcs)
-@dataclass
-class KMGraph:
-    nodes: List[Node] = field(default_factory=list)
-    edges: List[Arc] = field(default_factory=list)
+# raised when the construction goes over its node or time budget
+class BudgetExceeded(Exception):
+    pass
 
 # ---------------------------------------------------------------------
 # build the coverability tree with history tracking
-def build_tree_with_history(net: PetriNet, M0: Marking):
+# record_history=False skips the per-step history (headless runs); the
+# history (tree/history.py) gives (graph, message) for every step
+# max_nodes / time_limit (seconds) stop the construction with BudgetExceeded
+# stats: a BuildStats filled with per-phase counters (None = no profiling)
+# sparse: work on sparse persistent markings (tree/sparse.py), for nets with
+#   many places where a transition touches only a few of them
+def build_tree_with_history(net: PetriNet, M0: Marking, record_history: bool = True,
+                            max_nodes: int | None = None, time_limit: float | None = None,
+                            stats: BuildStats | None = None, sparse: bool = False):
+    start_ns = time.perf_counter_ns()
+    if sparse:
+        M0 = SparseMarking.from_dict(M0)
     # pre + post matrices
     PRE, POST = extract_pre_post(net)
+    index = EnablingIndex(PRE) if sparse else None
     graph = KMGraph()
-    history = [] 
+    history = History(graph)
+    deadline = time.monotonic() + time_limit if time_limit is not None else None
+
+    # msg: a function giving the message, only called when history is kept
+    # (formatting markings is O(places), too much for every successor);
+    # tagged: node whose tag was just set
+    def record(msg, tagged=None):
+        if record_history:
+            history.record(msg(), () if tagged is None else (tagged,))
+
+    # tree parent of every node (the node whose transition created it)
+    parent = [0]
+
+    # duplicate detection on Zobrist hashes, updated while firing:
+    # node_hash[id] = hash of the node marking, seen_hashes = hashes of the
+    # stored markings. A successor whose hash was never seen is new without
+    # building its key for the marking table (add_node builds it once); a
+    # seen hash goes through the exact lookup of the table
+    hasher = ZobristHasher(M0)
+    node_hash = []
+    seen_hashes = set()
+
+    def add_node(marking, h):
+        new_id = len(graph.nodes)
+        graph.nodes.append(Node(new_id, marking, tag="new"))
+        node_hash.append(h)
+        seen_hashes.add(h)
+        return new_id
+
+    # check if the marking of node nid already exists in an older node
+    # (nodes sharing a marking share its id in the graph table)
+    def is_old_node(nid, marking):
+        return graph.first_holder(nid) < nid
+
+    # find an existing node with the same marking
+    def find_existing(marking, h):
+        if h not in seen_hashes:
+            return None
+        first = graph.find_marking(marking)
+        return graph.nodes[first] if first is not None else None
+
+    # find all ancestor (parent) nodes
+    def ancestors_of(nid):
+        ancestors_nodes = []
+        current_search = nid
+        while current_search != 0:
+            current_search = parent[current_search]
+            ancestors_nodes.append(graph.nodes[current_search])
+        ancestors_nodes.append(graph.nodes[0])
+        return ancestors_nodes
+
+    # acceleration check against every ancestor
+    def accelerate_with(m_prime, ancestors_nodes):
+        accel_msg = ""
+        for anc in ancestors_nodes:
+            if markings_equal_greater(m_prime, anc.marking) and not markings_identical(m_prime, anc.marking):
+                m_prime = accelerate(m_prime, anc.marking)
+                accel_msg = f" (Accelerated with Node {anc.id})"
+        return m_prime, accel_msg
+
+    # profiling: same functions, counted and timed (nothing changes when off)
+    _enabled, _fire = enabled, fire_hashed
+    if stats is not None:
+        _enabled = stats.timed("enabled", enabled)
+        _fire = stats.timed("fire", fire_hashed)
+        is_old_node = stats.timed("duplicate", is_old_node)
+        find_existing = stats.timed("duplicate", find_existing, hit=lambda n: n is not None)
+        ancestors_of = stats.timed("ancestors", ancestors_of)
+        accelerate_with = stats.timed("accelerate", accelerate_with, hit=lambda r: bool(r[1]))
+        timed_record = stats.timed("history", record, hit=lambda _: record_history)
+
+        # step sizes are measured outside of the timed section
+        def record(msg, tagged=None):
+            timed_record(msg, tagged)
+            if record_history:
+                stats.add_snapshot(history.steps[-1])
 
     # new initial node
-    root_node = Node(0, M0, tag="new")
-    graph.nodes.append(root_node)
+    add_node(M0, hasher.hash(M0))
     queue = [0]
     
     # history message
-    history.append((copy.deepcopy(graph), f"Initial node created with marking {format_marking(M0)}"))
+    record(lambda: f"Initial node created with marking {format_marking(M0)}")
 
     while queue:
+        if stats is not None:
+            stats.peak_frontier = max(stats.peak_frontier, len(queue))
         nid = queue.pop(0) 
         node = graph.nodes[nid]
+        marking = graph.marking_dict(nid)   # fired below: a dict, not a view
+
+        if deadline is not None and time.monotonic() > deadline:
+            raise BudgetExceeded(f"time limit of {time_limit}s reached after {len(graph.nodes)} nodes")
 
         # check if marking already exists
-        is_old = any(
-            n.id < node.id and markings_identical(n.marking, node.marking) 
-            for n in graph.nodes
-        )
-        
-        if is_old:
+        if is_old_node(node.id, marking):
             node.tag = "old"
             # history message
-            history.append((copy.deepcopy(graph), f"Node {nid} {format_marking(node.marking)} is an existing marking. No expansion."))
+            record(lambda: f"Node {nid} {format_marking(marking)} is an existing marking. No expansion.", nid)
             continue
         
-        # find all ancestor (parent) nodes
-        ancestors_nodes = []
-        current_search = nid
-        while current_search != 0:
-            for e in graph.edges:
-                if e.dst == current_search:
-                    ancestors_nodes.append(graph.nodes[e.src])
-                    current_search = e.src
-                    break
-        ancestors_nodes.append(graph.nodes[0])
+        ancestors_nodes = ancestors_of(nid)
 
         any_enabled = False 
 
         # explore all transitions from current marking
-        for t in PRE:
-            if not enabled(node.marking, PRE[t]): 
+        # (sparse: only those with a marked input place can be enabled)
+        for t in (index.candidates(marking) if sparse else PRE):
+            if not _enabled(marking, PRE[t]): 
                 continue
 
             any_enabled = True 
-            m_prime = fire(node.marking, PRE[t], POST[t])
+            m_fired, h = _fire(marking, node_hash[nid], PRE[t], POST[t], hasher)
             
-            # acceleration check
-            accel_msg = ""
-            for anc in ancestors_nodes:
-                if markings_equal_greater(m_prime, anc.marking) and not markings_identical(m_prime, anc.marking):
-                    m_prime = accelerate(m_prime, anc.marking)
-                    accel_msg = f" (Accelerated with Node {anc.id})"
+            # acceleration check (accelerated places now hash as omega)
+            m_prime, accel_msg = accelerate_with(m_fired, ancestors_nodes)
+            if accel_msg:
+                h = hasher.rehash(h, m_fired, m_prime)
 
             # ckeck if new marking already exists
-            existing = next((n for n in graph.nodes if markings_identical(n.marking, m_prime)), None)
+            existing = find_existing(m_prime, h)
 
             if existing:
                 # if exists, just add edge
                 graph.edges.append(Arc(nid, existing.id, t))
                 # history message
-                history.append((copy.deepcopy(graph), f"Transition {t} leads to existing marking {format_marking(m_prime)}{accel_msg}"))
+                record(lambda: f"Transition {t} leads to existing marking {format_marking(m_prime)}{accel_msg}")
             else:
                 # else, create new node and edge
                 new_id = len(graph.nodes)
-                graph.nodes.append(Node(new_id, m_prime, tag="new"))
+                if max_nodes is not None and new_id >= max_nodes:
+                    raise BudgetExceeded(f"node limit of {max_nodes} reached")
+                add_node(m_prime, h)
                 graph.edges.append(Arc(nid, new_id, t))
+                parent.append(nid)
                 queue.append(new_id)
                 # history message
-                history.append((copy.deepcopy(graph), f"Fired {t}: Created Node {new_id} with marking {format_marking(m_prime)}{accel_msg}"))
+                record(lambda: f"Fired {t}: Created Node {new_id} with marking {format_marking(m_prime)}{accel_msg}")
 
         # update node tag based
         if any_enabled:
             node.tag = "done"
-            history.append((copy.deepcopy(graph), f"Finished exploring all transitions for Node {nid}."))
+            record(lambda: f"Finished exploring all transitions for Node {nid}.", nid)
         else:
             node.tag = "dead-end"
-            history.append((copy.deepcopy(graph), f"Node {nid} {format_marking(node.marking)} is a dead-end."))
+            record(lambda: f"Node {nid} {format_marking(marking)} is a dead-end.", nid)
+
+    if stats is not None:
+        stats.nodes = len(graph.nodes)
+        stats.edges = len(graph.edges)
+        stats.total_ns = time.perf_counter_ns() - start_ns
     return graph, history
 
 # ---------------------------------------------------------------------
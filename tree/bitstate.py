@@ -0,0 +1,215 @@
+import math
+import time
+from dataclasses import dataclass, field
+
+from snakes.nets import PetriNet
+from tree.algo import BudgetExceeded
+from tree.codegen import compile_functions
+from tree.markings import Marking, OMEGA
+from tree.matrices import extract_pre_post
+from tree.zobrist import _mix
+
+# Bitstate hashing ("supertrace") search of the coverability tree.
+# Approximate companion of build_tree_with_history for nets too large to
+# store: a depth-first Karp-Miller search (same acceleration against the
+# ancestors) whose visited set is only k bits per state in one bit array.
+# A state whose k bits are all set already is taken as visited, so some
+# states may be skipped (never stored twice, but possibly never at all):
+# the result is an under-approximation. What it finds is real (deadlocks
+# with their firing sequences, OMEGA places, fired transitions); what it
+# does not find is only unlikely. The bit array costs bits / 8 bytes
+# whatever the number of places, e.g. 16 MB for 2**27 bits.
+#
+# Omission estimate: a new state is wrongly taken as visited with
+# probability fill**k (fill = fraction of bits set); the sum of that
+# probability over the stored states estimates the states skipped.
+
+W = OMEGA
+
+# ---------------------------------------------------------------------
+# k bit positions per state by double hashing, in an array of `bits` bits
+class BitstateTable:
+    def __init__(self, bits: int = 1 << 27, hashes: int = 3, seed: int = 0x5EED):
+        self.bits = 1 << max(3, (bits - 1).bit_length())   # power of two
+        self.hashes = hashes
+        self.seed = seed
+        self._mask = self.bits - 1
+        self._array = bytearray(self.bits >> 3)
+        self.ones = 0
+        self.stored = 0
+        self.expected_omissions = 0.0
+
+    def fill(self) -> float:
+        return self.ones / self.bits
+
+    # True if the state was not seen (its bits are set from now on)
+    def add(self, h: int) -> bool:
+        array, mask = self._array, self._mask
+        h1 = _mix(h ^ self.seed)
+        h2 = _mix(h1) | 1
+        p_seen = self.fill() ** self.hashes
+        new_bits = 0
+        for i in range(self.hashes):
+            pos = (h1 + i * h2) & mask
+            byte, bit = pos >> 3, 1 << (pos & 7)
+            if not array[byte] & bit:
+                array[byte] |= bit
+                new_bits += 1
+        if not new_bits:
+            return False
+        self.ones += new_bits
+        self.stored += 1
+        self.expected_omissions += p_seen
+        return True
+
+# stable hash of a state (OMEGA as -1: str hashes change between runs)
+def _state_hash(values) -> int:
+    if W in values:
+        values = tuple(-1 if v == W else v for v in values)
+    return hash(values)
+
+def _covers(m, a) -> bool:
+    for x, y in zip(m, a):
+        if x == W:
+            continue
+        if y == W or x < y:
+            return False
+    return True
+
+def _accelerate(m, a) -> tuple:
+    return tuple(W if (y == W or x == W or x > y) else x for x, y in zip(m, a))
+
+# ---------------------------------------------------------------------
+# result of a bitstate search (under-approximate: see tree/properties)
+@dataclass
+class BitstateResult:
+    states: int = 0                                   # states stored
+    edges: int = 0
+    deadlocks: list[Marking] = field(default_factory=list)
+    deadlock_traces: list[list[str]] = field(default_factory=list)
+    deadlock_count: int = 0
+    omega_places: set[str] = field(default_factory=set)
+    omega_trace: list[str] | None = None              # firing sequence to the first OMEGA
+    bounds: dict[str, int] = field(default_factory=dict)   # finite maxima seen
+    fired: set[str] = field(default_factory=set)
+    bits: int = 0
+    hashes: int = 0
+    fill: float = 0.0                                 # fraction of bits set
+    omission_probability: float = 0.0                 # a new state taken as seen, at the end
+    expected_omissions: float = 0.0                   # estimated states skipped
+    coverage: float = 1.0                             # states / (states + expected omissions)
+    seconds: float = 0.0
+    under_approximate: bool = True
+
+# ---------------------------------------------------------------------
+# bits / hashes: size of the bit array and bits per state
+# max_depth: deepest firing sequence followed (None = no limit)
+# max_deadlocks: deadlock markings (and traces) kept, all are counted
+def bitstate_search(net: PetriNet, M0: Marking, bits: int = 1 << 27, hashes: int = 3,
+                    max_states: int | None = None, max_depth: int | None = None,
+                    time_limit: float | None = None, max_deadlocks: int = 100,
+                    seed: int = 0x5EED) -> BitstateResult:
+    start = time.perf_counter()
+    deadline = time.monotonic() + time_limit if time_limit is not None else None
+    PRE, POST = extract_pre_post(net)
+    places = list(M0)
+    funcs = compile_functions(PRE, POST, places, omega_places=places)
+    next_enabled, successor, names = funcs.next_enabled, funcs.successor, funcs.transitions
+    n_trans = len(names)
+
+    table = BitstateTable(bits, hashes, seed)
+    result = BitstateResult(bits=table.bits, hashes=hashes)
+    initial = tuple(M0[p] for p in places)
+    bounds = [v if v != W else 0 for v in initial]
+    omega = [v == W for v in initial]
+    fired = bytearray(n_trans)
+    table.add(_state_hash(initial))
+
+    # DFS: path[d] = marking at depth d, next_t[d] = next transition to
+    # try there (0 after the scan: nothing enabled), trace[d - 1] = the
+    # transition that led to depth d, low[d] = fewest tokens of a marking
+    # in path[:d + 1], counted on the places finite in M0 (OMEGA there
+    # stays OMEGA) and infinite for a marking with OMEGA elsewhere. Such a
+    # marking can only strictly cover an ancestor with fewer tokens, so up
+    # to low[-1] the path is not scanned for acceleration
+    inf = float("inf")
+    finite = [i for i, v in enumerate(initial) if v != W]
+    if len(finite) == len(places):
+        def tokens_of(m):
+            return inf if W in m else sum(m)
+    else:
+        def tokens_of(m):
+            total = 0
+            for i in finite:
+                if m[i] == W:
+                    return inf
+                total += m[i]
+            return total
+    path, next_t, trace = [initial], [0], []
+    low = [tokens_of(initial)]
+    while path:
+        m = path[-1]
+        k = next_enabled(m, next_t[-1])
+        if k == n_trans:
+            if next_t[-1] == 0:
+                result.deadlock_count += 1
+                if len(result.deadlocks) < max_deadlocks:
+                    result.deadlocks.append(dict(zip(places, m)))
+                    result.deadlock_traces.append([names[t] for t in trace])
+            path.pop()
+            next_t.pop()
+            low.pop()
+            if trace:
+                trace.pop()
+            continue
+
+        next_t[-1] = k + 1
+        fired[k] = 1
+        result.edges += 1
+        m_prime = successor[k](m)
+        # acceleration against m and its ancestors, parent first
+        tokens = tokens_of(m_prime)
+        if tokens > low[-1]:
+            for anc in reversed(path):
+                if m_prime != anc and _covers(m_prime, anc):
+                    m_prime = _accelerate(m_prime, anc)
+            tokens = tokens_of(m_prime)
+
+        if not table.add(_state_hash(m_prime)):
+            continue
+        if max_states is not None and table.stored > max_states:
+            raise BudgetExceeded(f"state limit of {max_states} reached")
+        if deadline is not None and not table.stored & 1023 and time.monotonic() > deadline:
+            raise BudgetExceeded(f"time limit of {time_limit}s reached after {table.stored} states")
+        for i, v in enumerate(m_prime):
+            if v == W:
+                if not omega[i]:
+                    omega[i] = True
+                    if result.omega_trace is None:
+                        result.omega_trace = [names[t] for t in trace] + [names[k]]
+            elif v > bounds[i]:
+                bounds[i] = v
+        if max_depth is not None and len(path) > max_depth:
+            continue
+        path.append(m_prime)
+        next_t.append(0)
+        low.append(min(low[-1], tokens))
+        trace.append(k)
+
+    result.states = table.stored
+    result.omega_places = {p for p, w in zip(places, omega) if w}
+    result.bounds = {p: b for p, b, w in zip(places, bounds, omega) if not w}
+    result.fired = {names[t] for t in range(n_trans) if fired[t]}
+    result.fill = table.fill()
+    result.omission_probability = result.fill ** hashes
+    result.expected_omissions = table.expected_omissions
+    result.coverage = table.stored / (table.stored + table.expected_omissions)
+    result.seconds = time.perf_counter() - start
+    return result
+
+# ---------------------------------------------------------------------
+# bits for `states` states with at most `omission` probability of
+# skipping a new state at the end (k hashes)
+def bits_for_states(states: int, omission: float = 1e-3, hashes: int = 3) -> int:
+    fill = omission ** (1 / hashes)
+    return math.ceil(-hashes * states / math.log(1 - fill))
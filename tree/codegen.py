@@ -0,0 +1,143 @@
+from dataclasses import dataclass, field
+
+from tree.markings import OMEGA
+from tree.matrices import compile_net
+
+# Net-specialised transition functions.
+# tree/transitions.enabled / fire walk generic dicts on every call; the net
+# does not change during an analysis, so each transition is compiled once
+# into straight-line Python over a flat marking list (place order =
+# `places`): explicit index comparisons and in-place arithmetic, e.g.
+#
+#     def enabled_3(m):
+#         return m[0] >= 1 and m[4] >= 2
+#     def fire_3(m):
+#         m[0] -= 1
+#         m[4] -= 2
+#         m[7] += 1
+#
+# OMEGA checks are only generated for `omega_places` (none for the bounded
+# explorers). The functions are cached per net (PRE, POST, places, omega
+# places), so compiling the same net again is a dict lookup.
+
+# successor_i spells out the whole tuple up to this many places; larger
+# nets copy the marking and update it in place (keeps the source linear)
+INLINE_SUCCESSOR_PLACES = 64
+
+# ---------------------------------------------------------------------
+# the generated functions of one net, indexed like `transitions`
+@dataclass
+class NetFunctions:
+    places: list[str]
+    transitions: list[str]
+    source: str                          # the generated module, for debugging
+    enabled: list = field(default_factory=list)     # enabled_i(m) -> bool
+    fire: list = field(default_factory=list)        # fire_i(m): in place
+    unfire: list = field(default_factory=list)      # unfire_i(m): undoes fire_i
+    successor: list = field(default_factory=list)   # successor_i(m) -> new tuple
+    enabled_all: object = None                      # enabled_all(m) -> [i, ...]
+    next_enabled: object = None                     # next_enabled(m, k) -> first enabled i >= k, or n
+
+_CACHE: dict = {}
+
+# ---------------------------------------------------------------------
+# hashable identity of a net: same key = same generated code
+def net_key(PRE, POST, places, omega_places=()) -> tuple:
+    return (tuple(places),
+            tuple((t, tuple(sorted(PRE[t].items())), tuple(sorted(POST[t].items()))) for t in PRE),
+            frozenset(omega_places))
+
+# ---------------------------------------------------------------------
+# enabling test of one transition as an expression
+def _guard(pre, omega) -> str:
+    tests = [f"(m[{i}] == W or m[{i}] >= {w})" if i in omega else f"m[{i}] >= {w}"
+             for i, w in pre]
+    return " and ".join(tests) or "True"
+
+# in-place update lines (sign = +1 fire, -1 unfire)
+def _updates(delta, omega, sign, indent) -> list[str]:
+    lines = []
+    for i, d in delta:
+        op = "+=" if d * sign > 0 else "-="
+        if i in omega:
+            lines.append(f"{indent}if m[{i}] != W:")
+            lines.append(f"{indent}    m[{i}] {op} {abs(d)}")
+        else:
+            lines.append(f"{indent}m[{i}] {op} {abs(d)}")
+    return lines or [f"{indent}pass"]
+
+# new-tuple expression of the successor
+def _successor(n_places, delta, omega) -> str:
+    change = dict(delta)
+    items = []
+    for i in range(n_places):
+        d = change.get(i, 0)
+        if d == 0:
+            items.append(f"m[{i}]")
+        elif i in omega:
+            items.append(f"(W if m[{i}] == W else m[{i}] {'+' if d > 0 else '-'} {abs(d)})")
+        else:
+            items.append(f"m[{i}] {'+' if d > 0 else '-'} {abs(d)}")
+    return "(" + ", ".join(items) + ("," if n_places == 1 else "") + ")"
+
+def generate_source(cnet, omega=frozenset()) -> str:
+    lines = []
+    for k, t in enumerate(cnet.transitions):
+        lines.append(f"# {t}")
+        lines.append(f"def enabled_{k}(m):")
+        lines.append(f"    return {_guard(cnet.pre[k], omega)}")
+        lines.append(f"def fire_{k}(m):")
+        lines += _updates(cnet.delta[k], omega, 1, "    ")
+        lines.append(f"def unfire_{k}(m):")
+        lines += _updates(cnet.delta[k], omega, -1, "    ")
+        lines.append(f"def successor_{k}(m):")
+        if len(cnet.places) <= INLINE_SUCCESSOR_PLACES:
+            lines.append(f"    return {_successor(len(cnet.places), cnet.delta[k], omega)}")
+        else:
+            lines.append("    m = list(m)")
+            lines += _updates(cnet.delta[k], omega, 1, "    ")
+            lines.append("    return tuple(m)")
+    lines.append("def enabled_all(m):")
+    lines.append("    out = []")
+    for k in range(len(cnet.transitions)):
+        lines.append(f"    if {_guard(cnet.pre[k], omega)}:")
+        lines.append(f"        out.append({k})")
+    lines.append("    return out")
+    lines.append("def next_enabled(m, k):")
+    for k in range(len(cnet.transitions)):
+        lines.append(f"    if k <= {k} and {_guard(cnet.pre[k], omega)}:")
+        lines.append(f"        return {k}")
+    lines.append(f"    return {len(cnet.transitions)}")
+    return "\n".join(lines) + "\n"
+
+# ---------------------------------------------------------------------
+# functions of a net, generated on the first call and cached
+# omega_places: places that may hold OMEGA (OMEGA-aware tests / updates)
+def compile_functions(PRE, POST, places, omega_places=()) -> NetFunctions:
+    key = net_key(PRE, POST, places, omega_places)
+    funcs = _CACHE.get(key)
+    if funcs is not None:
+        return funcs
+
+    cnet = compile_net(PRE, POST, places)
+    index = {p: i for i, p in enumerate(cnet.places)}
+    omega = frozenset(index[p] for p in omega_places)
+    source = generate_source(cnet, omega)
+    namespace = {"W": OMEGA}
+    exec(compile(source, f"<net {hash(key) & 0xFFFFFFFF:08x}>", "exec"), namespace)
+
+    n = len(cnet.transitions)
+    funcs = NetFunctions(
+        places=cnet.places, transitions=cnet.transitions, source=source,
+        enabled=[namespace[f"enabled_{k}"] for k in range(n)],
+        fire=[namespace[f"fire_{k}"] for k in range(n)],
+        unfire=[namespace[f"unfire_{k}"] for k in range(n)],
+        successor=[namespace[f"successor_{k}"] for k in range(n)],
+        enabled_all=namespace["enabled_all"],
+        next_enabled=namespace["next_enabled"],
+    )
+    _CACHE[key] = funcs
+    return funcs
+
+def clear_cache():
+    _CACHE.clear()
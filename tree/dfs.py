@@ -0,0 +1,178 @@
+import time
+
+from snakes.nets import PetriNet
+from tree.algo import BudgetExceeded
+from tree.explore import ExploreResult
+from tree.markings import Marking, OMEGA
+from tree.codegen import compile_functions
+from tree.matrices import extract_pre_post, compile_net
+from tree.packing import MarkingPacker
+from tree.zobrist import ZobristHasher
+
+# Depth-first reachability with one marking buffer.
+# The current marking is a single list of token counts, changed in place:
+# a transition is fired by adding its POST - PRE vector and un-fired by
+# subtracting it when the search backtracks, so no marking is allocated
+# per successor. Enabling tests and updates are the net-specialised
+# functions of tree/codegen.py. Only a compact key of each visited state is kept:
+#   keys="packed": exact bit-packed key (tree/packing.py), updated
+#                  incrementally as key += delta << offset
+#   keys="hash":   64-bit Zobrist hash (tree/zobrist.py); smaller still,
+#                  but two states sharing a hash would be merged (hash
+#                  compaction), so the result is a (tiny) under-approximation
+# Like tree/explore.py this enumerates reachable markings: bounded nets only.
+
+# ---------------------------------------------------------------------
+# incremental keys of the buffer: fired(key, m, k) gives the key of m from
+# the key before transition k fired (backtracking reads the key stack)
+class _PackedKeys:
+    def __init__(self, places, m0, delta):
+        self.packer = MarkingPacker.from_bounds(places, dict(zip(places, m0)), default=0, min_bits=2)
+        self.delta = delta
+        self.grows = [tuple(i for i, d in dk if d > 0) for dk in delta]
+        self._refresh()
+
+    # per transition the constant key step sum(d << offset)
+    def _refresh(self):
+        offsets = self.packer.offsets
+        self.caps = [(1 << w) - 2 for w in self.packer.widths]
+        self.steps = [sum(d << offsets[i] for i, d in dk) for dk in self.delta]
+
+    def full(self, m) -> int:
+        return self.packer.pack_values(m)
+
+    def fired(self, key, m, k, visited, key_stack) -> int:
+        caps = self.caps
+        for i in self.grows[k]:
+            if m[i] > caps[i]:
+                return self._repack(m, visited, key_stack)
+        return key + self.steps[k]
+
+    # a place outgrew its width: widen and re-encode every stored key
+    def _repack(self, m, visited, key_stack) -> int:
+        old = self.packer
+        self.packer = old.widened(m)
+        self._refresh()
+        recode = lambda k: self.packer.pack_values(old.unpack_values(k))
+        new_keys = {recode(k) for k in visited}
+        visited.clear()
+        visited.update(new_keys)
+        key_stack[:] = [recode(k) for k in key_stack]
+        return self.packer.pack_values(m)
+
+class _HashKeys:
+    def __init__(self, places, m0, delta):
+        self.hasher = ZobristHasher(places)
+        self.places = places
+        self.delta = delta
+
+    def full(self, m) -> int:
+        return self.hasher.hash(dict(zip(self.places, m)))
+
+    def fired(self, key, m, k, visited, key_stack) -> int:
+        key_of, places = self.hasher.key, self.places
+        for i, d in self.delta[k]:
+            p = places[i]
+            key ^= key_of(p, m[i] - d) ^ key_of(p, m[i])
+        return key
+
+KEYS = {"packed": _PackedKeys, "hash": _HashKeys}
+
+# ---------------------------------------------------------------------
+# keys: "packed" (exact) or "hash" (64-bit, hash compaction)
+# stop_at_deadlock: stop at the first deadlock, result.trace leads to it
+# goal: optional test on the buffer (token list, places in M0 order); the
+#   search stops at the first marking passing it, result.trace leads there
+def dfs_explore(net: PetriNet, M0: Marking, keys: str = "packed",
+                max_states: int | None = None, time_limit: float | None = None,
+                max_deadlocks: int = 100, stop_at_deadlock: bool = False,
+                goal=None) -> ExploreResult:
+    start = time.perf_counter()
+    deadline = time.monotonic() + time_limit if time_limit is not None else None
+    PRE, POST = extract_pre_post(net)
+    places = list(M0)
+    if any(v == OMEGA for v in M0.values()):
+        raise ValueError("dfs_explore needs a finite initial marking")
+    cnet = compile_net(PRE, POST, places)
+    funcs = compile_functions(PRE, POST, places)
+    next_enabled, fire, unfire = funcs.next_enabled, funcs.fire, funcs.unfire
+    delta, names = cnet.delta, cnet.transitions
+    n_trans = len(names)
+
+    m = [M0[p] for p in places]            # the one marking buffer
+    bounds = list(m)
+    keyer = KEYS[keys](places, m, delta)
+    fired = keyer.fired
+    key = keyer.full(m)
+    visited = {key}
+
+    result = ExploreResult(store=visited)
+
+    # the DFS stack, as parallel lists: next transition to try (still 0
+    # after the scan = nothing enabled), transition fired to get there, key
+    next_t = [0]
+    path = []
+    key_stack = [key]
+
+    if goal is not None and goal(m):
+        result.trace = []
+        next_t = []
+    states, edges = 1, 0
+
+    while next_t:
+        # next enabled transition at this depth
+        k = next_enabled(m, next_t[-1])
+
+        if k == n_trans:
+            # all successors done: deadlock check, then backtrack
+            if next_t[-1] == 0:
+                result.deadlock_count += 1
+                if len(result.deadlocks) < max_deadlocks:
+                    result.deadlocks.append(dict(zip(places, m)))
+                if stop_at_deadlock:
+                    result.trace = [names[t] for t in path]
+                    break
+            next_t.pop()
+            key_stack.pop()
+            if path:
+                unfire[path.pop()](m)
+            continue
+
+        next_t[-1] = k + 1
+        edges += 1
+
+        # fire in place
+        fire[k](m)
+        key = fired(key_stack[-1], m, k, visited, key_stack)
+
+        if key in visited:
+            unfire[k](m)
+            continue
+
+        visited.add(key)
+        states += 1
+        if max_states is not None and states > max_states:
+            raise BudgetExceeded(f"state limit of {max_states} reached")
+        if deadline is not None and not states & 1023 and time.monotonic() > deadline:
+            raise BudgetExceeded(f"time limit of {time_limit}s reached after {states} states")
+        for i, d in delta[k]:
+            if m[i] > bounds[i]:
+                bounds[i] = m[i]
+
+        path.append(k)
+        next_t.append(0)
+        key_stack.append(key)
+        if goal is not None and goal(m):
+            result.trace = [names[t] for t in path]
+            break
+
+    result.states, result.edges = states, edges
+    result.bounds = dict(zip(places, bounds))
+    result.seconds = time.perf_counter() - start
+    return result
+
+# ---------------------------------------------------------------------
+# first deadlock found depth-first: (marking, firing sequence) or None
+def find_deadlock(net: PetriNet, M0: Marking, **options):
+    r = dfs_explore(net, M0, stop_at_deadlock=True, **options)
+    return (r.deadlocks[0], r.trace) if r.trace is not None else None
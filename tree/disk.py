@@ -0,0 +1,345 @@
+import mmap
+import os
+import shutil
+import tempfile
+import time
+import weakref
+from array import array
+from collections import OrderedDict
+
+from snakes.nets import PetriNet
+from tree.algo import BudgetExceeded
+from tree.codegen import compile_functions
+from tree.explore import ExploreResult
+from tree.markings import Marking, OMEGA
+from tree.matrices import extract_pre_post
+from tree.packing import MarkingPacker
+
+# External-memory visited states, for state spaces larger than RAM.
+# A folder holds two memory-mapped files:
+#   states.bin   append-only fixed-size records, the packed key of every
+#                state (tree/packing.py) in id order
+#   index.bin    open-addressing hash table of uint64 slots, each
+#                (24-bit hash tag << 40) | (id + 1), 0 = empty
+# A lookup probes the index and compares the record of each candidate
+# whose tag matches; recently seen keys are answered from a RAM cache of
+# the `cache_size` most recently used entries. What stays in RAM is the
+# cache; the pages of the two files are the operating system's to keep
+# or drop.
+#
+# disk_explore() reads the states file as its BFS queue (ids are given in
+# BFS order), streams the arcs to a file and can write the graph as a
+# dump folder (tree/dump.py), reopened memory-mapped with load_graph, so
+# the nodes of the graph stay on disk as well.
+
+ID_BITS = 40
+ID_MASK = (1 << ID_BITS) - 1
+TAG_MASK = (1 << 24) - 1
+MAX_LOAD = 0.7
+
+# ---------------------------------------------------------------------
+# a growable memory-mapped file
+class _MappedFile:
+    def __init__(self, path, size):
+        self.path = path
+        self._file = open(path, "w+b")
+        self._file.truncate(size)
+        self.size = size
+        self.map = mmap.mmap(self._file.fileno(), size)
+
+    def resize(self, size):
+        self.map.close()
+        self._file.truncate(size)
+        self.size = size
+        self.map = mmap.mmap(self._file.fileno(), size)
+
+    # all zeros, `size` bytes
+    def clear(self, size):
+        self.map.close()
+        self._file.truncate(0)
+        self._file.truncate(size)
+        self.size = size
+        self.map = mmap.mmap(self._file.fileno(), size)
+
+    def close(self):
+        self.map.close()
+        self._file.close()
+
+# the two files of a store (closed by the store's finalizer)
+class _Files:
+    def __init__(self, folder, record, n_slots, temporary):
+        self.folder = folder
+        self.temporary = temporary
+        self.states = _MappedFile(os.path.join(folder, "states.bin"), 1024 * record)
+        self.index = _MappedFile(os.path.join(folder, "index.bin"), 8 * n_slots)
+        self.slots = memoryview(self.index.map).cast("Q")
+
+    # index of n_slots empty slots: the file is emptied and extended again,
+    # so the zeros come from the file system, not from RAM
+    def reset_index(self, n_slots):
+        self.slots.release()
+        self.index.clear(8 * n_slots)
+        self.slots = memoryview(self.index.map).cast("Q")
+
+    def close(self):
+        self.slots.release()
+        self.states.close()
+        self.index.close()
+        if self.temporary:
+            shutil.rmtree(self.folder, ignore_errors=True)
+
+# ---------------------------------------------------------------------
+# visited-state store on disk (see tree/packing.STORES)
+# path: folder for the files (default: a temporary folder, removed on close)
+# cache_size: keys kept in RAM (0 = none)
+# Without bounds every place starts at min_bits; a marking over the widths
+# re-packs the states file and rebuilds the index (O(log bound) times)
+class DiskStateStore:
+    def __init__(self, places, bounds: dict | None = None, initial: Marking | None = None,
+                 path: str | None = None, cache_size: int = 1 << 20, min_bits: int = 8,
+                 index_slots: int = 1 << 16):
+        places = list(places)
+        if bounds is None:
+            bounds = {p: v for p, v in (initial or {}).items() if v != OMEGA}
+        self.packer = MarkingPacker.from_bounds(places, bounds, default=0, min_bits=min_bits)
+        self.places = places
+        self.cache_size = cache_size
+        self.repacks = 0
+        self._cache = OrderedDict()
+        self._count = 0
+
+        self.path = tempfile.mkdtemp(prefix="km-states-") if path is None else path
+        os.makedirs(self.path, exist_ok=True)
+        self._record = self.packer.n_bytes
+        self._files = _Files(self.path, self._record, index_slots, temporary=path is None)
+        self._states = self._files.states
+        self._slots = self._files.slots
+        self._mask = index_slots - 1
+        self._close = weakref.finalize(self, self._files.close)
+
+    def close(self):
+        self._close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # ---- records ----
+    def key(self, i: int) -> bytes:
+        off = i * self._record
+        return self._states.map[off:off + self._record]
+
+    def values(self, i: int) -> tuple:
+        return self.packer.unpack_values(int.from_bytes(self.key(i), "little"))
+
+    def _append(self, key: bytes) -> int:
+        i = self._count
+        off = i * self._record
+        if off + self._record > self._states.size:
+            self._states.resize(2 * self._states.size)
+        self._states.map[off:off + self._record] = key
+        self._count += 1
+        return i
+
+    # ---- index ----
+    # slot of `key`, and its id (-1 if absent: the slot is the free one)
+    def _probe(self, key: bytes, h: int) -> tuple[int, int]:
+        slots, mask = self._slots, self._mask
+        tag = (h >> 40) & TAG_MASK
+        pos = h & mask
+        while True:
+            v = slots[pos]
+            if v == 0:
+                return pos, -1
+            if v >> ID_BITS == tag:
+                i = (v & ID_MASK) - 1
+                if self.key(i) == key:
+                    return pos, i
+            pos = (pos + 1) & mask
+
+    def _insert(self, pos: int, h: int, i: int):
+        self._slots[pos] = (((h >> 40) & TAG_MASK) << ID_BITS) | (i + 1)
+
+    # twice the slots, every record hashed again
+    def _grow_index(self, n_slots: int):
+        self._files.reset_index(n_slots)
+        self._slots = self._files.slots
+        self._mask = n_slots - 1
+        for i in range(self._count):
+            key = self.key(i)
+            h = hash(key)
+            pos, _ = self._probe(key, h)
+            self._insert(pos, h, i)
+
+    # new widths: every record re-packed in place, last id first (records
+    # only get longer, so a record never lands on one not re-packed yet)
+    def _repack(self, packer: MarkingPacker):
+        old, old_record = self.packer, self._record
+        new_record = packer.n_bytes
+        size = max(1024, self._count) * new_record
+        if size > self._states.size:
+            self._states.resize(size)
+        data = self._states.map
+        for i in range(self._count - 1, -1, -1):
+            values = old.unpack_values(int.from_bytes(data[i * old_record:(i + 1) * old_record], "little"))
+            data[i * new_record:(i + 1) * new_record] = packer.key_bytes(packer.pack_values(values))
+        self.packer, self._record = packer, new_record
+        self._cache.clear()
+        self._grow_index(self._mask + 1)
+        self.repacks += 1
+
+    # ---- store protocol ----
+    # (True, id) for a new state, (False, id) for a known one
+    def intern(self, values) -> tuple[bool, int]:
+        if self.packer.overflow(values):
+            self._repack(self.packer.widened(values))
+        key = self.packer.key_bytes(self.packer.pack_values(values))
+        cache = self._cache
+        i = cache.get(key)
+        if i is not None:
+            cache.move_to_end(key)
+            return False, i
+        h = hash(key)
+        pos, i = self._probe(key, h)
+        if i < 0:
+            i = self._append(key)
+            self._insert(pos, h, i)
+            if self._count > MAX_LOAD * (self._mask + 1):
+                self._grow_index(2 * (self._mask + 1))
+            is_new = True
+        else:
+            is_new = False
+        if self.cache_size:
+            cache[key] = i
+            if len(cache) > self.cache_size:
+                cache.popitem(last=False)
+        return is_new, i
+
+    def add_values(self, values) -> bool:
+        return self.intern(values)[0]
+
+    def add(self, marking: Marking) -> bool:
+        return self.add_values([marking[p] for p in self.places])
+
+    def __contains__(self, marking: Marking) -> bool:
+        values = [marking[p] for p in self.places]
+        if self.packer.overflow(values):
+            return False
+        key = self.packer.key_bytes(self.packer.pack_values(values))
+        return key in self._cache or self._probe(key, hash(key))[1] >= 0
+
+    def __len__(self):
+        return self._count
+
+    def __iter__(self):
+        for i in range(self._count):
+            yield dict(zip(self.places, self.values(i)))
+
+# ---------------------------------------------------------------------
+# write the explored graph as a dump folder (tree/dump.py), in chunks
+def _write_dump(graph_path, store, dead, edge_file, n_edges, places, transitions):
+    import numpy as np
+    from tree.dump import open_array, write_meta
+
+    os.makedirs(graph_path, exist_ok=True)
+    n, chunk = len(store), 1 << 16
+    markings = open_array(graph_path, "markings", np.int64, (n, len(places)))
+    for lo in range(0, n, chunk):
+        hi = min(n, lo + chunk)
+        markings[lo:hi] = [store.values(i) for i in range(lo, hi)]
+    tags = open_array(graph_path, "tags", np.uint8, (n,))
+    tags[:] = np.frombuffer(dead, dtype=np.uint8)[:n] ^ 1      # 0 = dead-end, 1 = done
+
+    arcs = np.memmap(edge_file, dtype=np.int64, mode="r", shape=(n_edges, 3)) if n_edges else np.zeros((0, 3), np.int64)
+    for name, col, dtype in (("src", 0, np.int64), ("dst", 1, np.int64), ("trans", 2, np.int32)):
+        column = open_array(graph_path, name, dtype, (n_edges,))
+        for lo in range(0, n_edges, chunk):
+            column[lo:lo + chunk] = arcs[lo:lo + chunk, col]
+        column.flush()
+    markings.flush()
+    tags.flush()
+    del arcs
+    write_meta(graph_path, n, n_edges, places, transitions, ["dead-end", "done"])
+
+# ---------------------------------------------------------------------
+# breadth-first exploration with the visited states (and the queue) on disk
+# path / cache_size: as DiskStateStore (the store is result.store, close it)
+# graph_path: also write the reachability graph there as a dump folder;
+#   result.graph is then tree.dump.load_graph(graph_path) (memory-mapped)
+def disk_explore(net: PetriNet, M0: Marking, path: str | None = None, cache_size: int = 1 << 20,
+                 bounds: dict | None = None, graph_path: str | None = None,
+                 max_states: int | None = None, time_limit: float | None = None,
+                 max_deadlocks: int = 100) -> ExploreResult:
+    start = time.perf_counter()
+    deadline = time.monotonic() + time_limit if time_limit is not None else None
+    if any(v == OMEGA for v in M0.values()):
+        raise ValueError("disk_explore needs a finite initial marking")
+    PRE, POST = extract_pre_post(net)
+    places = list(M0)
+    funcs = compile_functions(PRE, POST, places)
+    enabled_all, successor = funcs.enabled_all, funcs.successor
+
+    store = DiskStateStore(places, bounds=bounds, initial=M0, path=path, cache_size=cache_size)
+    result = ExploreResult(store=store, bounds=dict(M0))
+    bound = [M0[p] for p in places]
+    store.intern(tuple(bound))
+
+    dead = bytearray()                 # per state: 1 = dead-end (graph_path)
+    edge_file = os.path.join(store.path, "arcs.bin")
+    arcs = array("q")
+    n_edges = 0
+    out = open(edge_file, "wb") if graph_path else None
+    try:
+        head = 0
+        while head < len(store):
+            if deadline is not None and not head & 1023 and time.monotonic() > deadline:
+                raise BudgetExceeded(f"time limit of {time_limit}s reached after {len(store)} states")
+            values = store.values(head)
+            ks = enabled_all(values)
+            if not ks:
+                result.deadlock_count += 1
+                if len(result.deadlocks) < max_deadlocks:
+                    result.deadlocks.append(dict(zip(places, values)))
+            if graph_path:
+                dead.append(0 if ks else 1)
+            result.edges += len(ks)
+            for k in ks:
+                succ = successor[k](values)
+                is_new, dst = store.intern(succ)
+                if is_new:
+                    if max_states is not None and len(store) > max_states:
+                        raise BudgetExceeded(f"state limit of {max_states} reached")
+                    for i, v in enumerate(succ):
+                        if v > bound[i]:
+                            bound[i] = v
+                if out is not None:
+                    arcs.extend((head, dst, k))
+                    if len(arcs) >= 3 << 16:
+                        arcs.tofile(out)
+                        n_edges += len(arcs) // 3
+                        del arcs[:]
+            head += 1
+        if out is not None:
+            arcs.tofile(out)
+            n_edges += len(arcs) // 3
+            out.close()
+            out = None
+            _write_dump(graph_path, store, dead, edge_file, n_edges, places, funcs.transitions)
+    except BaseException:
+        store.close()
+        raise
+    finally:
+        if out is not None:
+            out.close()
+        if os.path.exists(edge_file):
+            os.remove(edge_file)
+
+    result.states = len(store)
+    result.bounds = dict(zip(places, bound))
+    if graph_path:
+        from tree.dump import load_graph
+        result.graph = load_graph(graph_path)
+    result.seconds = time.perf_counter() - start
+    return result
@@ -0,0 +1,362 @@
+import json
+import multiprocessing as mp
+import queue
+import socket
+import struct
+import threading
+import time
+import zlib
+from collections import deque
+
+from snakes.nets import PetriNet
+from tree.algo import BudgetExceeded
+from tree.codegen import compile_functions
+from tree.explore import ExploreResult
+from tree.markings import Marking, OMEGA
+from tree.matrices import extract_pre_post
+from tree.parallel import merge_graph
+
+# Distributed reachability exploration over TCP (bounded nets).
+# Same partitioning as tree/parallel.py, but the workers are separate
+# programs (`python -m batch worker HOST:PORT`, on any machine) connected
+# to a coordinator, so the visited sets are spread over several hosts.
+#
+# Frames: 4-byte big-endian length, 1-byte kind, body. Markings travel as
+# compact keys: the token counts as LEB128 varints (1 byte per place
+# below 128 tokens), which is also the dedup key kept by their owner.
+#   coordinator -> worker   C  config (JSON: id, workers, places, PRE, POST)
+#                           B  batch of (source id + 1, transition + 1, key)
+#                           S  stop: send your results
+#   worker -> coordinator   O  2-byte owner + batch for that owner
+#                           D  done with one B (varint: new states)
+#                           R  results (varints, see _encode_results)
+# The owner of a state is crc32(key) % workers. Workers route by it and
+# the coordinator forwards each O to its owner as a B. Termination: the
+# coordinator counts B frames not yet acknowledged by a D; a worker sends
+# the O frames of a batch before its D, on the same ordered connection,
+# so the count only reaches 0 once no work is left anywhere.
+# The protocol has no authentication: run it on a trusted network.
+
+HEADER = struct.Struct(">IB")
+OWNER = struct.Struct(">H")
+
+# ---------------------------------------------------------------------
+# varints
+def encode_ints(ints, out: bytearray | None = None) -> bytearray:
+    out = bytearray() if out is None else out
+    for v in ints:
+        while v >= 0x80:
+            out.append((v & 0x7F) | 0x80)
+            v >>= 7
+        out.append(v)
+    return out
+
+def decode_ints(data, pos: int, count: int) -> tuple[list[int], int]:
+    values = []
+    for _ in range(count):
+        b = data[pos]
+        pos += 1
+        v, shift = b & 0x7F, 7
+        while b & 0x80:
+            b = data[pos]
+            pos += 1
+            v |= (b & 0x7F) << shift
+            shift += 7
+        values.append(v)
+    return values, pos
+
+def owner_of(key: bytes, n_workers: int) -> int:
+    return zlib.crc32(key) % n_workers
+
+# ---------------------------------------------------------------------
+# frames
+def send_frame(sock: socket.socket, kind: bytes, body: bytes = b"") -> None:
+    sock.sendall(HEADER.pack(len(body), kind[0]) + body)
+
+def _recv_exact(sock: socket.socket, n: int) -> bytes | None:
+    chunks = []
+    while n:
+        chunk = sock.recv(min(n, 1 << 20))
+        if not chunk:
+            return None
+        chunks.append(chunk)
+        n -= len(chunk)
+    return b"".join(chunks)
+
+# (kind, body), or (None, b"") once the other side closed
+def recv_frame(sock: socket.socket) -> tuple[bytes | None, bytes]:
+    header = _recv_exact(sock, HEADER.size)
+    if header is None:
+        return None, b""
+    size, kind = HEADER.unpack(header)
+    body = _recv_exact(sock, size) if size else b""
+    if body is None:
+        return None, b""
+    return bytes([kind]), body
+
+# ---------------------------------------------------------------------
+# worker results: counts, bounds, deadlocks, and the graph part if built
+def _encode_results(count, edge_count, deadlocks, deadlock_count, bounds,
+                    states, dead, edges) -> bytes:
+    out = encode_ints([count, edge_count, deadlock_count])
+    encode_ints(bounds, out)
+    encode_ints([len(deadlocks)], out)
+    for values in deadlocks:
+        encode_ints(values, out)
+    if states is not None:
+        encode_ints([len(states)], out)
+        for key in states:
+            out += key
+        encode_ints([len(dead)], out)
+        encode_ints(sorted(dead), out)
+        encode_ints([len(edges)], out)
+        for edge in edges:
+            encode_ints(edge, out)
+    return bytes(out)
+
+def _decode_results(body, n_places, build_graph):
+    (count, edge_count, deadlock_count), pos = decode_ints(body, 0, 3)
+    bounds, pos = decode_ints(body, pos, n_places)
+    (n,), pos = decode_ints(body, pos, 1)
+    deadlocks = []
+    for _ in range(n):
+        values, pos = decode_ints(body, pos, n_places)
+        deadlocks.append(values)
+    part = None
+    if build_graph:
+        (n,), pos = decode_ints(body, pos, 1)
+        states = []
+        for _ in range(n):
+            values, pos = decode_ints(body, pos, n_places)
+            states.append(values)
+        (n,), pos = decode_ints(body, pos, 1)
+        dead, pos = decode_ints(body, pos, n)
+        (n,), pos = decode_ints(body, pos, 1)
+        flat, pos = decode_ints(body, pos, 3 * n)
+        edges = list(zip(flat[0::3], flat[1::3], flat[2::3]))
+        part = (states, set(dead), edges)
+    return count, edge_count, deadlock_count, bounds, deadlocks, part
+
+# ---------------------------------------------------------------------
+# worker: connects to the coordinator and serves until told to stop
+def run_worker(host: str, port: int, batch_size: int = 512) -> None:
+    sock = socket.create_connection((host, port))
+    sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+    try:
+        kind, body = recv_frame(sock)
+        if kind != b"C":
+            return
+        _serve(sock, json.loads(body), batch_size)
+    except ConnectionError:
+        pass   # coordinator gone (finished early or budget exceeded)
+    finally:
+        sock.close()
+
+def _serve(sock, config, batch_size):
+    me, n_workers = config["id"], config["workers"]
+    places, build_graph = config["places"], config["build_graph"]
+    max_deadlocks = config["max_deadlocks"]
+    n_places = len(places)
+    funcs = compile_functions(config["pre"], config["post"], places)
+    enabled_all, successor = funcs.enabled_all, funcs.successor
+
+    index = {}                   # key -> local index
+    states = []                  # local index -> key (build_graph)
+    dead = set()
+    edges = []
+    deadlocks, deadlock_count, edge_count = [], 0, 0
+    bounds = [0] * n_places
+    out = [bytearray() for _ in range(n_workers)]
+    out_count = [0] * n_workers
+    local = deque()
+
+    def send(owner):
+        send_frame(sock, b"O", OWNER.pack(owner) + out[owner])
+        out[owner] = bytearray()
+        out_count[owner] = 0
+
+    def visit(key, values):
+        lid = index.get(key)
+        if lid is None:
+            lid = index[key] = len(index)
+            if build_graph:
+                states.append(key)
+            local.append((lid, values))
+            for i, v in enumerate(values):
+                if v > bounds[i]:
+                    bounds[i] = v
+        return lid * n_workers + me
+
+    while True:
+        kind, body = recv_frame(sock)
+        if kind is None:
+            return
+        if kind == b"S":
+            send_frame(sock, b"R", _encode_results(
+                len(index), edge_count, deadlocks, deadlock_count, bounds,
+                states if build_graph else None, dead, edges))
+            return
+
+        before = len(index)
+        pos = 0
+        while pos < len(body):
+            (src, k), start = decode_ints(body, pos, 2)
+            values, pos = decode_ints(body, start, n_places)
+            dst = visit(bytes(body[start:pos]), tuple(values))
+            if build_graph and src > 0:
+                edges.append((src - 1, k - 1, dst))
+
+        while local:
+            lid, values = local.popleft()
+            src = lid * n_workers + me
+            ks = enabled_all(values)
+            if not ks:
+                deadlock_count += 1
+                if len(deadlocks) < max_deadlocks:
+                    deadlocks.append(values)
+                if build_graph:
+                    dead.add(lid)
+                continue
+            edge_count += len(ks)
+            for k in ks:
+                succ = successor[k](values)
+                key = bytes(encode_ints(succ))
+                owner = owner_of(key, n_workers)
+                if owner == me:
+                    dst = visit(key, succ)
+                    if build_graph:
+                        edges.append((src, k, dst))
+                else:
+                    buf = out[owner]
+                    encode_ints((src + 1, k + 1), buf)
+                    buf += key
+                    out_count[owner] += 1
+                    if out_count[owner] >= batch_size:
+                        send(owner)
+
+        for owner in range(n_workers):
+            if out_count[owner]:
+                send(owner)
+        send_frame(sock, b"D", bytes(encode_ints([len(index) - before])))
+
+# ---------------------------------------------------------------------
+# reads frames of one worker into the coordinator's event queue
+def _reader(wid, sock, events):
+    while True:
+        try:
+            kind, body = recv_frame(sock)
+        except OSError:
+            kind, body = None, b""
+        events.put((wid, kind, body))
+        if kind is None:
+            return
+
+# ---------------------------------------------------------------------
+# workers: number of workers taking part
+# spawn: start them as local processes (else wait for `workers` external
+#   `python -m batch worker HOST:PORT` to connect to host:port)
+# build_graph: merge the parts into a KMGraph (root = node 0) for tree/properties
+def distributed_explore(net: PetriNet, M0: Marking, workers: int = 2, spawn: bool = True,
+                        host: str = "127.0.0.1", port: int = 0, build_graph: bool = False,
+                        max_states: int | None = None, time_limit: float | None = None,
+                        max_deadlocks: int = 100, batch_size: int = 512,
+                        accept_timeout: float = 60.0) -> ExploreResult:
+    start = time.perf_counter()
+    deadline = time.monotonic() + time_limit if time_limit is not None else None
+    if any(v == OMEGA for v in M0.values()):
+        raise ValueError("distributed_explore needs a finite initial marking")
+    PRE, POST = extract_pre_post(net)
+    places = list(M0)
+    names = list(PRE)
+    n = workers
+
+    listener = socket.create_server((host, port))
+    listener.settimeout(accept_timeout)
+    host, port = listener.getsockname()[:2]
+    procs = []
+    conns = []
+    try:
+        if spawn:
+            ctx = mp.get_context()
+            procs = [ctx.Process(target=run_worker, args=(host, port, batch_size), daemon=True)
+                     for _ in range(n)]
+            for p in procs:
+                p.start()
+        else:
+            print(f"waiting for {n} workers on {host}:{port}")
+
+        events = queue.Queue()
+        for wid in range(n):
+            try:
+                conn, _ = listener.accept()
+            except socket.timeout:
+                raise RuntimeError(f"only {wid} of {n} workers connected") from None
+            conn.settimeout(None)
+            conn.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            conns.append(conn)
+            send_frame(conn, b"C", json.dumps({
+                "id": wid, "workers": n, "places": places, "pre": PRE, "post": POST,
+                "build_graph": build_graph, "max_deadlocks": max_deadlocks}).encode())
+            threading.Thread(target=_reader, args=(wid, conn, events), daemon=True).start()
+
+        # seed: the initial marking, to its owner
+        initial = [M0[p] for p in places]
+        key = bytes(encode_ints(initial))
+        root_owner = owner_of(key, n)
+        send_frame(conns[root_owner], b"B", bytes(encode_ints((0, 0))) + key)
+        outstanding, states_seen = 1, 0
+
+        while outstanding:
+            if deadline is not None and time.monotonic() > deadline:
+                raise BudgetExceeded(f"time limit of {time_limit}s reached after {states_seen} states")
+            try:
+                wid, kind, body = events.get(timeout=0.05)
+            except queue.Empty:
+                continue
+            if kind == b"O":
+                (owner,) = OWNER.unpack_from(body)
+                send_frame(conns[owner], b"B", body[OWNER.size:])
+                outstanding += 1
+            elif kind == b"D":
+                outstanding -= 1
+                states_seen += decode_ints(body, 0, 1)[0][0]
+                if max_states is not None and states_seen > max_states:
+                    raise BudgetExceeded(f"state limit of {max_states} reached")
+            elif kind is None:
+                raise RuntimeError(f"worker {wid} disconnected")
+
+        for conn in conns:
+            send_frame(conn, b"S")
+        result = ExploreResult(bounds=dict.fromkeys(places, 0))
+        parts = [None] * n
+        received = set()
+        while len(received) < n:
+            wid, kind, body = events.get()
+            if kind is None and wid in received:
+                continue   # closed after its results
+            if kind != b"R":
+                raise RuntimeError(f"worker {wid} disconnected before sending its results")
+            count, edge_count, deadlock_count, bounds, deadlocks, part = \
+                _decode_results(body, len(places), build_graph)
+            result.states += count
+            result.edges += edge_count
+            result.deadlock_count += deadlock_count
+            result.deadlocks += [dict(zip(places, v)) for v in deadlocks]
+            for p, b in zip(places, bounds):
+                result.bounds[p] = max(result.bounds[p], b)
+            parts[wid] = part
+            received.add(wid)
+    finally:
+        for conn in conns:
+            conn.close()
+        listener.close()
+        for p in procs:
+            p.join(timeout=1)
+            if p.is_alive():
+                p.terminate()
+
+    del result.deadlocks[max_deadlocks:]
+    if build_graph:
+        result.graph = merge_graph(parts, n, places, root_owner, names)
+    result.seconds = time.perf_counter() - start
+    return result
@@ -0,0 +1,215 @@
+import json
+import os
+from dataclasses import dataclass
+from functools import cached_property
+
+import numpy as np
+
+from tree.algo import KMGraph, Node, Arc
+from tree.graph import Adjacency
+from tree.markings import Marking, OMEGA
+
+# Columnar binary dump of a coverability graph: one folder with
+#   meta.json        place / transition / tag name tables and sizes
+#   markings.npy     int64 [nodes x places], OMEGA stored as -1
+#   tags.npy         uint8 [nodes], index in the tag table
+#   src.npy dst.npy  int64 [edges]
+#   trans.npy        int32 [edges], index in the transition table
+# Arrays are standard .npy files, loaded back with numpy memory maps:
+# reopening a huge graph costs no exploration and no Python objects until
+# a node or arc is actually looked at.
+
+FORMAT_VERSION = 1
+OMEGA_CODE = -1
+
+# ---------------------------------------------------------------------
+# write graph into the folder `path` (created if needed)
+# places / transitions: name tables (default: as found in the graph); pass the
+# net's transitions so that quasi-liveness can still be checked on the dump
+def save_graph(graph: KMGraph, path: str, places: list[str] | None = None,
+               transitions: list[str] | None = None) -> None:
+    if places is None:
+        places = sorted({p for n in graph.nodes for p in n.marking})
+    if transitions is None:
+        transitions = sorted({e.transition for e in graph.edges})
+    tags = sorted({n.tag for n in graph.nodes})
+    place_col = {p: i for i, p in enumerate(places)}
+    trans_id = {t: i for i, t in enumerate(transitions)}
+    tag_id = {t: i for i, t in enumerate(tags)}
+
+    os.makedirs(path, exist_ok=True)
+    n_nodes, n_edges = len(graph.nodes), len(graph.edges)
+
+    # written row by row into memory-mapped files: no full copy in RAM
+    markings = open_array(path, "markings", np.int64, (n_nodes, len(places)))
+    node_tags = open_array(path, "tags", np.uint8, (n_nodes,))
+    for i, n in enumerate(graph.nodes):
+        if n.id != i:
+            raise ValueError(f"node ids must be 0..n-1 in order (found {n.id} at position {i})")
+        row = markings[i]
+        for p, v in n.marking.items():
+            row[place_col[p]] = OMEGA_CODE if v == OMEGA else v
+        node_tags[i] = tag_id[n.tag]
+
+    src = open_array(path, "src", np.int64, (n_edges,))
+    dst = open_array(path, "dst", np.int64, (n_edges,))
+    trans = open_array(path, "trans", np.int32, (n_edges,))
+    for i, e in enumerate(graph.edges):
+        src[i], dst[i], trans[i] = e.src, e.dst, trans_id[e.transition]
+
+    for array in (markings, node_tags, src, dst, trans):
+        array.flush()
+
+    write_meta(path, n_nodes, n_edges, places, transitions, tags)
+
+# the .npy files and meta.json, for writers filling a dump themselves
+def open_array(path, name, dtype, shape):
+    return np.lib.format.open_memmap(os.path.join(path, f"{name}.npy"), mode="w+", dtype=dtype, shape=shape)
+
+def write_meta(path, n_nodes, n_edges, places, transitions, tags) -> None:
+    meta = {"version": FORMAT_VERSION, "nodes": n_nodes, "edges": n_edges,
+            "places": places, "transitions": transitions, "tags": tags}
+    with open(os.path.join(path, "meta.json"), "w", encoding="utf-8") as f:
+        json.dump(meta, f, indent=2)
+
+# is `path` a graph dump folder
+def is_dump(path: str) -> bool:
+    return os.path.isfile(os.path.join(path, "meta.json")) and os.path.isfile(os.path.join(path, "markings.npy"))
+
+# ---------------------------------------------------------------------
+# read-only views, shaped like KMGraph Node / Arc (tree/properties works on them)
+@dataclass(frozen=True)
+class DumpedNode:
+    graph: "DumpedGraph"
+    id: int
+
+    @property
+    def tag(self) -> str:
+        return self.graph.tags[self.graph.node_tags[self.id]]
+
+    @property
+    def marking(self) -> Marking:
+        return self.graph.marking(self.id)
+
+@dataclass(frozen=True)
+class DumpedArc:
+    src: int
+    dst: int
+    transition: str
+
+class _NodeList:
+    def __init__(self, graph):
+        self._graph = graph
+
+    def __len__(self):
+        return len(self._graph.node_tags)
+
+    def __getitem__(self, i):
+        if not -len(self) <= i < len(self):
+            raise IndexError(i)
+        return DumpedNode(self._graph, i % len(self))
+
+    def __iter__(self):
+        return (DumpedNode(self._graph, i) for i in range(len(self)))
+
+class _EdgeList:
+    def __init__(self, graph):
+        self._graph = graph
+
+    def __len__(self):
+        return len(self._graph.src)
+
+    def __getitem__(self, i):
+        g = self._graph
+        return DumpedArc(int(g.src[i]), int(g.dst[i]), g.transitions[g.trans[i]])
+
+    def __iter__(self):
+        g = self._graph
+        names = g.transitions
+        # chunked reads keep the memory map access sequential
+        for start in range(0, len(self), 65536):
+            stop = start + 65536
+            for s, d, t in zip(g.src[start:stop].tolist(), g.dst[start:stop].tolist(), g.trans[start:stop].tolist()):
+                yield DumpedArc(s, d, names[t])
+
+# ---------------------------------------------------------------------
+# a graph reopened from a dump; the raw arrays stay available for numpy queries
+class DumpedGraph:
+    def __init__(self, path: str, meta: dict, mmap_mode: str | None = "r"):
+        self.path = path
+        self.places: list[str] = meta["places"]
+        self.transitions: list[str] = meta["transitions"]
+        self.tags: list[str] = meta["tags"]
+
+        def load(name):
+            return np.load(os.path.join(path, f"{name}.npy"), mmap_mode=mmap_mode)
+        self.markings = load("markings")
+        self.node_tags = load("tags")
+        self.src = load("src")
+        self.dst = load("dst")
+        self.trans = load("trans")
+
+        self.nodes = _NodeList(self)
+        self.edges = _EdgeList(self)
+
+    # marking of one node as a dict (same encoding as tree/markings)
+    def marking(self, nid: int) -> Marking:
+        return {p: OMEGA if v == OMEGA_CODE else v for p, v in zip(self.places, self.markings[nid].tolist())}
+
+    # places holding OMEGA somewhere in the graph
+    def omega_places(self) -> list[str]:
+        cols = np.flatnonzero((self.markings == OMEGA_CODE).any(axis=0))
+        return [self.places[c] for c in cols]
+
+    # largest finite token count (None if the graph is empty)
+    def max_tokens(self) -> int | None:
+        if self.markings.size == 0:
+            return None
+        return max(int(self.markings.max()), 0)
+
+    # node ids carrying the given tag
+    def nodes_tagged(self, tag: str) -> np.ndarray:
+        if tag not in self.tags:
+            return np.empty(0, dtype=np.int64)
+        return np.flatnonzero(self.node_tags == self.tags.index(tag))
+
+    # CSR indexes, same interface as KMGraph.forward / reverse
+    @cached_property
+    def _forward(self) -> Adjacency:
+        return _csr(len(self.nodes), self.src, self.dst, self.trans)
+
+    @cached_property
+    def _reverse(self) -> Adjacency:
+        return _csr(len(self.nodes), self.dst, self.src, self.trans)
+
+    def forward(self) -> Adjacency:
+        return self._forward
+
+    def reverse(self) -> Adjacency:
+        return self._reverse
+
+    @cached_property
+    def fired_transitions(self) -> set[str]:
+        return {self.transitions[t] for t in np.unique(self.trans).tolist()}
+
+    # materialise as a regular KMGraph (loads everything in RAM)
+    def to_kmgraph(self) -> KMGraph:
+        return KMGraph((Node(n.id, n.marking, n.tag) for n in self.nodes),
+                       (Arc(e.src, e.dst, e.transition) for e in self.edges))
+
+# stable sort of the arcs by row, done by numpy; the index stays in numpy
+# arrays (8 + 8 + 4 bytes per arc, no Python int per arc)
+def _csr(n_nodes, rows, cols, labels) -> Adjacency:
+    order = np.argsort(rows, kind="stable")
+    indptr = np.zeros(n_nodes + 1, dtype=np.int64)
+    np.cumsum(np.bincount(rows, minlength=n_nodes), out=indptr[1:])
+    return Adjacency(indptr, cols[order], labels[order])
+
+# ---------------------------------------------------------------------
+# reopen a dump; mmap_mode=None reads the arrays fully instead of mapping them
+def load_graph(path: str, mmap_mode: str | None = "r") -> DumpedGraph:
+    with open(os.path.join(path, "meta.json"), encoding="utf-8") as f:
+        meta = json.load(f)
+    if meta.get("version") != FORMAT_VERSION:
+        raise ValueError(f"unsupported graph dump version: {meta.get('version')}")
+    return DumpedGraph(path, meta, mmap_mode)
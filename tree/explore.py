@@ -0,0 +1,132 @@
+import time
+from collections import deque
+from dataclasses import dataclass, field
+
+from snakes.nets import PetriNet
+from tree.algo import BudgetExceeded
+from tree.codegen import compile_functions
+from tree.graph import KMGraph
+from tree.markings import Marking, OMEGA
+from tree.matrices import extract_pre_post
+from tree.packing import STORES
+from tree.sparse import SparseMarking, EnablingIndex
+from tree.transitions import enabled, fire
+
+# Explicit reachability exploration: every reachable marking, no
+# acceleration (so only for bounded nets: an unbounded net runs until its
+# budget). Breadth first; visited markings go into a state store
+# (tree/packing.py), or into a KMGraph when the graph itself is wanted.
+# Dense markings are explored as tuples with the net-specialised
+# functions of tree/codegen.py, and only turned into dicts for the result.
+
+# ---------------------------------------------------------------------
+# result of one exploration
+@dataclass
+class ExploreResult:
+    states: int = 0
+    edges: int = 0                                   # fired (state, transition) pairs
+    deadlocks: list[Marking] = field(default_factory=list)
+    deadlock_count: int = 0
+    bounds: dict[str, int] = field(default_factory=dict)   # max tokens seen per place
+    graph: KMGraph | None = None                     # reachability graph (build_graph=True)
+    store: object = None                             # visited-state store (build_graph=False)
+    trace: list[str] | None = None                   # firing sequence to the state a search stopped at
+    seconds: float = 0.0
+
+# ---------------------------------------------------------------------
+# store: name in tree/packing.STORES ("packed", "tuple", "sparse", "disk"); default
+#   "packed", or "sparse" with sparse markings
+# bounds: known per-place bounds for the packed store (None = observed)
+# sparse: sparse persistent markings (tree/sparse.py), for nets with many places
+# build_graph: return the reachability graph as a KMGraph (tags "done" /
+#   "dead-end", readable by tree/properties) instead of a bare state store
+# max_deadlocks: deadlock markings kept in the result (all are counted)
+# threads: explore with that many threads sharing a sharded visited table
+#   (tree/threaded.py; store / bounds / sparse do not apply)
+def explore(net: PetriNet, M0: Marking, store: str | None = None, bounds: dict | None = None,
+            build_graph: bool = False, max_states: int | None = None,
+            time_limit: float | None = None, max_deadlocks: int = 100,
+            sparse: bool = False, threads: int | None = None) -> ExploreResult:
+    if threads:
+        from tree.threaded import threaded_explore
+        return threaded_explore(net, M0, threads=threads, build_graph=build_graph, max_states=max_states,
+                                time_limit=time_limit, max_deadlocks=max_deadlocks)
+    start = time.perf_counter()
+    deadline = time.monotonic() + time_limit if time_limit is not None else None
+    if any(v == OMEGA for v in M0.values()):
+        raise ValueError("explore needs a finite initial marking")
+    PRE, POST = extract_pre_post(net)
+    result = ExploreResult(bounds={p: v for p, v in M0.items()})
+    places = list(M0)
+    if store is None:
+        store = "sparse" if sparse else "packed"
+
+    # successors(marking) -> (transition, successor); as_marking / items
+    # read a marking of the internal form (sparse marking or tuple)
+    if sparse:
+        initial = SparseMarking.from_dict(M0)
+        index = EnablingIndex(PRE)
+        def successors(marking):
+            for t in index.candidates(marking):
+                if enabled(marking, PRE[t]):
+                    yield t, fire(marking, PRE[t], POST[t])
+        as_marking = lambda marking: marking
+        items = lambda marking: marking.nonzero()
+    else:
+        initial = tuple(M0[p] for p in places)
+        funcs = compile_functions(PRE, POST, places)
+        names, successor, enabled_all = funcs.transitions, funcs.successor, funcs.enabled_all
+        def successors(values):
+            for k in enabled_all(values):
+                yield names[k], successor[k](values)
+        as_marking = lambda values: dict(zip(places, values))
+        items = lambda values: zip(places, values)
+
+    # visited check: True if the marking is new (and gets id `nid`)
+    if build_graph:
+        graph = result.graph = KMGraph()
+        graph.add_node(as_marking(initial))
+        def visit(marking):
+            marking = as_marking(marking)
+            nid = graph.find_marking(marking)
+            return (True, graph.add_node(marking)) if nid is None else (False, nid)
+    else:
+        seen = result.store = STORES[store](places, bounds=bounds, initial=M0)
+        add = seen.add if sparse else seen.add_values
+        add(initial)
+        def visit(marking):
+            return add(marking), None
+
+    queue = deque([(initial, 0)])
+    result.states = 1
+    while queue:
+        marking, nid = queue.popleft()
+        if deadline is not None and time.monotonic() > deadline:
+            raise BudgetExceeded(f"time limit of {time_limit}s reached after {result.states} states")
+
+        any_enabled = False
+        for t, m_prime in successors(marking):
+            any_enabled = True
+            result.edges += 1
+
+            is_new, dst = visit(m_prime)
+            if is_new:
+                result.states += 1
+                if max_states is not None and result.states > max_states:
+                    raise BudgetExceeded(f"state limit of {max_states} reached")
+                for p, v in items(m_prime):
+                    if v > result.bounds[p]:
+                        result.bounds[p] = v
+                queue.append((m_prime, dst))
+            if build_graph:
+                graph.add_edge(nid, dst, t)
+
+        if not any_enabled:
+            result.deadlock_count += 1
+            if len(result.deadlocks) < max_deadlocks:
+                result.deadlocks.append(as_marking(marking))
+        if build_graph:
+            graph.set_tag(nid, "done" if any_enabled else "dead-end")
+
+    result.seconds = time.perf_counter() - start
+    return result
@@ -1,31 +1,72 @@
+import csv
+import io
+import json
+import os
+import tempfile
+from concurrent.futures import Future
+from typing import TextIO
+
 from tree.algo import KMGraph
 from tree.print import format_marking
-from graphviz import Source
+from viz.render import render_dot_file
 
+# The writers below stream the graph to an open text file, one node / arc
+# at a time, so nothing but the graph itself is held in memory.
 
 # ---------------------------------------------------------------------
 # export graph to DOT format (Graphviz)
-def to_dot(graph: KMGraph) -> str:
-    lines = ["digraph KM {", "  rankdir=LR;"] 
+def write_dot(graph: KMGraph, out: TextIO) -> None:
+    out.write("digraph KM {\n  rankdir=LR;\n")
 
     # nodes with labels
     for n in graph.nodes:
         label = format_marking(n.marking)
-        lines.append(f'  N{n.id} [label="{label}"];')
+        out.write(f'  N{n.id} [label="{label}"];\n')
 
     # arcs with transition labels
     for e in graph.edges:
-        lines.append(f'  N{e.src} -> N{e.dst} [label="{e.transition}"];')
+        out.write(f'  N{e.src} -> N{e.dst} [label="{e.transition}"];\n')
+
+    out.write("}")
+
+def to_dot(graph: KMGraph) -> str:
+    buf = io.StringIO()
+    write_dot(graph, buf)
+    return buf.getvalue()
+
+# ---------------------------------------------------------------------
+# JSON lines: one object per node, then one per arc (omega stays "w";
+# sparse markings are written as plain dicts)
+def write_jsonl(graph: KMGraph, out: TextIO) -> None:
+    for n in graph.nodes:
+        out.write(json.dumps({"type": "node", "id": n.id, "marking": dict(n.marking), "tag": n.tag}) + "\n")
+    for e in graph.edges:
+        out.write(json.dumps({"type": "edge", "src": e.src, "dst": e.dst, "transition": e.transition}) + "\n")
 
-    lines.append("}")
-    return "\n".join(lines)
+# ---------------------------------------------------------------------
+# CSV edge list: src,dst,transition (open the file with newline="")
+def write_csv_edges(graph: KMGraph, out: TextIO) -> None:
+    writer = csv.writer(out)
+    writer.writerow(["src", "dst", "transition"])
+    for e in graph.edges:
+        writer.writerow([e.src, e.dst, e.transition])
 
 # ---------------------------------------------------------------------
-# DOT -> image file
-def save_graph_image(graph: KMGraph, filename: str = "km_graph", fmt: str = "png") -> None:
-
-    dot_str = to_dot(graph)
-    src = Source(dot_str)
-    src.format = fmt
-    src.render(filename, cleanup=True)  
-    print(f"Graph saved as {filename}.{fmt}")
+# DOT -> image file, rendered by Graphviz in the background (viz/render.py).
+# Returns a Future with the image path; pass wait=True to block until done.
+# Rendering the same graph again is served from the render cache.
+def save_graph_image(graph: KMGraph, filename: str = "km_graph", fmt: str = "png",
+                     wait: bool = False) -> Future:
+    fd, dot_path = tempfile.mkstemp(suffix=".dot")
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        write_dot(graph, f)
+
+    output = f"{filename}.{fmt}"
+    job = render_dot_file(dot_path, output, fmt, remove_source=True)
+    def report(f):
+        if f.exception() is None:
+            print(f"Graph saved as {output}")
+    job.add_done_callback(report)
+    if wait:
+        job.result()
+    return job
@@ -0,0 +1,397 @@
+from array import array
+from collections.abc import Mapping
+from dataclasses import dataclass
+
+from tree.markings import Marking
+from tree.sparse import SparseMarking
+
+# Storage of the coverability graph.
+# Columns instead of one object per node / arc:
+#   - markings live once in a marking table (tuples in place order), nodes
+#     only keep the index of their marking; identical markings are shared
+#   - node tags and arc src / dst / transition ids are flat arrays
+# graph.nodes / graph.edges are views giving Node / Arc shaped objects, so
+# the code reading n.id, n.marking, n.tag, e.src, e.dst, e.transition works
+# unchanged. n.marking is a read-only view of the stored tuple (writing to
+# it raises TypeError); graph.marking_dict(nid) gives a dict to change.
+# Forward / reverse adjacency is built once (CSR) and cached until the
+# graph grows.
+
+# ---------------------------------------------------------------------
+# a node as given to nodes.append (and read back through NodeRef)
+@dataclass(slots=True)
+class Node:
+    id: int
+    marking: Marking
+    tag: str = "new"
+
+# ---------------------------------------------------------------------
+# class for transition arcs between nodes
+@dataclass(slots=True)
+class Arc:
+    src: int # source node id
+    dst: int # destination node id
+    transition: str # transition name
+
+# ---------------------------------------------------------------------
+# marking table, append only: it is shared by a graph and its copies
+# (history snapshots), which only ever look at the ids they know.
+# Sparse markings (tree/sparse.py) are hashable and stored as they are,
+# so the table shares their tries; one graph holds one kind of marking
+class _MarkingTable:
+    __slots__ = ("places", "markings", "ids", "index")
+
+    def __init__(self, places=None, markings=()):
+        self.places: list[str] = list(places or [])
+        self.markings: list[tuple] = list(markings)
+        self.ids: dict[tuple, int] = {m: i for i, m in enumerate(self.markings)}
+        self.index: dict[str, int] = {p: i for i, p in enumerate(self.places)}
+
+    def key(self, marking: Marking) -> tuple:
+        if isinstance(marking, SparseMarking):
+            if not self.places:
+                self.places = marking.space.places
+            return marking
+        if not self.places and not self.markings:
+            self.places = list(marking)
+            self.index = {p: i for i, p in enumerate(self.places)}
+        if len(marking) != len(self.places):
+            raise ValueError(f"marking over {list(marking)} does not match the graph places {self.places}")
+        return tuple(marking[p] for p in self.places)
+
+    def intern(self, marking: Marking) -> int:
+        key = self.key(marking)
+        mid = self.ids.get(key)
+        if mid is None:
+            mid = self.ids[key] = len(self.markings)
+            self.markings.append(key)
+        return mid
+
+    def as_dict(self, mid: int) -> Marking:
+        key = self.markings[mid]
+        return dict(zip(self.places, key)) if isinstance(key, tuple) else key
+
+    # read-only marking (sparse markings are immutable already)
+    def view(self, mid: int) -> Marking:
+        key = self.markings[mid]
+        return MarkingView(self.places, self.index, key) if isinstance(key, tuple) else key
+
+# ---------------------------------------------------------------------
+# a stored marking read as a mapping, without copying it into a dict
+class MarkingView(Mapping):
+    __slots__ = ("_places", "_index", "_values")
+
+    def __init__(self, places, index, values):
+        self._places = places
+        self._index = index
+        self._values = values
+
+    def __getitem__(self, place):
+        return self._values[self._index[place]]
+
+    def __iter__(self):
+        return iter(self._places)
+
+    def __len__(self):
+        return len(self._places)
+
+    def __contains__(self, place):
+        return place in self._index
+
+    def values(self):
+        return self._values
+
+    def __setitem__(self, place, value):
+        raise TypeError(f"node markings are read-only (setting {place!r}): "
+                        "change a copy, dict(node.marking) or graph.marking_dict(id)")
+
+    def __delitem__(self, place):
+        raise TypeError(f"node markings are read-only (deleting {place!r})")
+
+    def __repr__(self):
+        return repr(dict(zip(self._places, self._values)))
+
+# ---------------------------------------------------------------------
+# compressed sparse rows: the arcs leaving u are at positions
+# indptr[u] .. indptr[u+1] of targets (other end) and labels (transition id);
+# int arrays, or numpy arrays for a graph reopened from a dump (tree/dump.py)
+class Adjacency:
+    __slots__ = ("indptr", "targets", "labels")
+
+    def __init__(self, indptr, targets, labels):
+        self.indptr = indptr
+        self.targets = targets
+        self.labels = labels
+
+    def __len__(self):
+        return len(self.indptr) - 1
+
+    # neighbours of u (mapping style, used by the layout)
+    def __getitem__(self, u):
+        return self.targets[self.indptr[u]:self.indptr[u + 1]]
+
+    # (neighbour, transition id) pairs of u
+    def arcs(self, u):
+        start, stop = self.indptr[u], self.indptr[u + 1]
+        return zip(self.targets[start:stop], self.labels[start:stop])
+
+# counting sort of the arcs by `rows`, stable (arcs keep their order)
+def build_csr(n_nodes: int, rows, cols, labels) -> Adjacency:
+    indptr = array("q", bytes(8 * (n_nodes + 1)))
+    for r in rows:
+        indptr[r + 1] += 1
+    for u in range(n_nodes):
+        indptr[u + 1] += indptr[u]
+
+    fill = array("q", indptr[:-1])
+    targets = array("q", bytes(8 * len(rows)))
+    out_labels = array("i", bytes(4 * len(rows)))
+    for r, c, l in zip(rows, cols, labels):
+        k = fill[r]
+        targets[k] = c
+        out_labels[k] = l
+        fill[r] = k + 1
+    return Adjacency(indptr, targets, out_labels)
+
+# ---------------------------------------------------------------------
+# views: node / arc objects read from (and for tags, written to) the columns
+class NodeRef:
+    __slots__ = ("_graph", "id")
+
+    def __init__(self, graph, nid):
+        self._graph = graph
+        self.id = nid
+
+    @property
+    def marking(self) -> Marking:
+        g = self._graph
+        return g._table.view(g._node_marking[self.id])
+
+    @property
+    def tag(self) -> str:
+        g = self._graph
+        return g._tag_names[g._node_tag[self.id]]
+
+    @tag.setter
+    def tag(self, value: str):
+        self._graph.set_tag(self.id, value)
+
+    def __eq__(self, other):
+        if not all(hasattr(other, a) for a in ("id", "marking", "tag")):
+            return NotImplemented
+        return (self.id, self.marking, self.tag) == (other.id, other.marking, other.tag)
+
+    def __repr__(self):
+        return f"Node(id={self.id}, marking={self.marking}, tag={self.tag!r})"
+
+class NodeList:
+    __slots__ = ("_graph",)
+
+    def __init__(self, graph):
+        self._graph = graph
+
+    def __len__(self):
+        return len(self._graph._node_marking)
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [NodeRef(self._graph, k) for k in range(*i.indices(len(self)))]
+        n = len(self)
+        if not -n <= i < n:
+            raise IndexError("node index out of range")
+        return NodeRef(self._graph, i % n)
+
+    def __iter__(self):
+        g = self._graph
+        return (NodeRef(g, k) for k in range(len(self)))
+
+    # node.id must be the next id (ids are positions)
+    def append(self, node: Node) -> None:
+        g = self._graph
+        if node.id != len(self):
+            raise ValueError(f"node ids must follow each other: expected {len(self)}, got {node.id}")
+        g.add_node(node.marking, node.tag)
+
+class ArcList:
+    __slots__ = ("_graph",)
+
+    def __init__(self, graph):
+        self._graph = graph
+
+    def __len__(self):
+        return len(self._graph._src)
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[k] for k in range(*i.indices(len(self)))]
+        g = self._graph
+        return Arc(g._src[i], g._dst[i], g.transitions[g._trans[i]])
+
+    def __iter__(self):
+        g = self._graph
+        names = g.transitions
+        return (Arc(s, d, names[t]) for s, d, t in zip(g._src, g._dst, g._trans))
+
+    def append(self, arc: Arc) -> None:
+        self._graph.add_edge(arc.src, arc.dst, arc.transition)
+
+# ---------------------------------------------------------------------
+# class for the tree = graph (nodes + arcs)
+class KMGraph:
+    def __init__(self, nodes=(), edges=()):
+        self._table = _MarkingTable()
+        self._node_marking = array("q")   # node id -> marking id
+        self._first_node = array("q")     # marking id -> first node holding it (-1: none)
+        self._node_tag = bytearray()      # node id -> tag id
+        self._tag_names: list[str] = []
+        self._tag_ids: dict[str, int] = {}
+        self._src = array("q")
+        self._dst = array("q")
+        self._trans = array("i")          # arc -> transition id
+        self.transitions: list[str] = []  # transition id -> name
+        self._transition_ids: dict[str, int] = {}
+        self._csr = {}
+
+        self.nodes = NodeList(self)
+        self.edges = ArcList(self)
+        for n in nodes:
+            self.nodes.append(n)
+        for e in edges:
+            self.edges.append(e)
+
+    # place order of the marking table
+    @property
+    def places(self) -> list[str]:
+        return self._table.places
+
+    # ---- building ----
+    def add_node(self, marking: Marking, tag: str = "new") -> int:
+        nid = len(self._node_marking)
+        mid = self._table.intern(marking)
+        while len(self._first_node) <= mid:
+            self._first_node.append(-1)
+        if self._first_node[mid] < 0:
+            self._first_node[mid] = nid
+        self._node_marking.append(mid)
+        self._node_tag.append(self._tag_id(tag))
+        return nid
+
+    def add_edge(self, src: int, dst: int, transition: str) -> None:
+        tid = self._transition_ids.get(transition)
+        if tid is None:
+            tid = self._transition_ids[transition] = len(self.transitions)
+            self.transitions.append(transition)
+        self._src.append(src)
+        self._dst.append(dst)
+        self._trans.append(tid)
+
+    def set_tag(self, nid: int, tag: str) -> None:
+        self._node_tag[nid] = self._tag_id(tag)
+
+    def _tag_id(self, tag: str) -> int:
+        tid = self._tag_ids.get(tag)
+        if tid is None:
+            tid = self._tag_ids[tag] = len(self._tag_names)
+            self._tag_names.append(tag)
+        return tid
+
+    # ---- queries ----
+    # first (smallest) node id holding exactly this marking, or None
+    def find_marking(self, marking: Marking) -> int | None:
+        if not self._node_marking:
+            return None
+        mid = self._table.ids.get(self._table.key(marking))
+        if mid is None or mid >= len(self._first_node) or self._first_node[mid] < 0:
+            return None
+        return self._first_node[mid]
+
+    # marking of node nid as a new dict (sparse: the marking itself)
+    def marking_dict(self, nid: int) -> Marking:
+        return self._table.as_dict(self._node_marking[nid])
+
+    # node ids sharing one stored marking have the same marking id
+    def marking_id(self, nid: int) -> int:
+        return self._node_marking[nid]
+
+    def tag(self, nid: int) -> str:
+        return self._tag_names[self._node_tag[nid]]
+
+    # first (smallest) node id holding the marking of node nid, O(1)
+    def first_holder(self, nid: int) -> int:
+        return self._first_node[self._node_marking[nid]]
+
+    # cached CSR indexes, rebuilt when nodes or arcs were added since
+    def forward(self) -> Adjacency:
+        return self._adjacency("forward", self._src, self._dst)
+
+    def reverse(self) -> Adjacency:
+        return self._adjacency("reverse", self._dst, self._src)
+
+    def _adjacency(self, kind, rows, cols) -> Adjacency:
+        size = (len(self._node_marking), len(self._src))
+        cached = self._csr.get(kind)
+        if cached is None or cached[0] != size:
+            cached = self._csr[kind] = (size, build_csr(size[0], rows, cols, self._trans))
+        return cached[1]
+
+    # ---- copies (history snapshots) ----
+    # columns are copied, the append-only marking table is shared
+    def copy(self) -> "KMGraph":
+        g = KMGraph.__new__(KMGraph)
+        g._table = self._table
+        g._node_marking = array("q", self._node_marking)
+        g._first_node = array("q", self._first_node)
+        g._node_tag = bytearray(self._node_tag)
+        g._tag_names = list(self._tag_names)
+        g._tag_ids = dict(self._tag_ids)
+        g._src = array("q", self._src)
+        g._dst = array("q", self._dst)
+        g._trans = array("i", self._trans)
+        g.transitions = list(self.transitions)
+        g._transition_ids = dict(self._transition_ids)
+        g._csr = {}
+        g.nodes = NodeList(g)
+        g.edges = ArcList(g)
+        return g
+
+    # copy holding only the first n_nodes nodes and n_edges arcs (the
+    # graph as it was at that point of an append-only construction)
+    def head(self, n_nodes: int, n_edges: int) -> "KMGraph":
+        g = self.copy()
+        del g._node_marking[n_nodes:]
+        del g._node_tag[n_nodes:]
+        for mid, first in enumerate(g._first_node):
+            if first >= n_nodes:
+                g._first_node[mid] = -1
+        del g._src[n_edges:]
+        del g._dst[n_edges:]
+        del g._trans[n_edges:]
+        return g
+
+    def __deepcopy__(self, memo):
+        return self.copy()
+
+    # pickled with only the part of the marking table this graph uses
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        for name in ("nodes", "edges", "_csr", "_table"):
+            del state[name]
+        state["_places"] = self._table.places
+        state["_markings"] = self._table.markings[:len(self._first_node)]
+        return state
+
+    def __setstate__(self, state):
+        self._table = _MarkingTable(state.pop("_places"), state.pop("_markings"))
+        self.__dict__.update(state)
+        self._csr = {}
+        self.nodes = NodeList(self)
+        self.edges = ArcList(self)
+
+    def __eq__(self, other):
+        if not isinstance(other, KMGraph):
+            return NotImplemented
+        return (list(self.nodes) == list(other.nodes)
+                and list(self.edges) == list(other.edges))
+
+    def __repr__(self):
+        return f"KMGraph({len(self.nodes)} nodes, {len(self.edges)} edges)"
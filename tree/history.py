@@ -0,0 +1,51 @@
+from collections.abc import Sequence
+
+from tree.graph import KMGraph
+
+# History of the step-by-step tree construction, kept as deltas.
+# A construction step only appends nodes / arcs and changes the tags of a
+# few nodes, so a step records its node and arc counts, its tag changes
+# and its message: O(changes) per step instead of a copy of the graph.
+# history[k] still gives (graph, message) as the snapshots did, the graph
+# of step k being rebuilt on demand from the live (final) graph.
+
+# ---------------------------------------------------------------------
+# one step: node / arc counts after it, [(node id, tag before, tag after)]
+# (tag before None: the node appeared at this step), message
+class History(Sequence):
+    def __init__(self, graph: KMGraph):
+        self.graph = graph
+        self.steps: list[tuple[int, int, list, str]] = []
+        self._tags: list[str] = []        # node id -> tag as of the last step
+
+    # record a step; tagged: ids of older nodes whose tag may have changed
+    def record(self, msg: str, tagged=()) -> None:
+        graph, tags = self.graph, self._tags
+        changes = []
+        for nid in tagged:
+            if nid < len(tags):
+                tag = graph.tag(nid)
+                if tag != tags[nid]:
+                    changes.append((nid, tags[nid], tag))
+                    tags[nid] = tag
+        for nid in range(len(tags), len(graph.nodes)):
+            tag = graph.tag(nid)
+            changes.append((nid, None, tag))
+            tags.append(tag)
+        self.steps.append((len(graph.nodes), len(graph.edges), changes, msg))
+
+    def __len__(self):
+        return len(self.steps)
+
+    # (graph of step k, message): O(graph + changes after step k)
+    def __getitem__(self, k):
+        if isinstance(k, slice):
+            return [self[i] for i in range(*k.indices(len(self)))]
+        k = range(len(self.steps))[k]
+        n_nodes, n_edges, _, msg = self.steps[k]
+        graph = self.graph.head(n_nodes, n_edges)
+        for j in range(len(self.steps) - 1, k, -1):
+            for nid, before, _ in self.steps[j][2]:
+                if before is not None and nid < n_nodes:
+                    graph.set_tag(nid, before)
+        return graph, msg
@@ -7,6 +7,8 @@ OMEGA = "w"
 Token = Union[int, str] 
 
 # marking = place -> token
+# (a plain dict; sparse markings from tree/sparse.py carry their own
+# comparison / acceleration methods, used by the functions below)
 Marking = Dict[str, Token]
 
 # ---------------------------------------------------------------------
@@ -18,12 +20,16 @@ def is_omega(token: Token) -> bool:
 # ---------------------------------------------------------------------
 # check if two markings are identical
 def markings_identical(m1: Marking, m2: Marking) -> bool:
+    if not isinstance(m1, dict):
+        return m1.identical(m2)
     return all(m1[p] == m2[p] for p in m1)
 
 
 # ---------------------------------------------------------------------
 # check if m1 >= m2
 def markings_equal_greater(m1: Marking, m2: Marking) -> bool:
+    if not isinstance(m1, dict):
+        return m1.covers(m2)
     for p in m1:
         # omega >= anything
         if is_omega(m1[p]):
@@ -39,6 +45,8 @@ def markings_equal_greater(m1: Marking, m2: Marking) -> bool:
 # ---------------------------------------------------------------------
 # accelerate = token -> omega
 def accelerate(m_prime: Marking, m_old: Marking) -> Marking:
+    if not isinstance(m_prime, dict):
+        return m_prime.accelerated(m_old)
     result: Marking = {}
     for p in m_prime:
         if is_omega(m_old[p]) or is_omega(m_prime[p]) or m_prime[p] > m_old[p]:
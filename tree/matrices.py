@@ -1,3 +1,5 @@
+from dataclasses import dataclass
+
 from snakes.nets import PetriNet ,MultiArc  # type: ignore
 
 # ---------------------------------------------------------------------
@@ -26,3 +28,29 @@ def extract_pre_post(net: PetriNet):
                 POST[t_name][p.name] = label.value
 
     return PRE, POST
+
+# ---------------------------------------------------------------------
+# PRE / POST as index vectors, for explorers working on a flat list of
+# token counts (place order = `places`) instead of marking dicts
+@dataclass
+class CompiledNet:
+    places: list[str]
+    transitions: list[str]
+    pre: list[tuple[tuple[int, int], ...]]     # per transition: (place index, weight)
+    post: list[tuple[tuple[int, int], ...]]
+    delta: list[tuple[tuple[int, int], ...]]   # non-zero POST - PRE per place
+
+def compile_net(PRE, POST, places) -> CompiledNet:
+    index = {p: i for i, p in enumerate(places)}
+    transitions = list(PRE)
+    pre, post, delta = [], [], []
+    for t in transitions:
+        pre.append(tuple((index[p], w) for p, w in PRE[t].items()))
+        post.append(tuple((index[p], w) for p, w in POST[t].items()))
+        change = {}
+        for p, w in PRE[t].items():
+            change[index[p]] = change.get(index[p], 0) - w
+        for p, w in POST[t].items():
+            change[index[p]] = change.get(index[p], 0) + w
+        delta.append(tuple((i, d) for i, d in sorted(change.items()) if d != 0))
+    return CompiledNet(list(places), transitions, pre, post, delta)
@@ -0,0 +1,188 @@
+from tree.markings import Marking, OMEGA
+from tree.sparse import SparseStateStore
+
+# Bit-packed marking keys.
+# Place i gets widths[i] bits at offsets[i] of one Python int: values
+# 0 .. 2**w - 2 are token counts, the all-ones code stands for OMEGA.
+# A marking with 0..3 tokens per place costs 2-3 bits per place instead
+# of a pointer plus an int object in a tuple / dict.
+
+# ---------------------------------------------------------------------
+# bits needed for tokens 0..bound (plus the OMEGA code)
+def bits_for(bound: int) -> int:
+    return max(1, (bound + 1).bit_length())
+
+class MarkingPacker:
+    def __init__(self, places, widths):
+        self.places = list(places)
+        self.widths = list(widths)
+        self.offsets = []
+        offset = 0
+        for w in self.widths:
+            self.offsets.append(offset)
+            offset += w
+        self.total_bits = offset
+        self.n_bytes = max(1, (offset + 7) // 8)
+        self._layout = list(zip(self.offsets, self.widths))
+
+    # widths from per-place bounds (known, or observed e.g. on a coverability graph)
+    @classmethod
+    def from_bounds(cls, places, bounds: dict, default: int = 3, min_bits: int = 1) -> "MarkingPacker":
+        return cls(places, [max(min_bits, bits_for(bounds.get(p, default))) for p in places])
+
+    # places (indexes) whose value does not fit, empty list if all fit
+    def overflow(self, values) -> list[int]:
+        return [i for i, v in enumerate(values)
+                if v != OMEGA and v > (1 << self.widths[i]) - 2]
+
+    # values: token counts in place order
+    def pack_values(self, values) -> int:
+        key = 0
+        for (off, w), v in zip(self._layout, values):
+            key |= ((1 << w) - 1 if v == OMEGA else v) << off
+        return key
+
+    def unpack_values(self, key: int) -> tuple:
+        values = []
+        for off, w in self._layout:
+            code = (key >> off) & ((1 << w) - 1)
+            values.append(OMEGA if code == (1 << w) - 1 else code)
+        return tuple(values)
+
+    def pack(self, marking: Marking) -> int:
+        return self.pack_values([marking[p] for p in self.places])
+
+    def unpack(self, key: int) -> Marking:
+        return dict(zip(self.places, self.unpack_values(key)))
+
+    # fixed-width bytes form of a key (little endian), e.g. for files
+    def key_bytes(self, key: int) -> bytes:
+        return key.to_bytes(self.n_bytes, "little")
+
+    def key_from_bytes(self, data: bytes) -> int:
+        return int.from_bytes(data, "little")
+
+    # packer able to hold `values` too: overflowing places get at least
+    # twice their width, so a growing place is re-packed O(log bound) times
+    def widened(self, values) -> "MarkingPacker":
+        widths = list(self.widths)
+        for i in self.overflow(values):
+            widths[i] = max(2 * widths[i], bits_for(values[i]))
+        return MarkingPacker(self.places, widths)
+
+# per-place bounds read from a graph (e.g. the coverability graph of a
+# bounded net, whose bounds are exact); places holding OMEGA are left out
+def graph_bounds(graph) -> dict[str, int]:
+    bounds = {}
+    unbounded = set()
+    for n in graph.nodes:
+        for p, v in n.marking.items():
+            if v == OMEGA:
+                unbounded.add(p)
+            elif v > bounds.get(p, 0):
+                bounds[p] = v
+            else:
+                bounds.setdefault(p, 0)
+    return {p: b for p, b in bounds.items() if p not in unbounded}
+
+# ---------------------------------------------------------------------
+# visited-state store of packed keys (ints, or fixed-width bytes)
+# A marking over the current widths triggers a re-pack of every stored
+# key (adaptive = True); with adaptive = False it raises OverflowError.
+# Without bounds every place starts at min_bits (0..2 tokens for 2 bits).
+class PackedStateStore:
+    def __init__(self, places, bounds: dict | None = None, initial: Marking | None = None,
+                 adaptive: bool = True, as_bytes: bool = False, min_bits: int = 2):
+        places = list(places)
+        if bounds is None:
+            # observed bounds: start from the initial marking, grow on demand
+            bounds = {p: v for p, v in (initial or {}).items() if v != OMEGA}
+        self.packer = MarkingPacker.from_bounds(places, bounds, default=0, min_bits=min_bits)
+        self.adaptive = adaptive
+        self.as_bytes = as_bytes
+        self.repacks = 0
+        self._keys = set()
+
+    def _key(self, values):
+        if self.packer.overflow(values):
+            if not self.adaptive:
+                raise OverflowError(f"marking {values} does not fit the widths {self.packer.widths}")
+            self._repack(self.packer.widened(values))
+        key = self.packer.pack_values(values)
+        return self.packer.key_bytes(key) if self.as_bytes else key
+
+    def _repack(self, packer):
+        old = self.packer
+        decode = (lambda k: old.unpack_values(old.key_from_bytes(k))) if self.as_bytes else old.unpack_values
+        encode = (lambda v: packer.key_bytes(packer.pack_values(v))) if self.as_bytes else packer.pack_values
+        self._keys = {encode(decode(k)) for k in self._keys}
+        self.packer = packer
+        self.repacks += 1
+
+    def _values(self, marking):
+        return [marking[p] for p in self.packer.places]
+
+    # True if the marking was not stored yet
+    def add(self, marking: Marking) -> bool:
+        return self.add_values(self._values(marking))
+
+    # same, for token counts in place order
+    def add_values(self, values) -> bool:
+        key = self._key(values)
+        if key in self._keys:
+            return False
+        self._keys.add(key)
+        return True
+
+    def __contains__(self, marking: Marking) -> bool:
+        values = self._values(marking)
+        if self.packer.overflow(values):
+            return False
+        key = self.packer.pack_values(values)
+        return (self.packer.key_bytes(key) if self.as_bytes else key) in self._keys
+
+    def __len__(self):
+        return len(self._keys)
+
+    def __iter__(self):
+        for k in self._keys:
+            yield self.packer.unpack(self.packer.key_from_bytes(k) if self.as_bytes else k)
+
+# ---------------------------------------------------------------------
+# reference store: one tuple per marking (no packing)
+class TupleStateStore:
+    def __init__(self, places, **_):
+        self.places = list(places)
+        self._keys = set()
+
+    def add(self, marking: Marking) -> bool:
+        return self.add_values(tuple(marking[p] for p in self.places))
+
+    def add_values(self, values) -> bool:
+        key = tuple(values)
+        if key in self._keys:
+            return False
+        self._keys.add(key)
+        return True
+
+    def __contains__(self, marking: Marking) -> bool:
+        return tuple(marking[p] for p in self.places) in self._keys
+
+    def __len__(self):
+        return len(self._keys)
+
+    def __iter__(self):
+        for k in self._keys:
+            yield dict(zip(self.places, k))
+
+# on-disk store (tree/disk.py), imported on first use
+def _disk_store(places, **options):
+    from tree.disk import DiskStateStore
+    return DiskStateStore(places, **options)
+
+STORES = {
+    "packed": PackedStateStore,
+    "tuple": TupleStateStore,
+    "sparse": SparseStateStore,   # for sparse markings (explore(sparse=True))
+    "disk": _disk_store,
+}
@@ -0,0 +1,211 @@
+import multiprocessing as mp
+import os
+import time
+from collections import deque
+
+from snakes.nets import PetriNet
+from tree.algo import BudgetExceeded
+from tree.codegen import compile_functions
+from tree.explore import ExploreResult
+from tree.graph import KMGraph
+from tree.markings import Marking, OMEGA
+from tree.matrices import extract_pre_post
+
+# Multi-process reachability exploration (bounded nets, like tree/explore.py).
+# Every state has one owner, hash(state) % workers; each worker process keeps
+# the visited set of the states it owns and explores them with the
+# net-specialised functions of tree/codegen.py. Successors owned by another
+# worker are buffered per destination and sent in batches of (source id,
+# transition index, state) over that worker's queue.
+#
+# Termination: a shared counter holds the batches sent but not yet fully
+# processed. A worker sends the batches a batch produces before it takes
+# that batch off the counter, so the counter only reaches 0 when no batch
+# is queued or being worked on, i.e. the exploration is complete.
+#
+# A node id is local index * workers + owner, so ids are known to the
+# worker that creates the node; the coordinator renumbers them (root = 0)
+# when it merges the parts into one KMGraph for tree/properties.
+
+# ---------------------------------------------------------------------
+# one worker process: owns the states with hash(state) % n_workers == me
+def _worker(me, n_workers, PRE, POST, places, inboxes, results, pending, states_seen,
+            abort, batch_size, max_states, build_graph, max_deadlocks):
+    funcs = compile_functions(PRE, POST, places)
+    enabled_all, successor = funcs.enabled_all, funcs.successor
+    inbox = inboxes[me]
+
+    index = {}                   # state -> local index
+    states = []                  # local index -> state (build_graph)
+    dead = set()                 # local indexes without successors
+    edges = []                   # (src id, transition index, dst id)
+    deadlocks, deadlock_count, edge_count = [], 0, 0
+    bounds = [0] * len(places)
+    out = [[] for _ in range(n_workers)]
+    local = deque()
+    reported = 0
+
+    # new states into the shared count (and the state budget)
+    def report():
+        nonlocal reported
+        with states_seen.get_lock():
+            states_seen.value += len(index) - reported
+            if max_states is not None and states_seen.value > max_states:
+                abort.value = 1
+        reported = len(index)
+
+    def send(owner):
+        with pending.get_lock():
+            pending.value += 1
+        inboxes[owner].put(out[owner])
+        out[owner] = []
+        report()
+
+    # dedup of one state arriving at its owner; returns its node id
+    def visit(values):
+        lid = index.get(values)
+        if lid is None:
+            lid = index[values] = len(index)
+            if build_graph:
+                states.append(values)
+            local.append(values)
+            for i, v in enumerate(values):
+                if v > bounds[i]:
+                    bounds[i] = v
+        return lid * n_workers + me
+
+    while True:
+        batch = inbox.get()
+        if batch is None:
+            break
+        for src, k, values in batch:
+            dst = visit(values)
+            if build_graph and src >= 0:
+                edges.append((src, k, dst))
+
+        while local and not abort.value:
+            values = local.popleft()
+            src = index[values] * n_workers + me
+            ks = enabled_all(values)
+            if not ks:
+                deadlock_count += 1
+                if len(deadlocks) < max_deadlocks:
+                    deadlocks.append(values)
+                if build_graph:
+                    dead.add(index[values])
+                continue
+            edge_count += len(ks)
+            for k in ks:
+                succ = successor[k](values)
+                owner = hash(succ) % n_workers
+                if owner == me:
+                    dst = visit(succ)
+                    if build_graph:
+                        edges.append((src, k, dst))
+                else:
+                    out[owner].append((src, k, succ))
+                    if len(out[owner]) >= batch_size:
+                        send(owner)
+
+        for owner in range(n_workers):
+            if out[owner]:
+                send(owner)
+        report()
+        with pending.get_lock():
+            pending.value -= 1
+
+    results.put((me, len(index), edge_count, deadlock_count, deadlocks, bounds,
+                 states if build_graph else None, dead, edges))
+
+# ---------------------------------------------------------------------
+# merge per-worker parts (states, dead-end local ids, edges) into one
+# KMGraph, the root first; node ids are local index * n_workers + owner
+def merge_graph(parts, n_workers, places, root_id, names) -> KMGraph:
+    graph = KMGraph()
+    new_id = {}
+    order = [root_id] + [lid * n_workers + me
+                         for me, part in enumerate(parts) for lid in range(len(part[0]))
+                         if lid * n_workers + me != root_id]
+    for gid in order:
+        states, dead, _ = parts[gid % n_workers]
+        lid = gid // n_workers
+        new_id[gid] = graph.add_node(dict(zip(places, states[lid])),
+                                     "dead-end" if lid in dead else "done")
+    for _, _, edges in parts:
+        for src, k, dst in edges:
+            graph.add_edge(new_id[src], new_id[dst], names[k])
+    return graph
+
+# ---------------------------------------------------------------------
+# workers: processes (default: all cores)
+# batch_size: successors per message to another worker
+# build_graph: also return the reachability graph (tags "done" /
+#   "dead-end", root = node 0) as a KMGraph readable by tree/properties
+def parallel_explore(net: PetriNet, M0: Marking, workers: int | None = None,
+                     batch_size: int = 512, build_graph: bool = False,
+                     max_states: int | None = None, time_limit: float | None = None,
+                     max_deadlocks: int = 100) -> ExploreResult:
+    start = time.perf_counter()
+    deadline = time.monotonic() + time_limit if time_limit is not None else None
+    if any(v == OMEGA for v in M0.values()):
+        raise ValueError("parallel_explore needs a finite initial marking")
+    n = workers or os.cpu_count() or 1
+    PRE, POST = extract_pre_post(net)
+    places = list(M0)
+    names = list(PRE)
+
+    ctx = mp.get_context()
+    inboxes = [ctx.Queue() for _ in range(n)]
+    results = ctx.Queue()
+    pending = ctx.Value("q", 0)
+    states_seen = ctx.Value("q", 0)
+    abort = ctx.Value("b", 0)
+    procs = [ctx.Process(target=_worker, daemon=True,
+                         args=(me, n, PRE, POST, places, inboxes, results, pending, states_seen,
+                               abort, batch_size, max_states, build_graph, max_deadlocks))
+             for me in range(n)]
+    for p in procs:
+        p.start()
+
+    initial = tuple(M0[p] for p in places)
+    root_owner = hash(initial) % n
+    pending.value = 1
+    inboxes[root_owner].put([(-1, -1, initial)])
+
+    try:
+        while pending.value > 0:
+            if abort.value:
+                raise BudgetExceeded(f"state limit of {max_states} reached")
+            if deadline is not None and time.monotonic() > deadline:
+                raise BudgetExceeded(f"time limit of {time_limit}s reached after {states_seen.value} states")
+            if any(p.exitcode is not None for p in procs):
+                raise RuntimeError("a worker process stopped before the end of the exploration")
+            time.sleep(0.002)
+
+        for box in inboxes:
+            box.put(None)
+        parts = [None] * n
+        result = ExploreResult(bounds=dict.fromkeys(places, 0))
+        for _ in range(n):
+            me, count, edge_count, deadlock_count, deadlocks, bounds, states, dead, edges = results.get()
+            result.states += count
+            result.edges += edge_count
+            result.deadlock_count += deadlock_count
+            result.deadlocks += [dict(zip(places, v)) for v in deadlocks]
+            for p, b in zip(places, bounds):
+                result.bounds[p] = max(result.bounds[p], b)
+            parts[me] = (states, dead, edges)
+        for p in procs:
+            p.join()
+    finally:
+        # on error the workers are stopped where they are
+        abort.value = 1
+        for p in procs:
+            if p.is_alive():
+                p.terminate()
+
+    del result.deadlocks[max_deadlocks:]
+    if build_graph:
+        result.graph = merge_graph(parts, n, places, root_owner, names)
+    result.seconds = time.perf_counter() - start
+    return result
@@ -1,3 +1,5 @@
+import time
+
 from tree.algo import KMGraph
 from tree.markings import OMEGA
 
@@ -24,6 +26,37 @@ def has_deadend(graph: KMGraph) -> bool:
     print("  No dead-end detected")
     return False
 
+# dead-end detection on the net itself (bounded nets): explores the state
+# space reduced with stubborn sets (tree/stubborn.py), which keeps every
+# deadlock, instead of a built graph
+def has_deadend_reduced(net, M0, **options) -> bool:
+    from tree.stubborn import stubborn_explore
+    print("[has_deadend_reduced] Exploring the reduced state space")
+    result = stubborn_explore(net, M0, **options)
+    print(f"  {result.states} states, {result.edges} arcs")
+    if result.deadlock_count:
+        print(f"  Dead-end detected: {result.deadlocks[0]}")
+        return True
+    print("  No dead-end detected")
+    return False
+
+# dead-end detection on the complete finite prefix of the unfolding
+# (tree/unfolding.py): safe nets only (ValueError otherwise); time_limit
+# covers the construction and the deadlock search together
+def has_deadend_unfolding(net, M0, max_events: int | None = None,
+                          time_limit: float | None = None) -> bool:
+    from tree.unfolding import unfold
+    deadline = time.monotonic() + time_limit if time_limit is not None else None
+    print("[has_deadend_unfolding] Building the complete finite prefix")
+    prefix = unfold(net, M0, max_events=max_events, time_limit=time_limit)
+    print(f"  {prefix.n_events} events ({prefix.n_cutoffs} cut-offs), {prefix.n_conditions} conditions")
+    found = prefix.deadlock(None if deadline is None else max(0.0, deadline - time.monotonic()))
+    if found is not None:
+        print(f"  Dead-end detected after {found[1]}: {found[0]}")
+        return True
+    print("  No dead-end detected")
+    return False
+
 # ---------------------------------------------------------------------
 # boundedness
 def is_bounded(graph: KMGraph):
@@ -72,11 +105,9 @@ def is_quasi_live(graph: KMGraph, all_transitions: set) -> bool:
 # resettable
 def is_resettable(graph: KMGraph) -> bool:
     print("\n[STEP 4: ANALYSE DE LA RÉINITIALISATION (RETOUR À M0)]")
-    # reverse graph nodes -> root
-    reversed = {n.id: [] for n in graph.nodes}
-    for e in graph.edges:
-        reversed[e.dst].append(e.src)
-    print(f"  > Graphe inverse construit : {reversed}")
+    # reverse graph nodes -> root (cached CSR index of the graph)
+    reversed = graph.reverse()
+    print(f"  > Graphe inverse : {len(reversed)} noeuds, {len(graph.edges)} arcs")
 
     # passed this node or not
     visited = set()
@@ -99,9 +130,9 @@ def is_resettable(graph: KMGraph) -> bool:
 # find reachable transitions from each node
 def reachable_transitions(graph: KMGraph) -> dict[int, set[str]]:
     print("\n[STEP 5: CALCUL DE L'ACCESSIBILITÉ DES TRANSITIONS]")
-    adj = {n.id: [] for n in graph.nodes}
-    for e in graph.edges:
-        adj[e.src].append((e.dst, e.transition))
+    # cached CSR index of the graph, transitions as ids until the end
+    adj = graph.forward()
+    names = graph.transitions
 
     node_reachability = {}
     for start_node in graph.nodes:
@@ -114,9 +145,10 @@ def reachable_transitions(graph: KMGraph) -> dict[int, set[str]]:
             u = stack.pop()
             if u not in visited_nodes:
                 visited_nodes.add(u)
-                for v, trans_name in adj[u]:
-                    reachable_t.add(trans_name)
+                for v, trans_id in adj.arcs(u):
+                    reachable_t.add(trans_id)
                     stack.append(v)
+        reachable_t = {names[t] for t in reachable_t}
         node_reachability[start_node.id] = reachable_t
         print(f"    - Transitions atteignables : {reachable_t if reachable_t else 'AUCUNE'}")
         
@@ -162,4 +194,36 @@ def is_net_live(graph: KMGraph, all_transitions: set) -> bool:
     net_live = all(t_results.values())
     
     print(f"\n  -> SYNTHÈSE : Le réseau est-il vivant ? {'OUI' if net_live else 'NON'}")
-    return net_live
\ No newline at end of file
+    return net_live
+
+# ----------------------------------------------------------------------
+# verdicts from an under-approximate search (tree/bitstate.py): states may
+# have been skipped, so what was found holds (True / False) and what was
+# not found stays unknown (None)
+def approximate_verdicts(result, all_transitions: set) -> dict:
+    print("\n[ANALYSE SOUS-APPROXIMÉE (bitstate)]")
+    print(f"  > {result.states} états visités, couverture estimée {result.coverage:.4%}, "
+          f"probabilité d'omission {result.omission_probability:.2e}")
+    verdicts = {}
+
+    if result.deadlock_count:
+        print(f"  ! Blocage trouvé (séquence : {result.deadlock_traces[0] if result.deadlock_traces else '?'})")
+        verdicts["deadend"] = True
+    else:
+        print("  ? Aucun blocage trouvé (non garanti)")
+        verdicts["deadend"] = None
+
+    if result.omega_places:
+        print(f"  ! Places OMEGA : {sorted(result.omega_places)}. Le réseau est NON-BORNÉ.")
+        verdicts["bounded"] = False
+    else:
+        print("  ? Aucune place OMEGA trouvée (bornetude non garantie)")
+        verdicts["bounded"] = None
+
+    all_names = _get_transition_names(all_transitions)
+    quasi_live = {t: (True if t in result.fired else None) for t in all_names}
+    for t, status in quasi_live.items():
+        print(f"    - {t} : {'[OK] Tirée' if status else '[?] Jamais tirée dans la recherche'}")
+    verdicts["quasi_live"] = quasi_live
+    verdicts["under_approximate"] = True
+    return verdicts
@@ -0,0 +1,284 @@
+from collections.abc import Mapping
+
+from tree.markings import Marking, OMEGA
+from tree.zobrist import _mix
+
+# Sparse persistent markings, for nets with many places.
+# Only places holding tokens (or OMEGA) are stored, in a path-copying trie
+# over the place index: 32-way nodes, each one (bitmap, children) with a
+# child only for the set bits. Changing a place copies the nodes on its
+# path (log32(places) small tuples) and shares everything else with the
+# parent marking, so firing a transition is O(touched places) in time and
+# memory. Comparisons skip shared subtrees.
+#
+# A SparseMarking reads like a Marking (place -> tokens, absent = 0, all
+# places iterated), and the functions of tree/markings and
+# tree/transitions hand sparse markings over to the methods below.
+
+BITS = 5
+WIDTH_MASK = (1 << BITS) - 1
+
+# ---------------------------------------------------------------------
+# place names <-> indexes, shared by every marking of a net
+class PlaceSpace:
+    __slots__ = ("places", "index", "top_shift")
+
+    def __init__(self, places):
+        self.places = list(places)
+        self.index = {p: i for i, p in enumerate(self.places)}
+        depth = 1
+        while (1 << (BITS * depth)) < len(self.places):
+            depth += 1
+        self.top_shift = BITS * (depth - 1)
+
+# ---------------------------------------------------------------------
+# trie helpers; a node is (bitmap, children) and None is the empty trie
+def _get(node, i, shift):
+    while node is not None:
+        bitmap, children = node
+        bit = 1 << ((i >> shift) & WIDTH_MASK)
+        if not bitmap & bit:
+            return 0
+        child = children[(bitmap & (bit - 1)).bit_count()]
+        if shift == 0:
+            return child
+        node, shift = child, shift - BITS
+    return 0
+
+def _set(node, i, shift, value):
+    bitmap, children = node if node is not None else (0, ())
+    bit = 1 << ((i >> shift) & WIDTH_MASK)
+    pos = (bitmap & (bit - 1)).bit_count()
+    present = bitmap & bit
+
+    if shift == 0:
+        child = value if value != 0 else None
+    else:
+        child = _set(children[pos] if present else None, i, shift - BITS, value)
+
+    if child is None:
+        if not present:
+            return node
+        bitmap &= ~bit
+        return (bitmap, children[:pos] + children[pos + 1:]) if bitmap else None
+    if present:
+        return (bitmap, children[:pos] + (child,) + children[pos + 1:])
+    return (bitmap | bit, children[:pos] + (child,) + children[pos:])
+
+def _items(node, shift, base):
+    if node is None:
+        return
+    bitmap, children = node
+    for child in children:
+        low = bitmap & -bitmap
+        bitmap ^= low
+        i = base | ((low.bit_length() - 1) << shift)
+        if shift == 0:
+            yield i, child
+        else:
+            yield from _items(child, shift - BITS, i)
+
+def _equal(a, b, shift):
+    if a is b:
+        return True
+    if a is None or b is None or a[0] != b[0]:
+        return False
+    if shift == 0:
+        return a[1] == b[1]
+    return all(_equal(x, y, shift - BITS) for x, y in zip(a[1], b[1]))
+
+# a >= b with the rules of markings_equal_greater (OMEGA >= anything)
+def _covers(a, b, shift):
+    if a is b or b is None:
+        return True
+    if a is None or b[0] & ~a[0]:
+        return False   # b holds tokens where a has none
+    (bitmap_a, children_a), (bitmap_b, children_b) = a, b
+    for child_b in children_b:
+        low = bitmap_b & -bitmap_b
+        bitmap_b ^= low
+        child_a = children_a[(bitmap_a & (low - 1)).bit_count()]
+        if shift == 0:
+            if child_a == OMEGA:
+                continue
+            if child_b == OMEGA or child_a < child_b:
+                return False
+        elif not _covers(child_a, child_b, shift - BITS):
+            return False
+    return True
+
+# indexes whose values differ (shared subtrees skipped)
+def _diff(a, b, shift, base):
+    if a is b:
+        return
+    bitmap = (a[0] if a else 0) | (b[0] if b else 0)
+    while bitmap:
+        low = bitmap & -bitmap
+        bitmap ^= low
+        idx = low.bit_length() - 1
+        i = base | (idx << shift)
+        ca = _child(a, low)
+        cb = _child(b, low)
+        if shift == 0:
+            if (ca if ca is not None else 0) != (cb if cb is not None else 0):
+                yield i
+        else:
+            yield from _diff(ca, cb, shift - BITS, i)
+
+def _child(node, bit):
+    if node is None or not node[0] & bit:
+        return None
+    return node[1][(node[0] & (bit - 1)).bit_count()]
+
+# key of one stored (place index, value) pair: OMEGA coded as in
+# tree/zobrist.py, so the hash does not depend on the process hash seed
+# (it is pickled with the marking)
+def _key(i: int, v) -> int:
+    return _mix((i << 32) ^ (0 if v == OMEGA else v + 1))
+
+# ---------------------------------------------------------------------
+class SparseMarking(Mapping):
+    __slots__ = ("space", "_root", "_hash")
+
+    def __init__(self, space: PlaceSpace, root=None, h: int = 0):
+        self.space = space
+        self._root = root
+        self._hash = h   # XOR of _key(index, value) over the stored places
+
+    @classmethod
+    def from_dict(cls, marking: Marking, space: PlaceSpace | None = None) -> "SparseMarking":
+        space = space or PlaceSpace(marking)
+        return cls(space).updated(marking)
+
+    # ---- Mapping: every place, absent ones read as 0 ----
+    def __getitem__(self, place):
+        return _get(self._root, self.space.index[place], self.space.top_shift)
+
+    def __iter__(self):
+        return iter(self.space.places)
+
+    def __len__(self):
+        return len(self.space.places)
+
+    # stored (non-zero) places only
+    def nonzero(self):
+        places = self.space.places
+        return ((places[i], v) for i, v in _items(self._root, self.space.top_shift, 0))
+
+    # ---- persistent updates (a new marking, self is unchanged) ----
+    def updated(self, changes) -> "SparseMarking":
+        index, shift = self.space.index, self.space.top_shift
+        root, h = self._root, self._hash
+        for p, v in changes.items():
+            i = index[p]
+            old = _get(root, i, shift)
+            if old == v:
+                continue
+            if old != 0:
+                h ^= _key(i, old)
+            if v != 0:
+                h ^= _key(i, v)
+            root = _set(root, i, shift, v)
+        return SparseMarking(self.space, root, h)
+
+    # successor marking, same rules as tree/transitions.fire
+    def fire(self, pre, post) -> "SparseMarking":
+        changes = {}
+        for p, w in pre.items():
+            v = self[p]
+            if v != OMEGA:
+                changes[p] = v - w
+        for p, w in post.items():
+            v = changes[p] if p in changes else self[p]
+            if v != OMEGA:
+                changes[p] = v + w
+        return self.updated(changes)
+
+    # ---- tree/markings semantics ----
+    def identical(self, other) -> bool:
+        if isinstance(other, SparseMarking) and other.space is self.space:
+            return self._hash == other._hash and _equal(self._root, other._root, self.space.top_shift)
+        return all(self[p] == other[p] for p in self)
+
+    # self >= other (markings_equal_greater)
+    def covers(self, other) -> bool:
+        if isinstance(other, SparseMarking) and other.space is self.space:
+            return _covers(self._root, other._root, self.space.top_shift)
+        for p in self:
+            if self[p] == OMEGA:
+                continue
+            if other[p] == OMEGA or self[p] < other[p]:
+                return False
+        return True
+
+    # accelerate(self, old): OMEGA where old is OMEGA or self went above old
+    def accelerated(self, old) -> "SparseMarking":
+        changes = {}
+        for p, v in self.nonzero():
+            if v != OMEGA:
+                o = old[p]
+                if o == OMEGA or v > o:
+                    changes[p] = OMEGA
+        old_items = old.nonzero() if isinstance(old, SparseMarking) else old.items()
+        for p, o in old_items:
+            if o == OMEGA:
+                changes[p] = OMEGA
+        return self.updated(changes)
+
+    # places whose value differs from other (same place space)
+    def diff(self, other: "SparseMarking"):
+        places = self.space.places
+        return (places[i] for i in _diff(self._root, other._root, self.space.top_shift, 0))
+
+    def __eq__(self, other):
+        if isinstance(other, SparseMarking) and other.space is self.space:
+            return self.identical(other)
+        return Mapping.__eq__(self, other)
+
+    def __hash__(self):
+        return self._hash
+
+    def __repr__(self):
+        return f"SparseMarking({dict(self.nonzero())})"
+
+# ---------------------------------------------------------------------
+# transitions worth testing on a sparse marking: those with an input place
+# holding tokens, plus those without input places, in PRE order (so the
+# successors come out in the same order as with a full scan of PRE)
+class EnablingIndex:
+    def __init__(self, PRE):
+        self._order = {t: i for i, t in enumerate(PRE)}
+        self._free = [t for t in PRE if not PRE[t]]
+        self._consumers = {}
+        for t, pre in PRE.items():
+            for p in pre:
+                self._consumers.setdefault(p, []).append(t)
+
+    def candidates(self, marking: SparseMarking) -> list[str]:
+        found = set(self._free)
+        for p, _ in marking.nonzero():
+            found.update(self._consumers.get(p, ()))
+        return sorted(found, key=self._order.__getitem__)
+
+# ---------------------------------------------------------------------
+# visited-state store of sparse markings (see tree/packing.STORES): the
+# stored markings share their tries with each other
+class SparseStateStore:
+    def __init__(self, places, **_):
+        self.places = list(places)
+        self._markings = set()
+
+    def add(self, marking) -> bool:
+        if marking in self._markings:
+            return False
+        self._markings.add(marking)
+        return True
+
+    def __contains__(self, marking) -> bool:
+        return marking in self._markings
+
+    def __len__(self):
+        return len(self._markings)
+
+    def __iter__(self):
+        return iter(self._markings)
@@ -0,0 +1,60 @@
+import pickle
+import time
+from dataclasses import dataclass, field
+
+# ---------------------------------------------------------------------
+# counters of one phase of the construction
+@dataclass
+class PhaseStats:
+    calls: int = 0
+    hits: int = 0  # meaning depends on the phase (enabled, duplicate found...)
+    ns: int = 0    # cumulative time in nanoseconds
+
+# ---------------------------------------------------------------------
+# profiling result of a tree construction
+# phases: enabled, fire, duplicate, ancestors, accelerate, history
+@dataclass
+class BuildStats:
+    phases: dict[str, PhaseStats] = field(default_factory=dict)
+    nodes: int = 0
+    edges: int = 0
+    peak_frontier: int = 0
+    history_bytes: int = 0
+    total_ns: int = 0
+
+    def phase(self, name: str) -> PhaseStats:
+        if name not in self.phases:
+            self.phases[name] = PhaseStats()
+        return self.phases[name]
+
+    # wrap fn so that every call is counted and timed under `name`
+    # a call is a hit when hit(result) is true (default: truthy result)
+    def timed(self, name: str, fn, hit=bool):
+        ph = self.phase(name)
+        clock = time.perf_counter_ns
+
+        def wrapper(*args):
+            start = clock()
+            result = fn(*args)
+            ph.ns += clock() - start
+            ph.calls += 1
+            if hit(result):
+                ph.hits += 1
+            return result
+
+        return wrapper
+
+    # account one history step (size measured as its pickled length)
+    def add_snapshot(self, snapshot) -> None:
+        self.history_bytes += len(pickle.dumps(snapshot))
+
+    def format(self) -> str:
+        lines = [f"{'phase':<11}{'calls':>9}{'hits':>9}{'ms':>10}"]
+        for name, ph in self.phases.items():
+            lines.append(f"{name:<11}{ph.calls:>9}{ph.hits:>9}{ph.ns / 1e6:>10.2f}")
+        lines.append("")
+        lines.append(f"nodes: {self.nodes}   edges: {self.edges}")
+        lines.append(f"peak frontier: {self.peak_frontier}")
+        lines.append(f"history: {self.history_bytes / 1024:.1f} KiB")
+        lines.append(f"total: {self.total_ns / 1e6:.2f} ms")
+        return "\n".join(lines)
@@ -0,0 +1,176 @@
+import time
+from collections import deque
+
+from snakes.nets import PetriNet
+from tree.algo import BudgetExceeded
+from tree.codegen import compile_functions
+from tree.explore import ExploreResult
+from tree.graph import KMGraph
+from tree.markings import Marking, OMEGA
+from tree.matrices import compile_net, extract_pre_post
+from tree.packing import STORES
+
+# Partial-order reduction with stubborn sets (bounded nets, like
+# tree/explore.py). Independent transitions firing in every order make the
+# full exploration enumerate all their interleavings; from each marking a
+# reduced exploration fires only the enabled transitions of a stubborn set,
+# built from the PRE / POST matrices:
+#   - an enabled transition t brings in every transition sharing an input
+#     place with t (they can disable t, or be disabled by it)
+#   - a disabled transition t brings in the transitions that increase one
+#     place missing tokens for t (nothing else can enable t)
+# starting from one enabled transition (every one is tried, the set with
+# the fewest enabled transitions is kept). Every deadlock of the net is
+# reached, and a marking without successors in the reduced graph is a
+# deadlock of the net.
+#
+# visible: places a reachability property reads. Transitions changing them
+# are then all in the set as soon as one enabled is, and a marking whose
+# reduced successors close a cycle (one is already visited) is expanded in
+# full, so whether some reachable marking satisfies a property of those
+# places is preserved as well.
+
+# ---------------------------------------------------------------------
+# stubborn sets of one net (transition indexes as in tree/matrices.compile_net)
+class StubbornSets:
+    def __init__(self, PRE, POST, places, visible=()):
+        cnet = compile_net(PRE, POST, places)
+        n_places = len(places)
+        self.pre = cnet.pre
+        consumers = [[] for _ in range(n_places)]
+        producers = [[] for _ in range(n_places)]
+        for k in range(len(cnet.transitions)):
+            for i, _ in cnet.pre[k]:
+                consumers[i].append(k)
+            for i, d in cnet.delta[k]:
+                if d > 0:
+                    producers[i].append(k)
+        self.producers = producers
+        self.conflicts = [sorted({u for i, _ in cnet.pre[k] for u in consumers[i]} - {k})
+                          for k in range(len(cnet.transitions))]
+        index = {p: i for i, p in enumerate(places)}
+        shown = {index[p] for p in visible}
+        self.visible = [k for k in range(len(cnet.transitions))
+                        if any(i in shown for i, _ in cnet.delta[k])]
+        self._is_visible = set(self.visible)
+
+    # transitions of the stubborn set grown from `seed`, and its enabled ones
+    def closure(self, m, seed: int, enabled: set) -> list[int]:
+        pre, producers, conflicts = self.pre, self.producers, self.conflicts
+        members = {seed}
+        work = [seed]
+        fired = []
+        with_visible = False
+        while work:
+            t = work.pop()
+            if t in enabled:
+                fired.append(t)
+                new = conflicts[t]
+                if not with_visible and t in self._is_visible:
+                    with_visible = True
+                    new = new + self.visible
+            else:
+                # scapegoat: the missing place with the fewest producers
+                new = min((producers[i] for i, w in pre[t] if m[i] < w), key=len)
+            for u in new:
+                if u not in members:
+                    members.add(u)
+                    work.append(u)
+        return fired
+
+    # enabled transitions to fire from m (all of `enabled` if it is small)
+    def reduce(self, m, enabled: list[int]) -> list[int]:
+        if len(enabled) <= 1:
+            return enabled
+        enabled_set = set(enabled)
+        best = enabled
+        for seed in enabled:
+            fired = self.closure(m, seed, enabled_set)
+            if len(fired) < len(best):
+                best = fired
+                if len(best) == 1:
+                    break
+        return sorted(best)
+
+# ---------------------------------------------------------------------
+# breadth-first exploration of the reduced state space
+# visible: places of a reachability property to preserve (see above)
+# build_graph: the reduced reachability graph as a KMGraph (tags "done" /
+#   "dead-end"), whose dead-ends are exactly the deadlocks of the net
+# max_deadlocks: deadlock markings kept in the result (all are counted)
+def stubborn_explore(net: PetriNet, M0: Marking, visible=(), build_graph: bool = False,
+                     max_states: int | None = None, time_limit: float | None = None,
+                     max_deadlocks: int = 100) -> ExploreResult:
+    start = time.perf_counter()
+    deadline = time.monotonic() + time_limit if time_limit is not None else None
+    if any(v == OMEGA for v in M0.values()):
+        raise ValueError("stubborn_explore needs a finite initial marking")
+    PRE, POST = extract_pre_post(net)
+    places = list(M0)
+    funcs = compile_functions(PRE, POST, places)
+    names, successor, enabled_all = funcs.transitions, funcs.successor, funcs.enabled_all
+    sets = StubbornSets(PRE, POST, places, visible)
+    proviso = bool(visible)
+
+    result = ExploreResult(bounds=dict(M0))
+    initial = tuple(M0[p] for p in places)
+    bound = list(initial)
+    if build_graph:
+        graph = result.graph = KMGraph()
+        graph.add_node(dict(M0))
+        def visit(values):
+            marking = dict(zip(places, values))
+            nid = graph.find_marking(marking)
+            return (True, graph.add_node(marking)) if nid is None else (False, nid)
+    else:
+        seen = result.store = STORES["packed"](places, initial=M0)
+        seen.add_values(initial)
+        def visit(values):
+            return seen.add_values(values), None
+
+    queue = deque([(initial, 0)])
+    result.states = 1
+    while queue:
+        m, nid = queue.popleft()
+        if deadline is not None and time.monotonic() > deadline:
+            raise BudgetExceeded(f"time limit of {time_limit}s reached after {result.states} states")
+        enabled = enabled_all(m)
+        if not enabled:
+            result.deadlock_count += 1
+            if len(result.deadlocks) < max_deadlocks:
+                result.deadlocks.append(dict(zip(places, m)))
+            if build_graph:
+                graph.set_tag(nid, "dead-end")
+            continue
+
+        ks = sets.reduce(m, enabled)
+        closed = False
+        rest = None
+        while ks:
+            for k in ks:
+                succ = successor[k](m)
+                result.edges += 1
+                is_new, dst = visit(succ)
+                if is_new:
+                    result.states += 1
+                    if max_states is not None and result.states > max_states:
+                        raise BudgetExceeded(f"state limit of {max_states} reached")
+                    for i, v in enumerate(succ):
+                        if v > bound[i]:
+                            bound[i] = v
+                    queue.append((succ, dst))
+                else:
+                    closed = True
+                if build_graph:
+                    graph.add_edge(nid, dst, names[k])
+            # cycle proviso: expand in full
+            if proviso and closed and rest is None:
+                ks = rest = [k for k in enabled if k not in ks]
+            else:
+                ks = ()
+        if build_graph:
+            graph.set_tag(nid, "done")
+
+    result.bounds = dict(zip(places, bound))
+    result.seconds = time.perf_counter() - start
+    return result
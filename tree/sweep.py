@@ -0,0 +1,170 @@
+import heapq
+import time
+from dataclasses import dataclass
+
+from snakes.nets import PetriNet
+from tree.algo import BudgetExceeded
+from tree.codegen import compile_functions
+from tree.explore import ExploreResult
+from tree.markings import Marking, OMEGA
+from tree.matrices import compile_net, extract_pre_post
+
+# Sweep-line reachability exploration (bounded nets, like tree/explore.py).
+# A progress measure maps each marking to a number; here a weighted token
+# sum, so a transition changes it by a constant (its column of the
+# incidence matrix times the weights). States are explored in progress
+# order, one layer (progress value) at a time, and a layer is dropped from
+# memory once the sweep has passed it: when no transition lowers the
+# progress, no later state can lead back to it. Peak memory then follows
+# the widest few layers instead of the whole state space.
+#
+# Transitions that lower the progress (regress edges) are handled as in
+# the generalised sweep-line method: their targets are kept for good
+# (persistent) and start another sweep, so every reachable state is still
+# explored, but a state dropped in one sweep may be explored again in a
+# later one. Telling those apart would take a record of every state, so
+# `states` counts explorations and `edges` the arcs fired from them: both
+# exact when no regress edge fired (states_exact), upper bounds on the
+# distinct states and arcs otherwise.
+# Deadlocks are few and kept in a set, so deadlock_count is exact.
+#
+# Without a measure, progress_weights() derives one from the incidence
+# matrix, so that tokens moving toward sink places count as progress.
+
+# ---------------------------------------------------------------------
+# result of a sweep (no store, no graph: passed states are gone)
+@dataclass
+class SweepResult(ExploreResult):
+    states_exact: bool = True        # False: states and edges are upper bounds (re-explorations)
+    peak_states: int = 0             # states held at once (layers + persistent)
+    sweeps: int = 0
+    regress_edges: int = 0           # fired transitions that lowered the progress
+    persistent: int = 0              # states kept for good (regress targets)
+
+# ---------------------------------------------------------------------
+# place weights from the incidence matrix: starting from 0 on the places
+# marked in M0, a transition whose inputs all have a weight gives its
+# unweighted outputs the least weight that makes its gain positive.
+# Every transition is then progressing except those closing a cycle (or
+# feeding places weighted earlier), which regress; unreachable places get 0
+def progress_weights(PRE, POST, M0: Marking) -> dict[str, int]:
+    weight = {p: 0 for p, v in M0.items() if v}
+    changed = True
+    while changed:
+        changed = False
+        for t in PRE:
+            if any(p not in weight for p in PRE[t]):
+                continue
+            free = [p for p in POST[t] if p not in weight]
+            if not free:
+                continue
+            need = (sum(w * weight[p] for p, w in PRE[t].items()) + 1
+                    - sum(w * weight[p] for p, w in POST[t].items() if p in weight))
+            share = max(0, -(-need // sum(POST[t][p] for p in free)))
+            for p in free:
+                weight[p] = share
+            changed = True
+    return {p: weight.get(p, 0) for p in M0}
+
+# ---------------------------------------------------------------------
+# progress: {place: weight} for a weighted token sum (default:
+#   progress_weights); any integer weights give a correct exploration,
+#   weights no transition decreases give the best memory use
+# max_deadlocks: deadlock markings kept in the result (all are counted)
+def sweep_explore(net: PetriNet, M0: Marking, progress: dict[str, int] | None = None,
+                  max_states: int | None = None, time_limit: float | None = None,
+                  max_deadlocks: int = 100) -> SweepResult:
+    start = time.perf_counter()
+    deadline = time.monotonic() + time_limit if time_limit is not None else None
+    if any(v == OMEGA for v in M0.values()):
+        raise ValueError("sweep_explore needs a finite initial marking")
+    PRE, POST = extract_pre_post(net)
+    places = list(M0)
+    if progress is None:
+        progress = progress_weights(PRE, POST, M0)
+    weight = [progress.get(p, 0) for p in places]
+    cnet = compile_net(PRE, POST, places)
+    gain = [sum(weight[i] * d for i, d in delta) for delta in cnet.delta]
+    funcs = compile_functions(PRE, POST, places)
+    enabled_all, successor = funcs.enabled_all, funcs.successor
+
+    result = SweepResult()
+    initial = tuple(M0[p] for p in places)
+    bound = list(initial)
+    persistent = {initial}
+    roots = [initial]
+    stored = peak = 1
+    explored = 0
+    dead = set()
+
+    while roots:
+        result.sweeps += 1
+        layers, heap = {}, []          # progress -> states of that layer
+        for m in roots:
+            v = sum(w * x for w, x in zip(weight, m))
+            if v not in layers:
+                layers[v] = {}
+                heapq.heappush(heap, v)
+            layers[v][m] = None
+        roots = []
+
+        while heap:
+            v = heapq.heappop(heap)
+            layer = layers[v]
+            todo = list(layer)
+            i = 0
+            while i < len(todo):
+                m = todo[i]
+                i += 1
+                explored += 1
+                if max_states is not None and explored > max_states:
+                    raise BudgetExceeded(f"state limit of {max_states} reached")
+                if deadline is not None and not explored & 1023 and time.monotonic() > deadline:
+                    raise BudgetExceeded(f"time limit of {time_limit}s reached after {explored} states")
+                for j, x in enumerate(m):
+                    if x > bound[j]:
+                        bound[j] = x
+                ks = enabled_all(m)
+                if not ks and m not in dead:
+                    dead.add(m)
+                    result.deadlock_count += 1
+                    if len(result.deadlocks) < max_deadlocks:
+                        result.deadlocks.append(dict(zip(places, m)))
+                result.edges += len(ks)
+                for k in ks:
+                    succ = successor[k](m)
+                    if succ in persistent:
+                        continue
+                    g = gain[k]
+                    if g < 0:
+                        # behind the sweep: kept for good, root of the next sweep
+                        result.regress_edges += 1
+                        persistent.add(succ)
+                        roots.append(succ)
+                        stored += 1
+                        peak = max(peak, stored)
+                        continue
+                    target = layer if g == 0 else layers.get(v + g)
+                    if target is None:
+                        target = layers[v + g] = {}
+                        heapq.heappush(heap, v + g)
+                    if succ in target:
+                        continue
+                    target[succ] = None
+                    if g == 0:
+                        todo.append(succ)
+                    stored += 1
+                    if stored > peak:
+                        peak = stored
+            # the sweep has passed this layer
+            del layers[v]
+            stored -= len(layer)
+            stored += sum(1 for m in layer if m in persistent)
+
+    result.states = explored
+    result.states_exact = result.regress_edges == 0
+    result.bounds = dict(zip(places, bound))
+    result.peak_states = peak
+    result.persistent = len(persistent)
+    result.seconds = time.perf_counter() - start
+    return result
@@ -0,0 +1,198 @@
+import os
+import threading
+import time
+from collections import deque
+
+from snakes.nets import PetriNet
+from tree.algo import BudgetExceeded
+from tree.codegen import compile_functions
+from tree.explore import ExploreResult
+from tree.markings import Marking, OMEGA
+from tree.matrices import extract_pre_post
+from tree.parallel import merge_graph
+
+# Thread-parallel reachability exploration (bounded nets).
+# The threads share the generated net functions (tree/codegen.py) and one
+# visited table, so markings are never serialised as with processes:
+#   - the table is split in shards by hash(state), each with its own lock
+#     (lock striping), so threads only wait for each other on one shard
+#   - every thread has its own frontier deque; it takes work from its end
+#     and steals from the other end of another thread's deque when empty
+#   - a shared counter of states pushed but not expanded yet tells the
+#     threads when the exploration is over
+# Under the GIL this is correct but runs one thread at a time; on a
+# free-threaded build (python3.13t) the threads run on separate cores.
+
+# ---------------------------------------------------------------------
+# visited states, sharded with one lock per shard. The id of a state is
+# its index in the shard * n_shards + shard (as tree/parallel.py node ids)
+class ShardedVisited:
+    def __init__(self, places, n_shards: int = 64):
+        self.places = list(places)
+        n = 1
+        while n < n_shards:
+            n <<= 1
+        self.n_shards = n
+        self._mask = n - 1
+        self._locks = [threading.Lock() for _ in range(n)]
+        self._ids = [{} for _ in range(n)]     # state -> id, in insertion order
+
+    # (True, id) for a new state, (False, id) for a known one
+    def add(self, state) -> tuple[bool, int]:
+        s = hash(state) & self._mask
+        ids = self._ids[s]
+        with self._locks[s]:
+            sid = ids.get(state)
+            if sid is not None:
+                return False, sid
+            sid = ids[state] = len(ids) * self.n_shards + s
+        return True, sid
+
+    def __contains__(self, state) -> bool:
+        return state in self._ids[hash(state) & self._mask]
+
+    def __len__(self):
+        return sum(len(ids) for ids in self._ids)
+
+    # markings as dicts, like the stores of tree/packing.py
+    def __iter__(self):
+        for ids in self._ids:
+            for state in ids:
+                yield dict(zip(self.places, state))
+
+    # states of one shard, in id order
+    def shard(self, s: int) -> list:
+        return list(self._ids[s])
+
+# ---------------------------------------------------------------------
+# what one thread found, merged at the end
+class _ThreadPart:
+    def __init__(self, n_places):
+        self.edges = []
+        self.dead = []
+        self.edge_count = 0
+        self.deadlocks = []
+        self.deadlock_count = 0
+        self.bounds = [0] * n_places
+        self.error = None
+
+# ---------------------------------------------------------------------
+# threads: worker threads (default: all cores)
+# shards: lock stripes of the visited table
+# build_graph: reachability graph as a KMGraph (root = node 0) for tree/properties
+def threaded_explore(net: PetriNet, M0: Marking, threads: int | None = None, shards: int = 64,
+                     build_graph: bool = False, max_states: int | None = None,
+                     time_limit: float | None = None, max_deadlocks: int = 100) -> ExploreResult:
+    start = time.perf_counter()
+    deadline = time.monotonic() + time_limit if time_limit is not None else None
+    if any(v == OMEGA for v in M0.values()):
+        raise ValueError("threaded_explore needs a finite initial marking")
+    n = threads or os.cpu_count() or 1
+    PRE, POST = extract_pre_post(net)
+    places = list(M0)
+    funcs = compile_functions(PRE, POST, places)
+    enabled_all, successor = funcs.enabled_all, funcs.successor
+
+    visited = ShardedVisited(places, shards)
+    initial = tuple(M0[p] for p in places)
+    _, root = visited.add(initial)
+    frontiers = [deque() for _ in range(n)]
+    frontiers[0].append((initial, root))
+    pending = [1]                  # pushed, not expanded yet
+    pending_lock = threading.Lock()
+    stop = threading.Event()
+    parts = [_ThreadPart(len(places)) for _ in range(n)]
+
+    def steal(me):
+        for other in range(me + 1, me + n):
+            try:
+                return frontiers[other % n].popleft()
+            except IndexError:
+                continue
+        return None
+
+    def run(me):
+        part = parts[me]
+        own = frontiers[me]
+        edges, bounds = part.edges, part.bounds
+        expanded = 0
+        try:
+            while not stop.is_set():
+                try:
+                    values, sid = own.pop()
+                except IndexError:
+                    item = steal(me)
+                    if item is None:
+                        if pending[0] == 0:
+                            return
+                        time.sleep(0.0002)
+                        continue
+                    values, sid = item
+
+                ks = enabled_all(values)
+                if not ks:
+                    part.deadlock_count += 1
+                    if len(part.deadlocks) < max_deadlocks:
+                        part.deadlocks.append(values)
+                    part.dead.append(sid)
+                part.edge_count += len(ks)
+                new = 0
+                for k in ks:
+                    succ = successor[k](values)
+                    is_new, dst = visited.add(succ)
+                    if is_new:
+                        new += 1
+                        own.append((succ, dst))
+                        for i, v in enumerate(succ):
+                            if v > bounds[i]:
+                                bounds[i] = v
+                    if build_graph:
+                        edges.append((sid, k, dst))
+                with pending_lock:
+                    pending[0] += new - 1
+
+                expanded += 1
+                if not expanded & 255:
+                    if max_states is not None and len(visited) > max_states:
+                        stop.set()
+                    if deadline is not None and time.monotonic() > deadline:
+                        stop.set()
+        except BaseException as e:
+            part.error = e
+            stop.set()
+
+    workers = [threading.Thread(target=run, args=(me,), daemon=True) for me in range(n)]
+    for w in workers:
+        w.start()
+    for w in workers:
+        w.join()
+
+    for part in parts:
+        if part.error is not None:
+            raise part.error
+    states = len(visited)
+    if max_states is not None and states > max_states:
+        raise BudgetExceeded(f"state limit of {max_states} reached")
+    if stop.is_set():
+        raise BudgetExceeded(f"time limit of {time_limit}s reached after {states} states")
+
+    result = ExploreResult(states=states, store=visited, bounds=dict(zip(places, initial)))
+    for part in parts:
+        result.edges += part.edge_count
+        result.deadlock_count += part.deadlock_count
+        result.deadlocks += [dict(zip(places, v)) for v in part.deadlocks]
+        for p, b in zip(places, part.bounds):
+            result.bounds[p] = max(result.bounds[p], b)
+    del result.deadlocks[max_deadlocks:]
+
+    if build_graph:
+        m = visited.n_shards
+        dead = [set() for _ in range(m)]
+        for part in parts:
+            for sid in part.dead:
+                dead[sid % m].add(sid // m)
+        edges = [e for part in parts for e in part.edges]
+        shard_parts = [(visited.shard(s), dead[s], edges if s == 0 else ()) for s in range(m)]
+        result.graph = merge_graph(shard_parts, m, places, root, funcs.transitions)
+    result.seconds = time.perf_counter() - start
+    return result
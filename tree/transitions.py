@@ -17,6 +17,9 @@ def enabled(marking: Marking, pre: Dict[str, int]) -> bool:
 # ---------------------------------------------------------------------
 # fire = franchir transition -> new marking
 def fire(marking: Marking, pre, post) -> Marking:
+    # sparse marking: only the touched places are rebuilt
+    if not isinstance(marking, dict):
+        return marking.fire(pre, post)
     new: Marking = {}
     # copy current marking
     for p in marking:
@@ -36,3 +39,13 @@ def fire(marking: Marking, pre, post) -> Marking:
             new[p] += w
 
     return new
+
+
+# ---------------------------------------------------------------------
+# fire + Zobrist hash of the new marking (tree/zobrist.py), updated from
+# the hash h of the current marking on the pre / post places only
+def fire_hashed(marking: Marking, h: int, pre, post, hasher) -> tuple[Marking, int]:
+    new = fire(marking, pre, post)
+    for p in pre.keys() | post.keys():
+        h = hasher.update(h, p, marking[p], new[p])
+    return new, h
@@ -0,0 +1,253 @@
+import heapq
+import time
+
+from snakes.nets import PetriNet
+from tree.algo import BudgetExceeded
+from tree.markings import Marking
+from tree.matrices import compile_net, extract_pre_post
+
+# Complete finite prefix of the unfolding of a safe net (McMillan, with
+# the total adequate order of Esparza, Römer and Vogler).
+# The unfolding is an acyclic net: a condition is one token on a place, an
+# event one occurrence of a transition consuming and producing conditions.
+# Concurrent transitions give independent events instead of interleavings,
+# so for nets that are mostly concurrency the prefix stays about as large
+# as the net times its depth while the reachability graph is exponential.
+#
+#   - co-relation: every condition keeps the bitset (Python int) of the
+#     conditions it is concurrent with; an event's outputs are concurrent
+#     with what all its inputs are concurrent with, and with each other
+#   - possible extensions: when a condition appears, every transition it
+#     feeds gets its other inputs from pairwise concurrent conditions of
+#     the right places; the extensions wait in a priority queue ordered by
+#     their local configuration [e] (size, Parikh vector, Foata form)
+#   - cut-offs: an event whose [e] leads to a marking already reached by a
+#     smaller local configuration (or to M0) is kept but not extended
+#
+# Every reachable marking is the marking of a configuration of the prefix
+# without cut-off events, so deadlock() searches those configurations for
+# one that leaves no event of the prefix enabled.
+
+# ---------------------------------------------------------------------
+# iterate the set bits of a bitset
+def _bits(x: int):
+    while x:
+        low = x & -x
+        yield low.bit_length() - 1
+        x ^= low
+
+# ---------------------------------------------------------------------
+# the prefix: conditions and events by id (events in adequate order, so
+# the causes of an event always have smaller ids)
+class Prefix:
+    def __init__(self, places, transitions):
+        self.places = places
+        self.transitions = transitions
+        self.cond_place = []        # condition -> place index
+        self.cond_event = []        # condition -> event producing it (-1: initial)
+        self.co = []                # condition -> bitset of concurrent conditions
+        self.ev_trans = []          # event -> transition index
+        self.ev_pre = []            # event -> input conditions
+        self.ev_post = []           # event -> output conditions
+        self.ev_cutoff = []
+        self.initial = 0            # bitset of the initial conditions
+        self.seconds = 0.0
+
+    @property
+    def n_conditions(self) -> int:
+        return len(self.cond_place)
+
+    @property
+    def n_events(self) -> int:
+        return len(self.ev_trans)
+
+    @property
+    def n_cutoffs(self) -> int:
+        return sum(self.ev_cutoff)
+
+    # marking of a cut (bitset of conditions)
+    def marking(self, cut: int) -> Marking:
+        m = dict.fromkeys(self.places, 0)
+        for c in _bits(cut):
+            m[self.places[self.cond_place[c]]] = 1
+        return m
+
+    # ---- deadlock search ----
+    # (marking, firing sequence) of a deadlock, or None. A depth-first
+    # search decides for each event, in id order, whether it is in the
+    # configuration; an event left out while enabled must be disabled by a
+    # later event taking one of its inputs, otherwise the branch is cut.
+    # The search can take exponential time in the number of independent
+    # choices: time_limit bounds it (BudgetExceeded)
+    def deadlock(self, time_limit: float | None = None):
+        deadline = time.monotonic() + time_limit if time_limit is not None else None
+        n = self.n_events
+        pre_bits = [sum(1 << c for c in pre) for pre in self.ev_pre]
+        post_bits = [sum(1 << c for c in post) for post in self.ev_post]
+        consumers = [[] for _ in range(self.n_conditions)]
+        for e, pre in enumerate(self.ev_pre):
+            for c in pre:
+                consumers[c].append(e)
+        # last event after e competing for one of e's inputs (-1: none)
+        rival = [max((f for c in pre for f in consumers[c] if f > e), default=-1)
+                 for e, pre in enumerate(self.ev_pre)]
+
+        # (next event, cut, events in, (last rival, inputs) of events left out enabled)
+        stack = [(0, self.initial, (), ())]
+        steps = 0
+        while stack:
+            steps += 1
+            if deadline is not None and not steps & 1023 and time.monotonic() > deadline:
+                raise BudgetExceeded(f"time limit of {time_limit}s reached in the deadlock search")
+            i, cut, taken, pending = stack.pop()
+            if any(last < i and not pre & ~cut for last, pre in pending):
+                continue
+            if i == n:
+                trace = [self.transitions[self.ev_trans[e]] for e in taken]
+                return self.marking(cut), trace
+            pre = pre_bits[i]
+            if pre & ~cut:
+                stack.append((i + 1, cut, taken, pending))
+                continue
+            if rival[i] > i:
+                stack.append((i + 1, cut, taken, pending + ((rival[i], pre),)))
+            if not self.ev_cutoff[i]:
+                stack.append((i + 1, (cut & ~pre) | post_bits[i], taken + (i,), pending))
+        return None
+
+# ---------------------------------------------------------------------
+# max_events / time_limit: budget of the construction (BudgetExceeded)
+def unfold(net: PetriNet, M0: Marking, max_events: int | None = None,
+           time_limit: float | None = None) -> Prefix:
+    start = time.perf_counter()
+    deadline = time.monotonic() + time_limit if time_limit is not None else None
+    if any(v not in (0, 1) for v in M0.values()):
+        raise ValueError("unfold needs a safe net (initial marking of 0 / 1 tokens)")
+    PRE, POST = extract_pre_post(net)
+    if any(w != 1 for arcs in (PRE, POST) for t in arcs for w in arcs[t].values()):
+        raise ValueError("unfold needs a safe net (arcs of weight 1)")
+    places = list(M0)
+    cnet = compile_net(PRE, POST, places)
+    inputs = [[i for i, _ in pre] for pre in cnet.pre]
+    outputs = [[i for i, _ in post] for post in cnet.post]
+    readers = [[] for _ in places]           # place -> transitions taking from it
+    for k, ins in enumerate(inputs):
+        for i in ins:
+            readers[i].append(k)
+
+    prefix = Prefix(places, cnet.transitions)
+    cond_place, cond_event, co = prefix.cond_place, prefix.cond_event, prefix.co
+    on_place = [0] * len(places)             # place -> bitset of extendable conditions
+
+    # per event: local configuration (bitset of events), Foata level, and
+    # the conditions produced / consumed by the local configuration
+    ev_config, ev_level, ev_produced, ev_consumed = [], [], [], []
+
+    initial = [i for i, p in enumerate(places) if M0[p]]
+    all_initial = (1 << len(initial)) - 1
+    for c, i in enumerate(initial):
+        cond_place.append(i)
+        cond_event.append(-1)
+        co.append(all_initial & ~(1 << c))
+        on_place[i] |= 1 << c
+    prefix.initial = all_initial
+    reached = {frozenset(initial)}           # markings of the local configurations so far
+
+    queue, seq = [], 0
+    generated = set()
+
+    # adequate order key of the local configuration of a possible extension
+    def order_key(k, pre):
+        config = 0
+        level = 0
+        for c in pre:
+            e = cond_event[c]
+            if e >= 0:
+                config |= ev_config[e]
+                level = max(level, ev_level[e])
+        events = list(_bits(config))
+        parikh = sorted([prefix.ev_trans[e] for e in events] + [k])
+        levels = {}
+        for e in events:
+            levels.setdefault(ev_level[e], []).append(prefix.ev_trans[e])
+        levels.setdefault(level + 1, []).append(k)
+        foata = tuple((len(ts), tuple(sorted(ts))) for _, ts in sorted(levels.items()))
+        return (len(parikh), tuple(parikh), foata), config, level + 1
+
+    # possible extensions that use condition c (and conditions known so far)
+    def extensions(c):
+        nonlocal seq
+        for k in readers[cond_place[c]]:
+            # (conditions chosen, conditions concurrent with all of them)
+            choices = [((c,), co[c])]
+            for i in inputs[k]:
+                if i != cond_place[c]:
+                    choices = [(chosen + (b,), cc & co[b])
+                               for chosen, cc in choices for b in _bits(on_place[i] & cc)]
+            for chosen, _ in choices:
+                pre = tuple(sorted(chosen))
+                if (k, pre) in generated:
+                    continue
+                generated.add((k, pre))
+                key, config, level = order_key(k, pre)
+                heapq.heappush(queue, (key, seq, k, pre, config, level))
+                seq += 1
+
+    for c in range(len(initial)):
+        extensions(c)
+
+    while queue:
+        if max_events is not None and prefix.n_events >= max_events:
+            raise BudgetExceeded(f"event limit of {max_events} reached")
+        if deadline is not None and not prefix.n_events & 255 and time.monotonic() > deadline:
+            raise BudgetExceeded(f"time limit of {time_limit}s reached after {prefix.n_events} events")
+        _, _, k, pre, config, level = heapq.heappop(queue)
+        e = prefix.n_events
+        concurrent = _and_all(co, pre)
+        for i in outputs[k]:
+            if on_place[i] & concurrent:
+                raise ValueError(f"unfold needs a safe net (place {places[i]} can hold 2 tokens)")
+
+        post = tuple(range(len(cond_place), len(cond_place) + len(outputs[k])))
+        post_bits = sum(1 << c for c in post)
+        pre_bits = sum(1 << c for c in pre)
+        produced, consumed = post_bits, pre_bits
+        for c in pre:
+            f = cond_event[c]
+            if f >= 0:
+                produced |= ev_produced[f]
+                consumed |= ev_consumed[f]
+        for c, i in zip(post, outputs[k]):
+            cond_place.append(i)
+            cond_event.append(e)
+            co.append(concurrent | (post_bits & ~(1 << c)))
+        marking = frozenset(cond_place[c] for c in _bits((all_initial | produced) & ~consumed))
+        cutoff = marking in reached
+        reached.add(marking)
+
+        prefix.ev_trans.append(k)
+        prefix.ev_pre.append(pre)
+        prefix.ev_post.append(post)
+        prefix.ev_cutoff.append(cutoff)
+        ev_config.append(config | (1 << e))
+        ev_level.append(level)
+        ev_produced.append(produced)
+        ev_consumed.append(consumed)
+        if cutoff:
+            continue
+        for b in _bits(concurrent):
+            co[b] |= post_bits
+        for c, i in zip(post, outputs[k]):
+            on_place[i] |= 1 << c
+        for c in post:
+            extensions(c)
+
+    prefix.seconds = time.perf_counter() - start
+    return prefix
+
+# conditions concurrent with every condition of `conds`
+def _and_all(co, conds) -> int:
+    x = -1
+    for c in conds:
+        x &= co[c]
+    return x
@@ -0,0 +1,56 @@
+from tree.markings import Marking, OMEGA
+
+# Zobrist hashing of markings.
+# Every (place, token value) pair gets a fixed pseudo-random 64-bit key and
+# the hash of a marking is the XOR of the keys of its places. Firing a
+# transition only changes its pre / post places, so the new hash is the old
+# one with those few keys swapped: O(touched places) instead of O(places).
+# OMEGA is a symbol of its own (not a large number), so accelerating a
+# place changes its key like any other value.
+
+MASK = (1 << 64) - 1
+
+# ---------------------------------------------------------------------
+# splitmix64 finaliser: well spread 64-bit values from consecutive inputs
+def _mix(x: int) -> int:
+    x = (x + 0x9E3779B97F4A7C15) & MASK
+    x = ((x ^ (x >> 30)) * 0xBF58476D1CE4E5B9) & MASK
+    x = ((x ^ (x >> 27)) * 0x94D049BB133111EB) & MASK
+    return x ^ (x >> 31)
+
+class ZobristHasher:
+    def __init__(self, places, seed: int = 0x5EED):
+        self.places = list(places)
+        self.seed = seed
+        # place -> (place salt, {token value -> key}), keys made on first use
+        self._tables = {p: (_mix(seed + i), {}) for i, p in enumerate(self.places)}
+
+    # key of one (place, value) pair
+    def key(self, place: str, value) -> int:
+        salt, table = self._tables[place]
+        k = table.get(value)
+        if k is None:
+            code = 0 if value == OMEGA else value + 1
+            k = table[value] = _mix(salt ^ _mix(code))
+        return k
+
+    # full hash of a marking, O(places)
+    def hash(self, marking: Marking) -> int:
+        h = 0
+        for p, v in marking.items():
+            h ^= self.key(p, v)
+        return h
+
+    # hash after one place went from old to new
+    def update(self, h: int, place: str, old, new) -> int:
+        if old == new:
+            return h
+        return h ^ self.key(place, old) ^ self.key(place, new)
+
+    # hash after the marking changed from before to after (any places;
+    # sparse markings list the changed places without a full scan)
+    def rehash(self, h: int, before: Marking, after: Marking) -> int:
+        changed = after.diff(before) if not isinstance(after, dict) else (p for p in after if before[p] != after[p])
+        for p in changed:
+            h ^= self.key(p, before[p]) ^ self.key(p, after[p])
+        return h
@@ -1,5 +1,5 @@
 from PyQt6.QtWidgets import QGraphicsScene, QGraphicsView, QFrame, QInputDialog
-from PyQt6.QtCore import Qt, QPointF
+from PyQt6.QtCore import Qt, QPointF, QTimer
 from PyQt6.QtGui import QPainter
 
 from ui.shapes.MovableEllipse import MovableEllipse
@@ -32,6 +32,10 @@ class PetriNetView(QGraphicsView):
         self.circle_count = 0
         self.square_count = 0
 
+        # Labels of nodes moved since the last arc refresh (see update_arrows)
+        self._dirty_labels = set()
+        self._arrow_flush_pending = False
+
         # --- State ---
         self.current_mode = None  # "circle", "square", "arrow", "erase", or None
         self.start_item = None    # Used when drawing arrows
@@ -47,6 +51,7 @@ class PetriNetView(QGraphicsView):
         self.arrows = []
         self.circle_count = 0
         self.square_count = 0
+        self._dirty_labels.clear()
 
     def mousePressEvent(self, event):
         # --- NEW LOGIC ---
@@ -235,9 +240,26 @@ class PetriNetView(QGraphicsView):
                     self.arrows.remove(a)
 
     def update_arrows(self, label):
-        """Re-calculates geometry for all arcs connected to the moving node."""
+        """Marks the arcs connected to the moving node as dirty.
+
+        Dragging a selection moves every node in the same event, so the
+        actual geometry update is deferred to a zero-timer: each arc is then
+        recomputed once per frame, even when both of its ends moved.
+        """
+        self._dirty_labels.add(label)
+        if not self._arrow_flush_pending:
+            self._arrow_flush_pending = True
+            QTimer.singleShot(0, self._flush_arrows)
+
+    def _flush_arrows(self):
+        """Re-calculates geometry for all arcs connected to the moved nodes."""
+        dirty = self._dirty_labels
+        self._dirty_labels = set()
+        self._arrow_flush_pending = False
+        if not dirty: return
+
         for a_entry in self.arrows:
-            if a_entry["start_label"] == label or a_entry["end_label"] == label:
+            if a_entry["start_label"] in dirty or a_entry["end_label"] in dirty:
                 # This triggers the update_geometry() we fixed earlier
                 a_entry["item"].update_geometry()
 
@@ -0,0 +1,247 @@
+import math
+import os
+import struct
+import sys
+import zlib
+
+from PyQt6.QtCore import Qt, QRectF, QSizeF, QMarginsF, QThread, pyqtSignal
+from PyQt6.QtGui import QImage, QPainter, QPdfWriter, QPageSize, QPageLayout
+from PyQt6.QtSvg import QSvgGenerator
+
+from tree.algo import KMGraph
+from ui.graph import build_scene_from_graph
+
+# Export of coverability graphs to raster (tiled) or vector files.
+# The graph is rendered from its own scene, built from the KMGraph, so the
+# export can run on a worker thread (or headless) without touching the
+# scene shown in the GUI; the items of that scene take their fonts and
+# static texts from the worker thread's own cache (ui/graph.py).
+# A PNG is rendered in horizontal strips streamed into the one file asked
+# for, so its size does not bound the memory used; other raster formats
+# are written by Qt from a whole image, or split in tiles when too large.
+
+TILE_SIZE = 4096               # pixels per tile side (a strip holds as many pixels)
+MAX_PIXELS = 4096 * 4096       # above this a non-PNG raster export is split in tiles
+MARGIN = 20
+
+class ExportCancelled(Exception):
+    pass
+
+# ---------------------------------------------------------------------
+# QApplication for headless use (batch tools): offscreen platform.
+# The instance is kept here so callers may ignore the return value.
+_app = None
+
+def ensure_app():
+    global _app
+    from PyQt6.QtWidgets import QApplication
+    app = QApplication.instance()
+    if app is None:
+        os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+        app = _app = QApplication(sys.argv[:1])
+    return app
+
+# ---------------------------------------------------------------------
+# tiles covering a w x h area: list of (row, col, QRectF in pixels)
+def _tiles(w, h, tile_size):
+    rows, cols = math.ceil(h / tile_size), math.ceil(w / tile_size)
+    return [(r, c, QRectF(c * tile_size, r * tile_size,
+                          min(tile_size, w - c * tile_size), min(tile_size, h - r * tile_size)))
+            for r in range(rows) for c in range(cols)]
+
+# render the tiles one by one; target rect in device pixels, source in scene
+def _render_tiles(scene, painter_for_tile, source, scale, tiles, progress, cancelled):
+    for i, (row, col, target) in enumerate(tiles):
+        if cancelled and cancelled():
+            raise ExportCancelled()
+        src = QRectF(source.x() + target.x() / scale, source.y() + target.y() / scale,
+                     target.width() / scale, target.height() / scale)
+        painter, tile_target, done = painter_for_tile(row, col, target)
+        painter.setClipRect(tile_target)
+        scene.render(painter, tile_target, src)
+        done()
+        if progress:
+            progress(i + 1, len(tiles))
+
+# ---------------------------------------------------------------------
+# PNG file written strip by strip (8-bit RGB, rows compressed as they come)
+class _PngWriter:
+    def __init__(self, path, w, h):
+        self.w = w
+        self.file = open(path, "wb")
+        self.zip = zlib.compressobj(6)
+        self.file.write(b"\x89PNG\r\n\x1a\n")
+        self._chunk(b"IHDR", struct.pack(">IIBBBBB", w, h, 8, 2, 0, 0, 0))
+
+    def _chunk(self, kind, data):
+        self.file.write(struct.pack(">I", len(data)) + kind + data)
+        self.file.write(struct.pack(">I", zlib.crc32(kind + data) & 0xFFFFFFFF))
+
+    # rows of a QImage, each with filter type 0
+    def write_rows(self, image):
+        image = image.convertToFormat(QImage.Format.Format_RGB888)
+        stride, n = image.bytesPerLine(), self.w * 3
+        bits = image.constBits()
+        bits.setsize(image.sizeInBytes())
+        data = bits.asstring()
+        out = self.zip.compress(b"".join(b"\x00" + data[y * stride:y * stride + n]
+                                         for y in range(image.height())))
+        if out:
+            self._chunk(b"IDAT", out)
+
+    def close(self):
+        if self.zip is not None:
+            self._chunk(b"IDAT", self.zip.flush())
+            self._chunk(b"IEND", b"")
+            self.zip = None
+        self.file.close()
+
+# PNG export in strips of at most tile_size**2 pixels: only one strip is
+# ever held in memory, and the file is the one asked for
+def export_png(scene, path, scale=1.0, tile_size=TILE_SIZE, progress=None, cancelled=None):
+    source = scene.itemsBoundingRect().adjusted(-MARGIN, -MARGIN, MARGIN, MARGIN)
+    w, h = math.ceil(source.width() * scale), math.ceil(source.height() * scale)
+    strip = max(1, min(h, tile_size * tile_size // w))
+    strips = [(r, 0, QRectF(0, y, w, min(strip, h - y))) for r, y in enumerate(range(0, h, strip))]
+    writer = _PngWriter(path, w, h)
+
+    def painter_for_tile(row, col, target):
+        image = QImage(w, int(target.height()), QImage.Format.Format_RGB32)
+        image.fill(Qt.GlobalColor.white)
+        p = QPainter(image)
+        p.setRenderHint(QPainter.RenderHint.Antialiasing)
+
+        def done():
+            p.end()
+            writer.write_rows(image)
+        return p, QRectF(0, 0, w, target.height()), done
+
+    try:
+        _render_tiles(scene, painter_for_tile, source, scale, strips, progress, cancelled)
+    except BaseException:
+        writer.close()
+        os.remove(path)
+        raise
+    writer.close()
+    return [path]
+
+# ---------------------------------------------------------------------
+# other raster formats (jpg, ...): one image if it fits in max_pixels, else
+# one file per tile (name_r<row>_c<col>.ext); only one tile is ever held
+# in memory, and the tiles written are removed if the export stops
+def export_raster(scene, path, scale=1.0, tile_size=TILE_SIZE, max_pixels=MAX_PIXELS,
+                  progress=None, cancelled=None):
+    source = scene.itemsBoundingRect().adjusted(-MARGIN, -MARGIN, MARGIN, MARGIN)
+    w, h = math.ceil(source.width() * scale), math.ceil(source.height() * scale)
+    stem, ext = os.path.splitext(path)
+    files = []
+    single = w * h <= max_pixels
+    image = None
+
+    if single:
+        image = QImage(w, h, QImage.Format.Format_RGB32)
+        image.fill(Qt.GlobalColor.white)
+        painter = QPainter(image)
+        painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+
+    def painter_for_tile(row, col, target):
+        if single:
+            return painter, target, lambda: None
+        tile = QImage(int(target.width()), int(target.height()), QImage.Format.Format_RGB32)
+        tile.fill(Qt.GlobalColor.white)
+        p = QPainter(tile)
+        p.setRenderHint(QPainter.RenderHint.Antialiasing)
+        name = f"{stem}_r{row}_c{col}{ext}"
+
+        def done():
+            p.end()
+            tile.save(name)
+            files.append(name)
+        return p, QRectF(0, 0, target.width(), target.height()), done
+
+    try:
+        _render_tiles(scene, painter_for_tile, source, scale, _tiles(w, h, tile_size), progress, cancelled)
+    except BaseException:
+        for name in files:
+            os.remove(name)
+        raise
+    finally:
+        if single:
+            painter.end()
+    if single:
+        image.save(path)
+        files.append(path)
+    return files
+
+# ---------------------------------------------------------------------
+# vector export (svg / pdf): the whole scene in one render pass (tiles
+# would write every item crossing a tile border once per tile)
+def export_vector(scene, path, fmt, progress=None, cancelled=None):
+    source = scene.itemsBoundingRect().adjusted(-MARGIN, -MARGIN, MARGIN, MARGIN)
+    w, h = math.ceil(source.width()), math.ceil(source.height())
+
+    if fmt == "svg":
+        device = QSvgGenerator()
+        device.setFileName(path)
+        device.setSize(QRectF(0, 0, w, h).size().toSize())
+        device.setViewBox(QRectF(0, 0, w, h))
+        device.setTitle("Coverability graph")
+    else:
+        device = QPdfWriter(path)
+        device.setResolution(72)  # 1 scene unit = 1 point
+        device.setPageLayout(QPageLayout(QPageSize(QSizeF(w, h), QPageSize.Unit.Point),
+                                         QPageLayout.Orientation.Portrait, QMarginsF(0, 0, 0, 0)))
+
+    if cancelled and cancelled():
+        raise ExportCancelled()
+    painter = QPainter(device)
+    painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+    try:
+        scene.render(painter, QRectF(0, 0, w, h), source)
+    finally:
+        painter.end()
+    if progress:
+        progress(1, 1)
+    return [path]
+
+# ---------------------------------------------------------------------
+# main entry point: format from the file extension (.png/.jpg/.svg/.pdf)
+# positions (node id -> (x, y)) keeps the layout shown in the GUI
+def export_graph(graph: KMGraph, path: str, scale: float = 1.0, positions=None,
+                 tile_size: int = TILE_SIZE, max_pixels: int = MAX_PIXELS,
+                 progress=None, cancelled=None) -> list[str]:
+    scene = build_scene_from_graph(graph, positions=positions)
+    fmt = os.path.splitext(path)[1].lower().lstrip(".")
+    if fmt in ("svg", "pdf"):
+        return export_vector(scene, path, fmt, progress, cancelled)
+    if fmt == "png":
+        return export_png(scene, path, scale, tile_size, progress, cancelled)
+    return export_raster(scene, path, scale, tile_size, max_pixels, progress, cancelled)
+
+# ---------------------------------------------------------------------
+# export on a worker thread, with progress signals for the GUI
+class GraphExportThread(QThread):
+    progress = pyqtSignal(int, int)     # strips / tiles done, total
+    succeeded = pyqtSignal(list)        # written files
+    failed = pyqtSignal(str)
+
+    def __init__(self, graph, path, positions=None, scale=1.0, parent=None):
+        super().__init__(parent)
+        self.graph = graph
+        self.path = path
+        self.positions = positions
+        self.scale = scale
+        self._cancel = False
+
+    def cancel(self):
+        self._cancel = True
+
+    def run(self):
+        try:
+            files = export_graph(self.graph, self.path, self.scale, self.positions,
+                                 progress=self.progress.emit, cancelled=lambda: self._cancel)
+            self.succeeded.emit(files)
+        except ExportCancelled:
+            self.failed.emit("Export cancelled.")
+        except Exception as e:
+            self.failed.emit(f"{type(e).__name__}: {e}")
@@ -1,286 +1,448 @@
-from PyQt6.QtWidgets import (QGraphicsEllipseItem, QGraphicsTextItem, 
-                             QGraphicsPathItem, QGraphicsScene, QGraphicsItem, QGraphicsPolygonItem)
-from PyQt6.QtGui import QBrush, QPen, QPolygonF, QPainterPath, QFont, QColor
-from PyQt6.QtCore import Qt, QLineF, QPointF
-from tree.algo import KMGraph
+from PyQt6.QtWidgets import (QGraphicsScene, QGraphicsItem, QGraphicsView,
+                             QStyleOptionGraphicsItem)
+from PyQt6.QtGui import (QBrush, QPen, QPolygonF, QPainterPath, QFont, QColor, QPainter,
+                         QStaticText, QTransform)
+from PyQt6.QtCore import Qt, QLineF, QPointF, QRectF
+from tree.algo import KMGraph, format_marking
+from ui.layout import layered_layout
 import math
+import threading
 
 from PyQt6.QtGui import QFont, QPen, QBrush, QColor
 from PyQt6.QtCore import Qt
 
+# -------------------------------------------------------------
+# Level of detail
+# lod = scale of the view (1.0 = 100%). Below these thresholds the items
+# draw less, so zoomed-out views of huge graphs stay interactive.
+LOD_TEXT = 0.35     # labels are not drawn at all
+LOD_ARROWS = 0.35   # no arrowheads
+LOD_SIMPLE = 0.15   # nodes become plain dots, edges straight hairlines
+DOT_SIZE = 4        # pixels of a node drawn as a dot, whatever the zoom
+
+def _lod(painter):
+    return QStyleOptionGraphicsItem.levelOfDetailFromTransform(painter.worldTransform())
+
+def _paint_dot(painter, brush):
+    """Far away node: one square point of DOT_SIZE pixels in the tag color."""
+    pen = QPen(brush.color(), DOT_SIZE)
+    pen.setCosmetic(True)
+    pen.setCapStyle(Qt.PenCapStyle.SquareCap)
+    painter.setPen(pen)
+    painter.drawPoint(QPointF(0, 0))
+
+def configure_graph_view(view: QGraphicsView):
+    """View settings for large graphs: cached background, no painter state
+    save/restore per item, and repaint of the exposed region only (the
+    scene's BSP index already culls what is outside the viewport)."""
+    view.setRenderHint(QPainter.RenderHint.Antialiasing)
+    view.setCacheMode(QGraphicsView.CacheModeFlag.CacheBackground)
+    view.setViewportUpdateMode(QGraphicsView.ViewportUpdateMode.SmartViewportUpdate)
+    view.setOptimizationFlag(QGraphicsView.OptimizationFlag.DontSavePainterState, True)
+    view.setOptimizationFlag(QGraphicsView.OptimizationFlag.DontAdjustForAntialiasing, True)
+
 # -------------------------------------------------------------
 # Graph items
 
 # ---------------------------------------------
 # Node Item
 
-class GraphNode(QGraphicsEllipseItem):
+# Color Logic based on Tag
+TAG_COLORS = {
+    "dead-end": QColor(255, 200, 200),
+    "done": QColor(200, 255, 200),
+    "old": QColor(240, 240, 240),
+    "new": QColor(200, 200, 255),
+}
+DEFAULT_NODE_COLOR = QColor(240, 240, 240)
+EDGE_LABEL_COLOR = QColor("darkred")
+
+def edge_geometry(src, dst, label_w, label_h):
+    """Geometry of an edge between two node items.
+
+    Returns (item pos, path, label top-left, arrowhead polygon, straight
+    segment), or None when the two nodes are on top of each other.
+    """
+    s_pos = src.scenePos()
+    d_pos = dst.scenePos()
+    
+    # --- SELF-LOOP LOGIC ---
+    # --- SELF-LOOP LOGIC (SIDE LOOP WITH IMPROVED ARROW) ---
+    if src == dst:
+        rect = src.rect()
+        w, h = rect.width(), rect.height()
+        
+        path = QPainterPath()
+        
+        # 1. Start/End on the RIGHT side of the oval boundary
+        start_p = QPointF(w/2, -h/4) 
+        end_p = QPointF(w/2, h/4)
+        
+        # 2. Control points pushed Right (w*1.2) to create a clean handle
+        ctrl1 = QPointF(w * 1.2, -h)
+        ctrl2 = QPointF(w * 1.2, h)
+        
+        path.moveTo(start_p)
+        path.cubicTo(ctrl1, ctrl2, end_p)
+        
+        # 3. Position Label centered to the right of the loop
+        label_pos = QPointF(w * 1.1, -label_h / 2)
+        
+        # 4. DYNAMIC ARROWHEAD (Calculates entry angle)
+        tip = end_p
+        # Calculate angle based on the curve's entry direction (from ctrl2 to tip)
+        angle = math.atan2(tip.y() - ctrl2.y(), tip.x() - ctrl2.x())
+        
+        arrow_size = 12
+        wing_angle = 0.5 # Radians (sharper point)
+        
+        # Calculate the two wing points relative to the calculated tangent
+        p2 = tip - QPointF(math.cos(angle - wing_angle) * arrow_size, 
+                           math.sin(angle - wing_angle) * arrow_size)
+        p3 = tip - QPointF(math.cos(angle + wing_angle) * arrow_size, 
+                           math.sin(angle + wing_angle) * arrow_size)
+        
+        # Ensure edge follows the node's scene position
+        return s_pos, path, label_pos, QPolygonF([tip, p2, p3]), QLineF()
+
+    # --- EXISTING STRAIGHT/BENT LINE LOGIC ---
+    center_line = QLineF(s_pos, d_pos)
+    full_len = center_line.length()
+    if full_len < 1: return None
+
+    # --- 1. DYNAMIC OVAL BOUNDARY ---
+    def get_node_radius_at_angle(node, line):
+        r = node.rect()
+        w, h = r.width() / 2, r.height() / 2
+        # line.angle() is in degrees, math.radians converts it for cos/sin
+        angle = math.radians(line.angle())
+        denom = math.sqrt((h * math.cos(angle))**2 + (w * math.sin(angle))**2)
+        return (w * h) / denom if denom != 0 else w
+
+    dist_src = get_node_radius_at_angle(src, center_line)
+    dist_dst = get_node_radius_at_angle(dst, QLineF(d_pos, s_pos))
+
+    # FIX: Use pointAt(percentage) instead of at(pixels)
+    # Percentage = desired_distance / total_length
+    start_outline = center_line.pointAt(dist_src / full_len)
+    end_outline = QLineF(d_pos, s_pos).pointAt(dist_dst / full_len)
+
+    # --- 2. BENDING LOGIC ---
+    is_back_edge = d_pos.y() < s_pos.y()
+    path = QPainterPath()
+    path.moveTo(start_outline)
+    
+    if is_back_edge:
+        mid = QLineF(start_outline, end_outline).center()
+        offset = 60
+        dx, dy = d_pos.x() - s_pos.x(), d_pos.y() - s_pos.y()
+        ctrl_p = QPointF(mid.x() - dy * offset / full_len, mid.y() + dx * offset / full_len)
+        path.quadTo(ctrl_p, end_outline)
+        
+        # Tangent for arrow
+        t = 0.95
+        pos_near_end = (1-t)**2 * start_outline + 2*(1-t)*t * ctrl_p + t**2 * end_outline
+        tangent_line = QLineF(pos_near_end, end_outline)
+    else:
+        path.lineTo(end_outline)
+        tangent_line = QLineF(start_outline, end_outline)
+
+    # --- 3. LABEL POSITIONING ---
+    mid_p = path.pointAtPercent(0.5)
+    
+    # path.angleAtPercent(0.5) returns the angle of the curve at midpoint
+    # We subtract 90 to push it "outward" perpendicular to the line
+    angle_rad = math.radians(path.angleAtPercent(0.5) - 90)
+    
+    padding = 20 
+    # Calculate offset using polar coordinates
+    label_x = mid_p.x() + math.cos(angle_rad) * padding
+    label_y = mid_p.y() - math.sin(angle_rad) * padding
+    label_pos = QPointF(label_x - label_w / 2, label_y - label_h / 2)
+
+    # --- 4. ARROWHEAD ---
+    tip = end_outline 
+    angle = math.atan2(-tangent_line.dy(), tangent_line.dx())
+    arrow_size = 12
+    p2 = tip + QPointF(math.sin(angle - math.pi/3) * arrow_size, math.cos(angle - math.pi/3) * arrow_size)
+    p3 = tip + QPointF(math.sin(angle - math.pi + math.pi/3) * arrow_size, math.cos(angle - math.pi + math.pi/3) * arrow_size)
+
+    # Standard lines: position (0, 0), the path is in scene coordinates
+    return QPointF(0, 0), path, label_pos, QPolygonF([tip, p2, p3]), QLineF(start_outline, end_outline)
+
+
+# -------------------------------------------------------------
+# Lean graph items
+# One QGraphicsItem per node/edge that paints its shape, label and
+# arrowhead itself: no child text/polygon items, shared fonts, and the
+# text layout of each label computed once (QStaticText), edge labels
+# shared by every arc of their transition.
+
+# Fonts, pens and static texts are reentrant, not thread-safe: each thread
+# (the GUI, an export worker) gets its own cache, so a scene built and
+# painted on a worker never shares them with the GUI thread.
+_local = threading.local()
+
+def _cache():
+    if not hasattr(_local, "fonts"):
+        _local.fonts = {}
+        _local.static_text = {}    # edge labels only
+        _local.pens = None
+    return _local
+
+def _font(kind):
+    fonts = _cache().fonts
+    if kind not in fonts:
+        if kind == "node":
+            font = QFont("Arial", 12, QFont.Weight.Bold)
+        else:
+            font = QFont("Consolas", 12) # Monospace font looks good for transitions
+            font.setItalic(True)
+            font.setBold(True)
+        fonts[kind] = font
+    return fonts[kind]
+
+def static_label(kind, text):
+    """(QStaticText, width, height) for a label of the given kind. Edge
+    labels come from the small transition alphabet and are cached for the
+    thread's lifetime; node labels are one per marking, so each node
+    prepares its own (a cache would keep every graph's layouts forever)."""
+    static_text = _cache().static_text
+    cached = static_text.get(text) if kind == "edge" else None
+    if cached is None:
+        st = QStaticText(text)
+        st.setTextFormat(Qt.TextFormat.PlainText)
+        st.prepare(QTransform(), _font(kind))
+        size = st.size()
+        # same margins as a QGraphicsTextItem (document margin = 4)
+        cached = (st, size.width() + 8, size.height() + 8)
+        if kind == "edge":
+            static_text[text] = cached
+    return cached
+
+def _pens():
+    cache = _cache()
+    if cache.pens is None:
+        cache.pens = (QPen(Qt.GlobalColor.black, 3), QPen(Qt.GlobalColor.black, 1.5))
+    return cache.pens
+
+LEAN_NODE_FLAGS = (QGraphicsItem.GraphicsItemFlag.ItemIsMovable
+                   | QGraphicsItem.GraphicsItemFlag.ItemIsSelectable
+                   | QGraphicsItem.GraphicsItemFlag.ItemSendsGeometryChanges)
+
+class LeanGraphNode(QGraphicsItem):
+    """Marking node drawn in a single paint() call."""
     def __init__(self, node):
         super().__init__()
         self.node = node
-        self.edges = [] 
-
-        # Color Logic based on Tag
-        if hasattr(self.node, 'tag'):
-            if self.node.tag == "dead-end":
-                bg_color = QColor(255, 200, 200) 
-            elif self.node.tag == "done":
-                bg_color = QColor(200, 255, 200)
-            elif self.node.tag == "old":
-                bg_color = QColor(240, 240, 240)
-            elif self.node.tag == "new":
-                bg_color = QColor(200, 200, 255)
-        else:
-            bg_color = QColor(240, 240, 240)
+        self.edges = []
 
-        # node appearance
-        self.setBrush(QBrush(bg_color))
-        self.setPen(QPen(Qt.GlobalColor.black, 3))
+        self.text, tw, th = static_label("node", format_marking(node.marking))
+        w, h = tw + 40, th + 20 # Ovals need more width than height to look good
+        self._rect = QRectF(-w/2, -h/2, w, h)
+        self._text_pos = QPointF(-tw/2 + 4, -th/2 + 4)
+        self.set_tag(getattr(node, 'tag', None))
 
-        # node content (marking)
-        marking_text = self.format_marking()
-        self.label = QGraphicsTextItem(marking_text, self)
-        
-        # Style the Font
-        node_font = QFont("Arial", 12, QFont.Weight.Bold)
-        self.label.setFont(node_font)
-        
-        # allow user to move nodes
-        self.setFlag(QGraphicsItem.GraphicsItemFlag.ItemIsMovable)
-        self.setFlag(QGraphicsItem.GraphicsItemFlag.ItemIsSelectable)
-        self.setFlag(QGraphicsItem.GraphicsItemFlag.ItemSendsGeometryChanges)
+        # allow user to move nodes (one call: each flag change goes through itemChange)
+        self.setFlags(LEAN_NODE_FLAGS)
 
-        self.update_geometry()
+    def rect(self):
+        return self._rect
 
-    def update_geometry(self):
-        # Get the size of the text we just styled
-        text_rect = self.label.boundingRect()
-        
-        # Ovals need more width than height to look good
-        padding_x = 40 
-        padding_y = 20
-        
-        w = text_rect.width() + padding_x
-        h = text_rect.height() + padding_y
-        
-        # Set the oval shape
-        self.setRect(-w/2, -h/2, w, h)
-        
-        # Center the text exactly in the middle of the oval
-        self.label.setPos(-text_rect.width()/2, -text_rect.height()/2)
+    def boundingRect(self):
+        return self._rect.adjusted(-1.5, -1.5, 1.5, 1.5)
 
-    def format_marking(self):
-        from tree.markings import OMEGA
-        # Using the Unicode for omega: \u03c9
-        vals = ["\u03c9" if v == OMEGA else str(v) for v in self.node.marking.values()]
-        return "(" + ",".join(vals) + ")"
+    def shape(self):
+        path = QPainterPath()
+        path.addEllipse(self._rect)
+        return path
+
+    def set_tag(self, tag):
+        self.tag = tag
+        self.brush = QBrush(TAG_COLORS.get(tag, DEFAULT_NODE_COLOR))
+        self.update()
+
+    def paint(self, painter, option, widget=None):
+        lod = _lod(painter)
+        if lod < LOD_SIMPLE:
+            _paint_dot(painter, self.brush)
+            return
+        painter.setPen(_pens()[0])
+        painter.setBrush(self.brush)
+        painter.drawEllipse(self._rect)
+        if lod >= LOD_TEXT:
+            painter.setPen(Qt.GlobalColor.black)
+            painter.setFont(_font("node"))
+            painter.drawStaticText(self._text_pos, self.text)
 
     def itemChange(self, change, value):
-        if change == QGraphicsItem.GraphicsItemChange.ItemPositionChange:
+        if change == QGraphicsItem.GraphicsItemChange.ItemPositionHasChanged:
             for edge in self.edges:
                 edge.update_position()
         return super().itemChange(change, value)
 
 
-class GraphEdge(QGraphicsPathItem):
+class LeanGraphEdge(QGraphicsItem):
+    """Transition arc drawn in a single paint() call (path, arrowhead, label)."""
     def __init__(self, src_item, dst_item, transition):
         super().__init__()
         self.src = src_item
         self.dst = dst_item
         self.transition = transition
-        
-        self.setPen(QPen(Qt.GlobalColor.black, 1.5))
-        
-        # Label for the transition
-        self.label = QGraphicsTextItem(transition, self)
-        self.label.setDefaultTextColor(QColor("darkred"))
+        self.text, self._tw, self._th = static_label("edge", transition)
+
+        self.path = QPainterPath()
+        self.arrow = QPolygonF()
+        self.label_pos = QPointF()
+        self.simple_line = QLineF()
+        self._bounds = QRectF()
 
-        edge_font = QFont("Consolas", 12) # Monospace font looks good for transitions
-        edge_font.setItalic(True)
-        edge_font.setBold(True)
-        self.label.setFont(edge_font)
+    def boundingRect(self):
+        return self._bounds
 
-        # Arrowhead item
-        self.arrow_head = QGraphicsPolygonItem(self)
-        self.arrow_head.setBrush(QBrush(Qt.GlobalColor.black))
+    def shape(self):
+        return self.path
 
     def update_position(self):
-        s_pos = self.src.scenePos()
-        d_pos = self.dst.scenePos()
-        
-        # --- SELF-LOOP LOGIC ---
-        # --- SELF-LOOP LOGIC (SIDE LOOP WITH IMPROVED ARROW) ---
-        if self.src == self.dst:
-            rect = self.src.rect()
-            w, h = rect.width(), rect.height()
-            
-            path = QPainterPath()
-            
-            # 1. Start/End on the RIGHT side of the oval boundary
-            start_p = QPointF(w/2, -h/4) 
-            end_p = QPointF(w/2, h/4)
-            
-            # 2. Control points pushed Right (w*1.2) to create a clean handle
-            ctrl1 = QPointF(w * 1.2, -h)
-            ctrl2 = QPointF(w * 1.2, h)
-            
-            path.moveTo(start_p)
-            path.cubicTo(ctrl1, ctrl2, end_p)
-            self.setPath(path)
-            
-            # 3. Position Label centered to the right of the loop
-            l_rect = self.label.boundingRect()
-            self.label.setPos(w * 1.1, -l_rect.height() / 2)
-            
-            # 4. DYNAMIC ARROWHEAD (Calculates entry angle)
-            tip = end_p
-            # Calculate angle based on the curve's entry direction (from ctrl2 to tip)
-            angle = math.atan2(tip.y() - ctrl2.y(), tip.x() - ctrl2.x())
-            
-            arrow_size = 12
-            wing_angle = 0.5 # Radians (sharper point)
-            
-            # Calculate the two wing points relative to the calculated tangent
-            p2 = tip - QPointF(math.cos(angle - wing_angle) * arrow_size, 
-                               math.sin(angle - wing_angle) * arrow_size)
-            p3 = tip - QPointF(math.cos(angle + wing_angle) * arrow_size, 
-                               math.sin(angle + wing_angle) * arrow_size)
-            
-            self.arrow_head.setPolygon(QPolygonF([tip, p2, p3]))
-            
-            # Ensure edge follows the node's scene position
-            self.setPos(s_pos)
+        geo = edge_geometry(self.src, self.dst, self._tw, self._th)
+        self.prepareGeometryChange()
+        if geo is None:
+            self.setPos(0, 0)
+            self.path, self.arrow, self.simple_line = QPainterPath(), QPolygonF(), QLineF()
+            self._bounds = QRectF()
             return
-
-        # --- EXISTING STRAIGHT/BENT LINE LOGIC ---
-        self.setPos(0, 0) # Reset position for standard lines
-        center_line = QLineF(s_pos, d_pos)
-        full_len = center_line.length()
-        if full_len < 1: return
-
-        # --- 1. DYNAMIC OVAL BOUNDARY ---
-        def get_node_radius_at_angle(node, line):
-            r = node.rect()
-            w, h = r.width() / 2, r.height() / 2
-            # line.angle() is in degrees, math.radians converts it for cos/sin
-            angle = math.radians(line.angle())
-            denom = math.sqrt((h * math.cos(angle))**2 + (w * math.sin(angle))**2)
-            return (w * h) / denom if denom != 0 else w
-
-        dist_src = get_node_radius_at_angle(self.src, center_line)
-        dist_dst = get_node_radius_at_angle(self.dst, QLineF(d_pos, s_pos))
-
-        # FIX: Use pointAt(percentage) instead of at(pixels)
-        # Percentage = desired_distance / total_length
-        start_outline = center_line.pointAt(dist_src / full_len)
-        end_outline = QLineF(d_pos, s_pos).pointAt(dist_dst / full_len)
-
-        # --- 2. BENDING LOGIC ---
-        is_back_edge = d_pos.y() < s_pos.y()
-        path = QPainterPath()
-        path.moveTo(start_outline)
-        
-        if is_back_edge:
-            mid = QLineF(start_outline, end_outline).center()
-            offset = 60
-            dx, dy = d_pos.x() - s_pos.x(), d_pos.y() - s_pos.y()
-            ctrl_p = QPointF(mid.x() - dy * offset / full_len, mid.y() + dx * offset / full_len)
-            path.quadTo(ctrl_p, end_outline)
-            
-            # Tangent for arrow
-            t = 0.95
-            pos_near_end = (1-t)**2 * start_outline + 2*(1-t)*t * ctrl_p + t**2 * end_outline
-            tangent_line = QLineF(pos_near_end, end_outline)
-        else:
-            path.lineTo(end_outline)
-            tangent_line = QLineF(start_outline, end_outline)
-
-        self.setPath(path)
-
-        # --- 3. LABEL POSITIONING ---
-        mid_p = path.pointAtPercent(0.5)
-        
-        # path.angleAtPercent(0.5) returns the angle of the curve at midpoint
-        # We subtract 90 to push it "outward" perpendicular to the line
-        angle_rad = math.radians(path.angleAtPercent(0.5) - 90)
-        
-        padding = 20 
-        # Calculate offset using polar coordinates
-        label_x = mid_p.x() + math.cos(angle_rad) * padding
-        label_y = mid_p.y() - math.sin(angle_rad) * padding
-        
-        text_rect = self.label.boundingRect()
-        self.label.setPos(label_x - text_rect.width() / 2, 
-                         label_y - text_rect.height() / 2)
-
-        # --- 4. ARROWHEAD ---
-        tip = end_outline 
-        angle = math.atan2(-tangent_line.dy(), tangent_line.dx())
-        arrow_size = 12
-        p2 = tip + QPointF(math.sin(angle - math.pi/3) * arrow_size, math.cos(angle - math.pi/3) * arrow_size)
-        p3 = tip + QPointF(math.sin(angle - math.pi + math.pi/3) * arrow_size, math.cos(angle - math.pi + math.pi/3) * arrow_size)
-        self.arrow_head.setPolygon(QPolygonF([tip, p2, p3]))
+        pos, self.path, label_pos, self.arrow, self.simple_line = geo
+        self.setPos(pos)
+        # label drawn at its text origin (inside the 4px margin)
+        self.label_pos = label_pos + QPointF(4, 4)
+        label_rect = QRectF(label_pos.x(), label_pos.y(), self._tw, self._th)
+        self._bounds = (self.path.boundingRect() | self.arrow.boundingRect() | label_rect).adjusted(-1, -1, 1, 1)
+
+    def paint(self, painter, option, widget=None):
+        lod = _lod(painter)
+        if lod < LOD_SIMPLE:
+            if self.src == self.dst: return
+            painter.setPen(QPen(Qt.GlobalColor.black, 0)) # cosmetic hairline
+            painter.drawLine(self.simple_line)
+            return
+        painter.setPen(_pens()[1])
+        painter.setBrush(Qt.BrushStyle.NoBrush)
+        painter.drawPath(self.path)
+        if lod >= LOD_ARROWS:
+            painter.setPen(Qt.PenStyle.NoPen)
+            painter.setBrush(Qt.GlobalColor.black)
+            painter.drawPolygon(self.arrow)
+        if lod >= LOD_TEXT:
+            painter.setPen(EDGE_LABEL_COLOR)
+            painter.setFont(_font("edge"))
+            painter.drawStaticText(self.label_pos, self.text)
 
 # --- LAYOUT ALGORITHM ---
 
-def calculate_tree_layout(graph: KMGraph):
+def calculate_tree_layout(graph: KMGraph, widths=None):
+    """Layered layout (see ui/layout.py): node id -> (x, y)."""
     if not graph.nodes:
         return {}
-
-    levels = {graph.nodes[0].id: 0}
-    queue = [graph.nodes[0].id]
-    while queue:
-        u = queue.pop(0)
-        for edge in graph.edges:
-            if edge.src == u and edge.dst not in levels:
-                levels[edge.dst] = levels[u] + 1
-                queue.append(edge.dst)
-
-    nodes_by_level = {}
-    for node_id, lv in levels.items():
-        nodes_by_level.setdefault(lv, []).append(node_id)
-
-    pos = {}
-    X_GAP = 200
-    Y_GAP = 200
-    
-    for lv, ids in nodes_by_level.items():
-        level_width = (len(ids) - 1) * X_GAP
-        start_x = -level_width / 2
-        for i, node_id in enumerate(ids):
-            pos[node_id] = (start_x + (i * X_GAP), lv * Y_GAP)
-            
-    return pos
+    return layered_layout(range(len(graph.nodes)), None, root=0, widths=widths,
+                          succ=graph.forward(), pred=graph.reverse())
 
 # --- SCENE BUILDER ---
 
-def build_scene_from_graph(graph: KMGraph) -> QGraphicsScene:
-    scene = QGraphicsScene()
+def _build_items(graph: KMGraph, scene: QGraphicsScene, positions=None):
+    """Adds one node item per node and one edge item per edge to the scene;
+    positions (node id -> (x, y)) skips the layout."""
     node_items = {}
-
-    positions = calculate_tree_layout(graph)
+    edge_items = []
 
     for node in graph.nodes:
-        item = GraphNode(node)
-        x, y = positions.get(node.id, (0, 0))
+        node_items[node.id] = LeanGraphNode(node)
+
+    # items first: the layout spaces the nodes using their real widths
+    if positions is None:
+        widths = {nid: item.rect().width() for nid, item in node_items.items()}
+        positions = calculate_tree_layout(graph, widths)
+
+    for node_id, item in node_items.items():
+        x, y = positions.get(node_id, (0, 0))
         item.setPos(x, y)
         scene.addItem(item)
-        node_items[node.id] = item
 
     for edge in graph.edges:
         if edge.src in node_items and edge.dst in node_items:
             src_item = node_items[edge.src]
             dst_item = node_items[edge.dst]
             
-            edge_item = GraphEdge(src_item, dst_item, edge.transition)
+            edge_item = LeanGraphEdge(src_item, dst_item, edge.transition)
             scene.addItem(edge_item)
-            scene.addItem(edge_item.label) 
             
             src_item.edges.append(edge_item)
             dst_item.edges.append(edge_item)
             
             edge_item.update_position()
+        else:
+            edge_item = None
+        edge_items.append(edge_item)
 
-    return scene
+    return node_items, edge_items
 
+def build_scene_from_graph(graph: KMGraph, positions=None) -> QGraphicsScene:
+    scene = QGraphicsScene()
+    _build_items(graph, scene, positions)
+    return scene
 
+# --- STEPPER SCENE ---
+
+class SceneStepper:
+    """One persistent scene for the step-by-step view.
+
+    Items and layout come from the final graph of the history. Node and edge
+    ids only ever grow during the construction, so step k shows the first
+    nodes/edges of the final graph; the tags that change between two steps
+    are recorded by the construction (tree/history.py), and moving by one
+    step only touches those items.
+    """
+    def __init__(self, history):
+        self.scene = QGraphicsScene()
+        final_graph = history.graph
+        self.node_items, self.edge_items = _build_items(final_graph, self.scene)
+        self.node_order = [n.id for n in final_graph.nodes]
+
+        # per step: (node count, edge count, [(node id, tag before, tag after)])
+        self.steps = [(n_nodes, n_edges, changes) for n_nodes, n_edges, changes, _ in history.steps]
+
+        # nothing is shown before the first step is applied
+        for item in self.node_items.values():
+            item.setVisible(False)
+        for item in self.edge_items:
+            if item: item.setVisible(False)
+
+        # fixed scene rect: the view does not move while stepping
+        rect = self.scene.itemsBoundingRect()
+        self.scene.setSceneRect(rect.adjusted(-150, -150, 150, 150))
+        self.current = -1
+
+    def positions(self):
+        """Current position of every shown node (node id -> (x, y))."""
+        return {nid: (item.x(), item.y()) for nid, item in self.node_items.items() if item.isVisible()}
+
+    def show_step(self, k):
+        """Moves the scene to step k, one step at a time (O(changes))."""
+        while self.current < k:
+            self.current += 1
+            self._apply(self.current, forward=True)
+        while self.current > k:
+            self._apply(self.current, forward=False)
+            self.current -= 1
+
+    def _apply(self, k, forward):
+        n_nodes, n_edges, changes = self.steps[k]
+        prev_nodes, prev_edges = self.steps[k - 1][:2] if k > 0 else (0, 0)
+
+        for i in range(prev_nodes, n_nodes):
+            self.node_items[self.node_order[i]].setVisible(forward)
+        for i in range(prev_edges, n_edges):
+            if self.edge_items[i]: self.edge_items[i].setVisible(forward)
+        for nid, before, after in changes:
+            tag = after if forward else before
+            if tag is not None:  # None = the node did not exist yet
+                self.node_items[nid].set_tag(tag)
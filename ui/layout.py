@@ -0,0 +1,131 @@
+# Layered (Sugiyama-style) layout for coverability graphs.
+# Pure Python (no Qt) so it can be benchmarked and used headless.
+#
+#  1. layers  : BFS depth from the root, adjacency built once  O(V + E)
+#  2. ordering: barycentric sweeps (down then up) to reduce crossings,
+#               capped at max_iter sweeps                      O(iter * (E + V log V))
+#  3. x coords: each node pulled under the barycenter of its parents,
+#               then pushed apart so neighbours never overlap  O(V + E)
+from collections import deque
+
+X_GAP = 200
+Y_GAP = 200
+NODE_MARGIN = 40  # free space kept between two wide nodes
+
+# ---------------------------------------------------------------------
+# BFS layers; nodes the root cannot reach start their own BFS afterwards
+def _layers(node_ids, succ, root):
+    level = {}
+    order = []
+    starts = [root] + [n for n in node_ids if n != root] if root is not None else list(node_ids)
+
+    for start in starts:
+        if start in level:
+            continue
+        level[start] = 0
+        order.append(start)
+        queue = deque([start])
+        while queue:
+            u = queue.popleft()
+            for v in succ[u]:
+                if v not in level:
+                    level[v] = level[u] + 1
+                    order.append(v)
+                    queue.append(v)
+
+    layers = []
+    for n in order:  # discovery order = initial ordering inside a layer
+        lv = level[n]
+        while len(layers) <= lv:
+            layers.append([])
+        layers[lv].append(n)
+    return layers, level
+
+# ---------------------------------------------------------------------
+# one barycentric pass over the layers in `indices`; neighbours(n) gives
+# the nodes of the reference layer. Returns True if an order changed
+def _sweep(layers, indices, neighbours, level, pos, ref_offset):
+    changed = False
+    for i in indices:
+        layer = layers[i]
+        ref = i + ref_offset
+        keys = {}
+        for n in layer:
+            ps = [pos[m] for m in neighbours[n] if level[m] == ref]
+            keys[n] = sum(ps) / len(ps) if ps else pos[n]
+        new_layer = sorted(layer, key=keys.__getitem__)
+        if new_layer != layer:
+            changed = True
+            layers[i] = new_layer
+            for k, n in enumerate(new_layer):
+                pos[n] = k
+    return changed
+
+# ---------------------------------------------------------------------
+# place the nodes of each layer: as close as possible to the mean x of
+# their parents, at least x_gap apart (more for wide nodes), re-centred
+def _coordinates(layers, pred, level, widths, x_gap, y_gap):
+    xs = {}
+    for lv, layer in enumerate(layers):
+        half = [(widths.get(n, 0) if widths else 0) / 2 for n in layer]
+        desired = []
+        for k, n in enumerate(layer):
+            parents = [xs[m] for m in pred[n] if level[m] < lv]
+            desired.append(sum(parents) / len(parents) if parents else None)
+
+        # nodes without placed parents keep a regular grid slot
+        grid_start = -(len(layer) - 1) * x_gap / 2
+        desired = [d if d is not None else grid_start + k * x_gap for k, d in enumerate(desired)]
+
+        # left to right: respect the ordering and the minimum spacing
+        placed = []
+        for k, d in enumerate(desired):
+            if k == 0:
+                placed.append(d)
+            else:
+                min_x = placed[-1] + max(x_gap, half[k - 1] + half[k] + NODE_MARGIN)
+                placed.append(max(d, min_x))
+
+        # shift the whole layer back so it sits on average where it wanted
+        shift = sum(d - p for d, p in zip(desired, placed)) / len(placed)
+        for n, p in zip(layer, placed):
+            xs[n] = p + shift
+
+    return {n: (xs[n], level[n] * y_gap) for n in xs}
+
+# ---------------------------------------------------------------------
+# main entry point
+# node_ids: iterable of ids, edges: iterable of (src, dst) pairs
+# widths (optional): id -> drawn width, used for the spacing
+# succ / pred (optional): ready-made adjacency, id -> neighbour ids (e.g. the
+# cached CSR indexes of a KMGraph); edges is not read when both are given
+def layered_layout(node_ids, edges, root=None, widths=None,
+                   x_gap: float = X_GAP, y_gap: float = Y_GAP, max_iter: int = 8,
+                   succ=None, pred=None):
+    node_ids = list(node_ids)
+    if not node_ids:
+        return {}
+    if root is None:
+        root = node_ids[0]
+
+    # self loops may stay in a given adjacency: every step skips same-layer nodes
+    if succ is None or pred is None:
+        succ = {n: [] for n in node_ids}
+        pred = {n: [] for n in node_ids}
+        for s, d in edges:
+            if s != d and s in succ and d in succ:
+                succ[s].append(d)
+                pred[d].append(s)
+
+    layers, level = _layers(node_ids, succ, root)
+    pos = {n: k for layer in layers for k, n in enumerate(layer)}
+
+    down = range(1, len(layers))
+    up = range(len(layers) - 2, -1, -1)
+    for _ in range(max_iter):
+        changed = _sweep(layers, down, pred, level, pos, -1)
+        changed |= _sweep(layers, up, succ, level, pos, +1)
+        if not changed:
+            break
+
+    return _coordinates(layers, pred, level, widths, x_gap, y_gap)
@@ -1,8 +1,9 @@
+import os
 import sys
 from PyQt6.QtWidgets import (
     QWidget, QVBoxLayout, QHBoxLayout, QPushButton, QLabel,
     QGroupBox, QGraphicsView, QFrame, QTextEdit, QDialog,
-    QFileDialog, QMessageBox
+    QFileDialog, QMessageBox, QToolButton, QCheckBox, QProgressDialog
 )
 from PyQt6.QtCore import Qt, QRectF, QPointF, QSize
 from PyQt6.QtGui import QPainter, QFont, QColor, QImage
@@ -10,8 +11,10 @@ from PyQt6.QtGui import QPainter, QFont, QColor, QImage
 # Custom Module Imports
 from ui.IconFactory import IconFactory
 from tree.algo import build_tree_with_history
-from ui.graph import build_scene_from_graph
-from tree.properties import is_bounded, is_net_live, is_resettable, is_quasi_live
+from tree.stats import BuildStats
+from ui.graph import SceneStepper, configure_graph_view
+from ui.export import GraphExportThread
+from tree.properties import is_bounded, is_net_live, is_resettable, is_quasi_live, has_deadend
 
 class FullGraphWindow(QDialog):
     """A pop-up window to view the graph in high resolution/full screen."""
@@ -24,7 +27,7 @@ class FullGraphWindow(QDialog):
         layout.setContentsMargins(0, 0, 0, 0)
 
         self.view = QGraphicsView(scene)
-        self.view.setRenderHint(QPainter.RenderHint.Antialiasing)
+        configure_graph_view(self.view)
         self.view.setDragMode(QGraphicsView.DragMode.ScrollHandDrag)
         self.view.setStyleSheet("background-color: white; border: none;")
         layout.addWidget(self.view)
@@ -75,6 +78,7 @@ class AnalysisPanel(QFrame):
 
         self.history = []
         self.current_step = 0
+        self.stepper = None
         self.net = None
         self.initial_marking = None
 
@@ -96,7 +100,7 @@ class AnalysisPanel(QFrame):
         left_col.setSpacing(10)
 
         self.view = QGraphicsView()
-        self.view.setRenderHint(QPainter.RenderHint.Antialiasing)
+        configure_graph_view(self.view)
         self.view.setDragMode(QGraphicsView.DragMode.ScrollHandDrag)
         self.view.setStyleSheet("background-color: white; border: 1px solid #dee2e6; border-radius: 4px;")
         self.view.setHorizontalScrollBarPolicy(Qt.ScrollBarPolicy.ScrollBarAsNeeded)
@@ -215,6 +219,7 @@ class AnalysisPanel(QFrame):
         self.prop_quasi_live = QLabel("-")
         self.prop_live = QLabel("-")
         self.prop_resettable = QLabel("-")
+        self.prop_deadlock = QLabel("-")
 
         def add_row(name, widget):
             f = QFrame()
@@ -240,8 +245,43 @@ class AnalysisPanel(QFrame):
         add_row("Quasi-Live", self.prop_quasi_live)
         add_row("Live", self.prop_live)
         add_row("Resettable", self.prop_resettable)
+        add_row("Deadlock", self.prop_deadlock)
+        self._setup_profiling_section(vbox)
         layout.addWidget(group)
 
+    def _setup_profiling_section(self, layout):
+        """Collapsible section showing the per-phase counters of the last build."""
+        self.btn_profiling = QToolButton()
+        self.btn_profiling.setText("Profiling")
+        self.btn_profiling.setCheckable(True)
+        self.btn_profiling.setArrowType(Qt.ArrowType.RightArrow)
+        self.btn_profiling.setToolButtonStyle(Qt.ToolButtonStyle.ToolButtonTextBesideIcon)
+        self.btn_profiling.setStyleSheet("QToolButton { border: none; font-size: 13px; color: #34495e; }")
+        layout.addWidget(self.btn_profiling)
+
+        self.profiling_box = QFrame()
+        self.profiling_box.setStyleSheet("QFrame { background: #ffffff; border: 1px solid #f1f2f6; border-radius: 5px; }")
+        box = QVBoxLayout(self.profiling_box)
+        box.setContentsMargins(6, 4, 6, 4)
+
+        # Counters are only collected when asked for (no overhead otherwise)
+        self.chk_profiling = QCheckBox("Collect on next build")
+        self.chk_profiling.setStyleSheet("border: none; font-weight: normal;")
+        box.addWidget(self.chk_profiling)
+
+        self.profiling_text = QLabel("No profile yet.")
+        self.profiling_text.setFont(QFont("Consolas", 9))
+        self.profiling_text.setTextInteractionFlags(Qt.TextInteractionFlag.TextSelectableByMouse)
+        self.profiling_text.setStyleSheet("color: #495057; border: none; font-weight: normal;")
+        box.addWidget(self.profiling_text)
+
+        self.profiling_box.setVisible(False)
+        layout.addWidget(self.profiling_box)
+
+    def toggle_profiling(self, expanded):
+        self.btn_profiling.setArrowType(Qt.ArrowType.DownArrow if expanded else Qt.ArrowType.RightArrow)
+        self.profiling_box.setVisible(expanded)
+
     def _setup_legend_panel(self, layout):
         group = QGroupBox("Node Legend")
         group.setStyleSheet("""
@@ -287,6 +327,7 @@ class AnalysisPanel(QFrame):
         self.btn_zoom_reset.clicked.connect(self.reset_view)
         self.btn_maximize.clicked.connect(self.open_full_view)
         self.btn_save_img.clicked.connect(self.save_graph_as_image)
+        self.btn_profiling.toggled.connect(self.toggle_profiling)
 
     # --- LOGIC METHODS ---
     def zoom_in(self):
@@ -313,16 +354,45 @@ class AnalysisPanel(QFrame):
 
     def run_full(self):
         if not self.net: return
-        _, self.history = build_tree_with_history(self.net, self.initial_marking)
+        self.build_history()
         self.current_step = len(self.history) - 1
         self.update_ui()
 
     def run_step_init(self):
         if not self.net: return
-        _, self.history = build_tree_with_history(self.net, self.initial_marking)
+        self.build_history()
         self.current_step = 0
         self.update_ui()
 
+    def build_history(self):
+        stats = BuildStats() if self.chk_profiling.isChecked() else None
+        _, self.history = build_tree_with_history(self.net, self.initial_marking, stats=stats)
+        if stats is not None:
+            self.profiling_text.setText(stats.format())
+
+        # One scene for the whole history, laid out once for the final graph
+        self.stepper = SceneStepper(self.history)
+        self.view.setScene(self.stepper.scene)
+        self.fit_scene()
+
+    def clear_graph(self):
+        """Empties the view and forgets the current history."""
+        if self.view.scene():
+            self.view.scene().clear()
+        self.history = []
+        self.stepper = None
+        self.current_step = 0
+        self.step_counter.setText("0 / 0")
+        self.step_text.setText("Ready...")
+        self.reset_properties_labels()
+
+    def fit_scene(self):
+        rect = self.stepper.scene.sceneRect()
+        if not rect.isNull():
+            self.view.fitInView(rect, Qt.AspectRatioMode.KeepAspectRatio)
+            if self.view.transform().m11() > 1.0: self.view.resetTransform()
+            self.view.centerOn(rect.center())
+
     def go_next(self):
         if self.current_step < len(self.history) - 1:
             self.current_step += 1
@@ -335,18 +405,11 @@ class AnalysisPanel(QFrame):
 
     def update_ui(self):
         if not self.history: return
-        graph, msg = self.history[self.current_step]
-        scene = build_scene_from_graph(graph)
-        self.view.setScene(scene)
-
-        rect = scene.itemsBoundingRect()
-        if not rect.isNull():
-            padding = 150
-            rect.adjust(-padding, -padding, padding, padding)
-            scene.setSceneRect(rect)
-            self.view.fitInView(rect, Qt.AspectRatioMode.KeepAspectRatio)
-            if self.view.transform().m11() > 1.0: self.view.resetTransform()
-            self.view.centerOn(rect.center())
+        # The message is read from the step's delta: no graph of the step is
+        # rebuilt (history[k] costs O(graph + later steps))
+        msg = self.history.steps[self.current_step][3]
+        # Only the items that changed since the shown step are touched
+        self.stepper.show_step(self.current_step)
 
         total = len(self.history) - 1
         self.step_counter.setText(f"{self.current_step} / {total}")
@@ -354,7 +417,8 @@ class AnalysisPanel(QFrame):
         self.btn_next.setEnabled(self.current_step < total)
         self.btn_prev.setEnabled(self.current_step > 0)
 
-        if self.current_step == total: self.calculate_properties(graph)
+        # the last step shows the final graph, which the history holds as is
+        if self.current_step == total: self.calculate_properties(self.history.graph)
         else: self.reset_properties_labels()
 
     def calculate_properties(self, graph):
@@ -362,6 +426,7 @@ class AnalysisPanel(QFrame):
         live = is_net_live(graph, self.net.transition())
         qlive = is_quasi_live(graph, self.net.transition())
         reset = is_resettable(graph)
+        dead = has_deadend(graph)
 
         def set_lbl(lbl, val, text_override=None):
             color = "#27ae60" if val else "#e74c3c"
@@ -372,9 +437,10 @@ class AnalysisPanel(QFrame):
         set_lbl(self.prop_live, live)
         set_lbl(self.prop_quasi_live, qlive)
         set_lbl(self.prop_resettable, reset)
+        set_lbl(self.prop_deadlock, not dead, "YES" if dead else "NO")
 
     def reset_properties_labels(self):
-        for lbl in [self.prop_bounded, self.prop_quasi_live, self.prop_live, self.prop_resettable]:
+        for lbl in [self.prop_bounded, self.prop_quasi_live, self.prop_live, self.prop_resettable, self.prop_deadlock]:
             lbl.setText("-")
             lbl.setStyleSheet("color: #adb5bd; font-weight: bold; border: none;")
 
@@ -388,14 +454,44 @@ class AnalysisPanel(QFrame):
             FullGraphWindow(self.view.scene(), self).exec()
 
     def save_graph_as_image(self):
-        scene = self.view.scene()
-        if not scene: return
-        path, _ = QFileDialog.getSaveFileName(self, "Save Image", "", "PNG Files (*.png)")
-        if path:
-            rect = scene.itemsBoundingRect().adjusted(-20, -20, 20, 20)
-            img = QImage(rect.size().toSize(), QImage.Format.Format_ARGB32)
-            img.fill(Qt.GlobalColor.white)
-            painter = QPainter(img)
-            scene.render(painter, target=QRectF(img.rect()), source=rect)
-            painter.end()
-            img.save(path)
\ No newline at end of file
+        if not self.history or not self.stepper: return
+        path, _ = QFileDialog.getSaveFileName(
+            self, "Save Image", "", "PNG Files (*.png);;SVG Files (*.svg);;PDF Files (*.pdf)")
+        if not path: return
+
+        # The export renders its own scene on a worker thread (tiled for big
+        # PNGs), keeping the node positions currently shown in the view; only
+        # an earlier step needs its graph rebuilt
+        if self.current_step == len(self.history) - 1:
+            graph = self.history.graph
+        else:
+            graph, _ = self.history[self.current_step]
+        self._export_thread = GraphExportThread(graph, path, self.stepper.positions(), parent=self)
+
+        progress = QProgressDialog("Exporting graph...", "Cancel", 0, 0, self)
+        progress.setWindowModality(Qt.WindowModality.WindowModal)
+        progress.setMinimumDuration(300)
+        progress.canceled.connect(self._export_thread.cancel)
+
+        def on_progress(done, total):
+            progress.setMaximum(total)
+            progress.setValue(done)
+
+        def on_done(files):
+            progress.close()
+            if len(files) > 1:
+                # only non-PNG raster formats are split (a PNG is streamed into one file)
+                stem, ext = os.path.splitext(path)
+                QMessageBox.information(self, "Save Image",
+                                        f"The graph was too large for one {ext} image: {len(files)} files were written "
+                                        f"instead of {os.path.basename(path)}, named {os.path.basename(stem)}_r<row>_c<col>{ext}.\n"
+                                        "Save as PNG to get a single file.")
+
+        def on_failed(message):
+            progress.close()
+            QMessageBox.warning(self, "Save Image", message)
+
+        self._export_thread.progress.connect(on_progress)
+        self._export_thread.succeeded.connect(on_done)
+        self._export_thread.failed.connect(on_failed)
+        self._export_thread.start()
@@ -32,8 +32,8 @@ class MovableEllipse(QGraphicsEllipseItem):
     def itemChange(self, change, value):
         # Use ItemPositionChange for smoother, real-time arrow updates
         if change == QGraphicsItem.GraphicsItemChange.ItemPositionChange:
-            # We must use the 'value' (the new position) or call update_arrows
-            # to ensure the geometry re-calculates using the upcoming position.
+            # update_arrows only marks our arcs dirty: the canvas recomputes them
+            # once the move is applied, even when a whole selection is dragged.
             if self.editor:
                 self.editor.update_arrows(self.label_text)
 
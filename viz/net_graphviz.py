@@ -1,9 +1,13 @@
 # GraphViz Test
 
+from concurrent.futures import Future
+
 from graphviz import Digraph
 from snakes.nets import PetriNet  # type: ignore
 
-def draw_petri_net(net: PetriNet, filename: str = "petri_net") -> None:
+from viz.render import render_source
+
+def draw_petri_net(net: PetriNet, filename: str = "petri_net", wait: bool = False) -> Future:
     dot = Digraph(name=net.name, format="png")
 
     # ---- Places ----
@@ -29,5 +33,8 @@ def draw_petri_net(net: PetriNet, filename: str = "petri_net") -> None:
             weight = arc.value
             dot.edge(transition.name, place.name, label=str(weight))
 
-    # Render and save
-    dot.render(filename, cleanup=True)
+    # Render and save (background, cached by content)
+    job = render_source(dot.source, f"{filename}.{dot.format}", dot.format)
+    if wait:
+        job.result()
+    return job
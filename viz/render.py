@@ -0,0 +1,114 @@
+import hashlib
+import os
+import shutil
+import tempfile
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+
+import graphviz
+
+# Background Graphviz rendering.
+# Each job runs the `dot` program in its own subprocess; a small thread pool
+# drives those subprocesses so the caller never blocks. Rendered files are
+# cached by the sha256 of (engine, format, DOT text): exporting the same
+# graph again only copies the cached file.
+
+CACHE_DIR = os.environ.get("KM_RENDER_CACHE", os.path.join(tempfile.gettempdir(), "km_render_cache"))
+MAX_WORKERS = max(1, min(4, os.cpu_count() or 1))
+
+_pool: ThreadPoolExecutor | None = None
+_running: dict[str, Future] = {}     # cache key -> job rendering it
+_running_lock = threading.Lock()     # callers and pool threads both use _running
+
+def _executor() -> ThreadPoolExecutor:
+    global _pool
+    if _pool is None:
+        _pool = ThreadPoolExecutor(max_workers=MAX_WORKERS, thread_name_prefix="graphviz")
+    return _pool
+
+# ---------------------------------------------------------------------
+# cache key of a DOT file, read in chunks (the file can be large)
+def content_key(dot_path: str, fmt: str, engine: str = "dot") -> str:
+    h = hashlib.sha256(f"{engine}\0{fmt}\0".encode())
+    with open(dot_path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+def cached_path(key: str, fmt: str) -> str:
+    return os.path.join(CACHE_DIR, f"{key}.{fmt}")
+
+# ---------------------------------------------------------------------
+# run Graphviz into the cache (written under a temporary name, then moved,
+# so a half-written file is never seen as a cache hit)
+def _render_into_cache(dot_path: str, fmt: str, engine: str, target: str) -> str:
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(suffix=f".{fmt}", dir=CACHE_DIR)
+    os.close(fd)
+    try:
+        graphviz.render(engine, fmt, dot_path, outfile=tmp, quiet=True)
+        os.replace(tmp, target)
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+    return target
+
+def _copy_to(future: Future, src_future: Future, output: str) -> None:
+    try:
+        shutil.copyfile(src_future.result(), output)
+        future.set_result(output)
+    except BaseException as exc:
+        future.set_exception(exc)
+
+# ---------------------------------------------------------------------
+# render a DOT file to `output` in the background.
+# Returns a Future resolving to the output path (already done on a cache hit).
+# remove_source: delete dot_path once it has been rendered (temporary files)
+def render_dot_file(dot_path: str, output: str, fmt: str = "png", engine: str = "dot",
+                    remove_source: bool = False) -> Future:
+    key = content_key(dot_path, fmt, engine)
+    target = cached_path(key, fmt)
+    result: Future = Future()
+
+    if os.path.exists(target):
+        if remove_source:
+            os.remove(dot_path)
+        _copy_to(result, _done(target), output)
+        return result
+
+    # check and submit under the lock: the job's own pop waits until it is
+    # registered, and a second caller sees it instead of rendering again
+    with _running_lock:
+        job = _running.get(key)
+        started = job is None
+        if started:
+            def run():
+                try:
+                    return _render_into_cache(dot_path, fmt, engine, target)
+                finally:
+                    with _running_lock:
+                        _running.pop(key, None)
+                    if remove_source:
+                        os.remove(dot_path)
+            job = _running[key] = _executor().submit(run)
+    if not started and remove_source:
+        os.remove(dot_path)   # the same content is already being rendered
+
+    job.add_done_callback(lambda f: _copy_to(result, f, output))
+    return result
+
+# render DOT text (small graphs built in memory, e.g. graphviz.Digraph.source)
+def render_source(source: str, output: str, fmt: str = "png", engine: str = "dot") -> Future:
+    fd, dot_path = tempfile.mkstemp(suffix=".dot")
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        f.write(source)
+    return render_dot_file(dot_path, output, fmt, engine, remove_source=True)
+
+def _done(value) -> Future:
+    f: Future = Future()
+    f.set_result(value)
+    return f
+
+# remove every cached rendering
+def clear_cache() -> None:
+    shutil.rmtree(CACHE_DIR, ignore_errors=True)